@@ -0,0 +1,83 @@
+"""
+Startup import cost of app.py, measured with `python -X importtime`.
+
+"lazy" imports app.py as it is: subject processors are only referenced by
+import path in cbse.common.subjects. "eager" additionally imports every
+processor module up front, which is what app.py used to do at the top of
+the file. Each scenario runs in a fresh interpreter; the table reports the
+best total over --repeat runs and the modules that account for most of the
+difference.
+
+Run from the repository root:
+    python -m benchmarks.bench_app_import --repeat 5
+"""
+import re
+import sys
+import argparse
+import subprocess
+
+# The modules named by the import paths in cbse.common.subjects.subject_processors.
+PROCESSOR_MODULES = [
+    "cbse.six_to_ten_studies.english_main",
+    "cbse.six_to_ten_studies.science_main",
+    "cbse.six_to_ten_studies.social_science_main",
+    "cbse.six_to_ten_studies.maths_main",
+    "cbse.six_to_ten_studies.tamil_main",
+    "cbse.six_to_ten_studies.hindi_main",
+    "cbse.higher_studies.biotechnology_main",
+    "cbse.higher_studies.business_studies_main",
+    "cbse.higher_studies.chemistry_main",
+    "cbse.higher_studies.physics_main",
+]
+
+SCENARIOS = {
+    "lazy": "import app",
+    "eager": "import app\n" + "\n".join(f"import {name}" for name in PROCESSOR_MODULES),
+}
+
+# import time:       123 |        456 | module.name
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+
+def measure(code):
+    """Runs `code` under -X importtime; returns {module: cumulative_us} for top-level imports."""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                         capture_output=True, text=True, check=True)
+    top_level = {}
+    for line in out.stderr.splitlines():
+        m = _IMPORTTIME_RE.match(line)
+        # Nested imports are indented by two spaces per level under the importing module.
+        if m and len(m.group(3)) <= 1:
+            top_level[m.group(4)] = top_level.get(m.group(4), 0) + int(m.group(2))
+    return top_level
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="heaviest extra imports to list")
+    args = parser.parse_args()
+
+    # One unmeasured run so both scenarios start with compiled .pyc files.
+    measure(SCENARIOS["eager"])
+
+    best = {}
+    for name, code in SCENARIOS.items():
+        runs = [measure(code) for _ in range(args.repeat)]
+        best[name] = min(runs, key=lambda modules: sum(modules.values()))
+
+    print(f"{'scenario':<8} {'top-level imports':>18} {'import ms':>10}")
+    for name, modules in best.items():
+        print(f"{name:<8} {len(modules):>18} {sum(modules.values()) / 1000:>10.1f}")
+
+    lazy_ms, eager_ms = (sum(best[name].values()) / 1000 for name in ("lazy", "eager"))
+    print(f"saved at startup: {eager_ms - lazy_ms:.1f} ms ({eager_ms / lazy_ms:.1f}x)")
+
+    extra = {mod: us for mod, us in best["eager"].items() if mod not in best["lazy"]}
+    print("\nHeaviest imports only paid by the eager scenario:")
+    for mod, us in sorted(extra.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {mod:<50} {us / 1000:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
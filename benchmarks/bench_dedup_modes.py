@@ -0,0 +1,108 @@
+"""
+The dedup modes of near_duplicates.find_duplicate_pairs against a plain
+Python double loop, on synthetic question texts.
+
+For every size, question texts are drawn like the synthetic chapters'
+(see benchmarks.synthetic_docs; a share are exact or one-word-longer
+repeats) and deduplicated three ways:
+
+    loop    every pair scored by TF-IDF cosine in pure Python (the reference)
+    tfidf   the same scores from blocked sparse matrix products (DEDUP_MODE=tfidf)
+    lsh     MinHash LSH candidates checked by shingle Jaccard (the default mode)
+
+The table reports wall seconds, the duplicates found and how many of them
+match the loop's; the loop is skipped above --loop-max questions, where it
+takes minutes. With --memory every run is repeated under tracemalloc (which
+sees NumPy's buffers too, but slows pure Python down several times) for its
+peak traced memory.
+
+Run from the repository root:
+    python -m benchmarks.bench_dedup_modes
+    python -m benchmarks.bench_dedup_modes --sizes 200 2000 20000 --block-size 1024 --memory
+"""
+import math
+import time
+import random
+import argparse
+import tracemalloc
+
+from benchmarks.synthetic_docs import ENGLISH_WORDS, TextSource
+from cbse.common.near_duplicates import find_duplicate_pairs
+from cbse.common.tfidf_similarity import (TFIDF_BLOCK_SIZE, TFIDF_COSINE_THRESHOLD, find_tfidf_pairs,
+                                          split_exact_duplicates)
+
+DEFAULT_SIZES = (200, 1000, 5000, 20000)
+
+
+def double_loop_pairs(texts, threshold=TFIDF_COSINE_THRESHOLD):
+    """find_tfidf_pairs, one pair at a time with dict vectors."""
+    pairs, unique_idx, shingle_sets = split_exact_duplicates(texts)
+    df = {}
+    for shingles in shingle_sets:
+        for h in shingles:
+            df[h] = df.get(h, 0) + 1
+    vectors = []
+    for shingles in shingle_sets:
+        weights = {h: math.log((1 + len(shingle_sets)) / (1 + df[h])) + 1 for h in shingles}
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        vectors.append({h: w / norm for h, w in weights.items()})
+    for j, vector in enumerate(vectors):
+        for i in range(j):
+            other = vectors[i]
+            similarity = sum(w * other[h] for h, w in vector.items() if h in other)
+            if similarity >= threshold:
+                pairs.append((unique_idx[i], unique_idx[j], min(1.0, round(similarity, 4))))
+                break
+    pairs.sort(key=lambda pair: pair[1])
+    return pairs
+
+
+def synthetic_texts(count, duplicate_rate, near_duplicate_rate, seed):
+    text = TextSource(ENGLISH_WORDS, random.Random(seed), duplicate_rate, near_duplicate_rate)
+    return [text.question("Which statement about {} is correct?") for _ in range(count)]
+
+
+def _peak_traced_mb(fn, *args):
+    tracemalloc.start()
+    fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES), help="questions per run")
+    parser.add_argument("--duplicate-rate", type=float, default=0.1)
+    parser.add_argument("--near-duplicate-rate", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--block-size", type=int, default=TFIDF_BLOCK_SIZE, help="questions per tfidf block")
+    parser.add_argument("--loop-max", type=int, default=5000, help="largest size to run the double loop on")
+    parser.add_argument("--memory", action="store_true", help="also measure peak traced memory (slow)")
+    args = parser.parse_args()
+
+    print(f"{'questions':>9} {'mode':<6} {'seconds':>8} {'peak MB':>8} {'dups':>6} {'same as loop':>12} "
+          f"{'speed-up':>9}", flush=True)
+    for size in args.sizes:
+        texts = synthetic_texts(size, args.duplicate_rate, args.near_duplicate_rate, args.seed)
+        runs = [("tfidf", find_tfidf_pairs, (texts, TFIDF_COSINE_THRESHOLD, args.block_size)),
+                ("lsh", find_duplicate_pairs, (texts, None, "lsh"))]
+        if size <= args.loop_max:
+            runs.insert(0, ("loop", double_loop_pairs, (texts,)))
+        reference = loop_seconds = None
+        for mode, fn, fn_args in runs:
+            start = time.perf_counter()
+            pairs = fn(*fn_args)
+            elapsed = time.perf_counter() - start
+            peak_mb = f"{_peak_traced_mb(fn, *fn_args):.1f}" if args.memory else "-"
+            found = {(orig, dup) for orig, dup, _ in pairs}
+            if mode == "loop":
+                reference, loop_seconds = found, elapsed
+            same = f"{len(found & reference)}/{len(reference)}" if reference is not None else "-"
+            speed_up = f"{loop_seconds / elapsed:.0f}x" if loop_seconds is not None and mode != "loop" else "-"
+            print(f"{size:>9} {mode:<6} {elapsed:>8.3f} {peak_mb:>8} {len(pairs):>6} {same:>12} {speed_up:>9}",
+                  flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark: python-docx `Document(path).paragraphs` vs the streaming reader
+in cbse.common.docx_stream, on a synthetic question bank with embedded images.
+
+Each reader runs in a fresh subprocess so peak RSS is measured in isolation.
+
+Run from the repository root:
+    python -m benchmarks.bench_docx_reader --paragraphs 20000 --images 4
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import struct
+import argparse
+import resource
+import tempfile
+import subprocess
+
+
+def _png_bytes(width, height):
+    """A valid, incompressible RGB PNG (random pixels) of the given size."""
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    raw = b"".join(b"\x00" + os.urandom(width * 3) for _ in range(height))
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, 1))
+            + chunk(b"IEND", b""))
+
+
+def build_docx(path, paragraphs, images, image_side=1500):
+    import docx
+    from docx.shared import Inches
+
+    document = docx.Document()
+    per_image = max(1, paragraphs // (images + 1))
+    image_path = os.path.join(os.path.dirname(path), "bench_image.png")
+    for i in range(paragraphs):
+        q_num = i % 200 + 1
+        document.add_paragraph(f"{q_num}) Which of the following statements about sample topic {i} is correct?")
+        if images > 0 and i % per_image == per_image - 1:
+            # A fresh random image each time so python-docx cannot de-duplicate the parts.
+            with open(image_path, "wb") as f:
+                f.write(_png_bytes(image_side, image_side))
+            document.add_picture(image_path, width=Inches(2))
+            images -= 1
+    document.save(path)
+    if os.path.exists(image_path):
+        os.remove(image_path)
+
+
+def _read_python_docx(path):
+    import docx
+    return [p.text for p in docx.Document(path).paragraphs]
+
+
+def _read_streaming(path):
+    from cbse.common.docx_stream import iter_paragraphs
+    return [p.text for p in iter_paragraphs(path)]
+
+
+READERS = {"python-docx": _read_python_docx, "streaming": _read_streaming}
+
+
+def _peak_rss_kb():
+    # VmHWM is reset on exec; ru_maxrss can carry over the parent's peak on Linux.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _child(variant, path):
+    start = time.perf_counter()
+    texts = READERS[variant](path)
+    elapsed = time.perf_counter() - start
+    peak_kb = _peak_rss_kb()
+    print(json.dumps({"variant": variant, "seconds": elapsed, "peak_rss_mb": peak_kb / 1024, "paragraphs": len(texts)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paragraphs", type=int, default=20000)
+    parser.add_argument("--images", type=int, default=4)
+    parser.add_argument("--docx", help="benchmark an existing .docx instead of a synthetic one")
+    parser.add_argument("--child", nargs=2, metavar=("VARIANT", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.docx
+        if not path:
+            path = os.path.join(tmp, "bench.docx")
+            build_docx(path, args.paragraphs, args.images)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"Input: {path} ({size_mb:.1f} MB)")
+
+        results = {}
+        for variant in READERS:
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_docx_reader", "--child", variant, path],
+                check=True, capture_output=True, text=True,
+            )
+            results[variant] = json.loads(out.stdout.strip().splitlines()[-1])
+
+    print(f"{'reader':<12} {'paragraphs':>10} {'seconds':>9} {'peak RSS MB':>12}")
+    for variant, r in results.items():
+        print(f"{variant:<12} {r['paragraphs']:>10} {r['seconds']:>9.3f} {r['peak_rss_mb']:>12.1f}")
+    base, new = results["python-docx"], results["streaming"]
+    print(f"speed-up: {base['seconds'] / new['seconds']:.1f}x, "
+          f"peak RSS: {base['peak_rss_mb']:.0f} MB -> {new['peak_rss_mb']:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Adversarial benchmark for the instruction-line detector ("Answer the
+following questions briefly ..."): the old lookahead pattern
+`^(?=(?:.*\b(answer|following|...)\b.*?){3,}).*$` vs KeywordCountRule.
+
+Each input is a long line that contains only two keywords (or many
+near-miss words), so the lookahead has to try every way of placing three
+keywords before it can give up. The table reports the worst time per line
+and the cost per KB of input; for KeywordCountRule the per-KB cost stays flat
+as lines grow, while the lookahead's grows with the line length.
+
+The lookahead is only timed up to --max-regex-words (it takes about a
+minute per line at 4,000 words); longer lines are timed for the new rule only.
+
+Run from the repository root:
+    python -m benchmarks.bench_instruction_lines
+"""
+import re
+import time
+import argparse
+
+from cbse.common.line_rules import KeywordCountRule
+
+KEYWORDS = ["answer", "following", "questions", "briefly", "shortly"]
+LOOKAHEAD = re.compile(r"(?i)^(?=(?:.*\b(answer|following|questions|briefly|shortly)\b.*?){3,}).*$", re.IGNORECASE)
+
+
+def adversarial_lines(words):
+    """Named worst cases for a line of `words` filler words."""
+    return {
+        "two keywords then filler": " ".join(["answer", "following"] + ["word"] * words),
+        "filler between two keywords": " ".join(["answer"] + ["word"] * words + ["following"]),
+        "near-miss words": " ".join(["answers", "followings", "question"] * (words // 3)),
+        "no spaces": "answer following " + "a" * (words * 5),
+    }
+
+
+def _worst(fn, line, repeat):
+    worst = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(line)
+        worst = max(worst, time.perf_counter() - start)
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 250, 500, 1000, 10000, 100000],
+                        help="filler words per line")
+    parser.add_argument("--max-regex-words", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rule = KeywordCountRule(KEYWORDS)
+    print(f"{'case':<28} {'words':>7} {'KB':>7} {'lookahead ms':>13} {'rule ms':>9} "
+          f"{'lookahead ms/KB':>16} {'rule ms/KB':>11}")
+    for words in args.sizes:
+        for case, line in adversarial_lines(words).items():
+            kb = len(line.encode("utf-8")) / 1024
+            new_s = _worst(rule.matches, line, args.repeat)
+            if words <= args.max_regex_words:
+                old_s = _worst(LOOKAHEAD.match, line, 1)
+                if bool(LOOKAHEAD.match(line)) != rule.matches(line):
+                    raise SystemExit(f"{case}: KeywordCountRule disagrees with the lookahead pattern")
+                old_cols = f"{old_s * 1000:>13.2f}", f"{old_s * 1000 / kb:>16.3f}"
+            else:
+                old_cols = f"{'skipped':>13}", f"{'-':>16}"
+            print(f"{case:<28} {words:>7} {kb:>7.1f} {old_cols[0]} {new_s * 1000:>9.3f} "
+                  f"{old_cols[1]} {new_s * 1000 / kb:>11.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Micro-benchmark: per-pattern line filtering (`any(p.match(line) for p in
+compiled)`) vs the single-alternation LineRuleSet, using the real removal
+rules of several subjects on a synthetic mix of question text and noise.
+
+Both filters must agree on every line; the benchmark aborts otherwise.
+
+Run from the repository root:
+    python -m benchmarks.bench_line_rules --lines 200000
+"""
+import re
+import time
+import random
+import argparse
+
+from cbse.common.line_rules import LineRuleSet
+
+SAMPLE_LINES = [
+    "12. Which of the following is a characteristic of living organisms?",
+    "A) Growth",
+    "B) Reproduction",
+    "Answer: C",
+    "Explanation: All living organisms grow and reproduce, which is why C is correct.",
+    "The chapter explains how energy flows through an ecosystem in several steps.",
+    "CBSE | GRADE 10",
+    "CHAPTER 4",
+    "Multiple choice questions",
+    "Page 17",
+    "17",
+    "Answer the following questions",
+    "VERY SHORT ANSWER (2 MARKS) - REAL TIME APPLICATIONS",
+]
+
+
+def _subject_rule_sets():
+    from cbse.six_to_ten_studies import science_main, hindi_main
+    from cbse.higher_studies import business_studies_main
+
+    return {
+        "science": science_main.REMOVE_RULES,
+        "hindi": hindi_main.REMOVE_RULES,
+        "business_studies": business_studies_main.NOISE_LINE_RULES,
+    }
+
+
+def _per_pattern_filter(rules):
+    # Rule objects (e.g. KeywordCountRule) are called as-is on both sides.
+    compiled = [re.compile(p, re.IGNORECASE) if isinstance(p, str) else p for p in rules.patterns]
+    find = "match" if rules.mode == "match" else "search"
+    checks = [getattr(p, find) if isinstance(p, re.Pattern) else p.matches for p in compiled]
+    return lambda line: any(check(line) for check in checks)
+
+
+def _time(fn, lines):
+    start = time.perf_counter()
+    decisions = [fn(line) for line in lines]
+    return time.perf_counter() - start, decisions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    lines = [rng.choice(SAMPLE_LINES) for _ in range(args.lines)]
+
+    print(f"{'subject':<18} {'rules':>5} {'per-pattern l/s':>16} {'rule set l/s':>13} {'speed-up':>9}")
+    for subject, rules in _subject_rule_sets().items():
+        base_s, base_decisions = _time(_per_pattern_filter(rules), lines)
+        new_s, new_decisions = _time(rules.should_remove, lines)
+        if base_decisions != new_decisions:
+            raise SystemExit(f"{subject}: LineRuleSet disagrees with the per-pattern filter")
+        print(f"{subject:<18} {len(rules.patterns):>5} {len(lines) / base_s:>16,.0f} "
+              f"{len(lines) / new_s:>13,.0f} {base_s / new_s:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+How the LSH candidate count of near_duplicates.find_duplicate_pairs grows
+with the number of questions.
+
+For every size, question texts are drawn like bench_dedup_modes' (random
+words in one question template, a share of them exact or one-word-longer
+repeats). Each distinct text is looked up in a MinHashLSH with the bands
+lsh_bands derives from the threshold and then inserted, as
+find_duplicate_pairs does. The table reports the candidates returned, the
+duplicates find_duplicate_pairs reports and its wall seconds.
+
+Candidates that are not duplicates come from unrelated pairs colliding in a
+bucket, so their number grows with the square of the input; a layout that
+admits too many of them makes the whole search quadratic. The benchmark
+fits the growth exponent between the smallest and largest size and exits
+non-zero unless it stays below --max-exponent.
+
+Run from the repository root:
+    python -m benchmarks.bench_lsh_candidates
+    python -m benchmarks.bench_lsh_candidates --sizes 1000 10000 50000 --threshold 0.7
+"""
+import sys
+import math
+import time
+import argparse
+
+from benchmarks.bench_dedup_modes import synthetic_texts
+from cbse.common.near_duplicates import (NEAR_DUPLICATE_THRESHOLD, MinHashLSH, find_duplicate_pairs, lsh_bands,
+                                         minhash_signature, normalize_question_text, shingle_set)
+
+DEFAULT_SIZES = (2000, 4000, 8000, 16000)
+
+
+def count_candidates(texts, threshold):
+    """Candidates the LSH index returns over all distinct texts, in document order."""
+    lsh = MinHashLSH(threshold)
+    seen = set()
+    candidates = 0
+    for idx, text in enumerate(texts):
+        norm = normalize_question_text(text)
+        if not norm or norm in seen:
+            continue
+        seen.add(norm)
+        signature = minhash_signature(shingle_set(text))
+        if signature is None:
+            continue
+        candidates += len(lsh.query(signature))
+        lsh.insert(idx, signature)
+    return candidates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES), help="questions per run")
+    parser.add_argument("--threshold", type=float, default=NEAR_DUPLICATE_THRESHOLD)
+    parser.add_argument("--duplicate-rate", type=float, default=0.1)
+    parser.add_argument("--near-duplicate-rate", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-exponent", type=float, default=1.5,
+                        help="largest candidate growth exponent accepted (2 is quadratic)")
+    args = parser.parse_args()
+
+    bands, rows = lsh_bands(args.threshold)
+    print(f"threshold {args.threshold}: {bands} bands x {rows} rows")
+    print(f"{'questions':>9} {'candidates':>10} {'per question':>12} {'dups':>6} {'seconds':>8}", flush=True)
+    counts = []
+    for size in args.sizes:
+        texts = synthetic_texts(size, args.duplicate_rate, args.near_duplicate_rate, args.seed)
+        candidates = count_candidates(texts, args.threshold)
+        start = time.perf_counter()
+        pairs = find_duplicate_pairs(texts, args.threshold, "lsh")
+        elapsed = time.perf_counter() - start
+        counts.append((size, candidates))
+        print(f"{size:>9} {candidates:>10} {candidates / size:>12.2f} {len(pairs):>6} {elapsed:>8.3f}", flush=True)
+
+    (first_size, first), (last_size, last) = counts[0], counts[-1]
+    if last_size == first_size or not first or not last:
+        return
+    exponent = math.log(last / first) / math.log(last_size / first_size)
+    print(f"candidates grow as questions^{exponent:.2f}")
+    if exponent >= args.max_exponent:
+        sys.exit(f"Candidate growth exponent {exponent:.2f} is not below {args.max_exponent}")
+
+
+if __name__ == "__main__":
+    main()
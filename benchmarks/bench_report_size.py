@@ -0,0 +1,67 @@
+"""
+Duplicate report size per format, for real chapter files.
+
+Each input is processed with the subject's processor and its duplicate
+report rendered in every format of cbse.common.duplicate_report:
+"escaped" is the text format with non-ASCII characters written as \\uXXXX
+escapes (what the reports looked like before they were written as raw
+UTF-8), "text" and "jsonl" are the formats the file sink can write. The
+table reports UTF-8 bytes, gzip bytes (what an archived report costs) and
+the best render time over --repeat runs.
+
+Run from the repository root:
+    python -m benchmarks.bench_report_size Hindi hindi_input/*.docx
+    python -m benchmarks.bench_report_size Tamil chapter1.docx chapter2.docx --repeat 10
+"""
+import gzip
+import time
+import argparse
+
+from cbse.common.duplicate_report import REPORT_FORMATS, render_report
+from cbse.common.subjects import report_style, run_processor, subject_processors
+
+
+def _escaped(text):
+    # Matches json.dumps(ensure_ascii=True) for BMP characters, which covers Devanagari and Tamil.
+    return text.encode("ascii", "backslashreplace").decode("ascii")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("subject", choices=sorted(subject_processors))
+    parser.add_argument("inputs", nargs="+", help="chapter files of that subject")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    style = report_style(args.subject)
+    renderers = {"escaped": lambda q, d: _escaped(render_report(q, d, style, "text"))}
+    for report_format in REPORT_FORMATS:
+        renderers[report_format] = lambda q, d, report_format=report_format: render_report(q, d, style, report_format)
+
+    totals = {name: [0, 0, 0.0] for name in renderers}
+    for path in args.inputs:
+        with open(path, "rb") as f:
+            result = run_processor(args.subject, f.read())
+        if result is None:
+            print(f"{path}: processor returned no result, skipped")
+            continue
+        print(f"{path}: {len(result.questions)} questions, {len(result.duplicates)} duplicate pairs")
+        for name, render in renderers.items():
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                report = render(result.questions, result.duplicates)
+                best = min(best, time.perf_counter() - start)
+            data = report.encode("utf-8")
+            totals[name][0] += len(data)
+            totals[name][1] += len(gzip.compress(data))
+            totals[name][2] += best
+
+    baseline = totals["escaped"][0] or 1
+    print(f"\n{'format':<8} {'bytes':>12} {'vs escaped':>11} {'gzip bytes':>12} {'render ms':>10}")
+    for name, (size, gz_size, seconds) in totals.items():
+        print(f"{name:<8} {size:>12,} {size / baseline:>10.2f}x {gz_size:>12,} {seconds * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Throughput and peak memory of the subject processors as the input grows.
+
+For every subject and size, a synthetic chapter file of that many questions
+is generated (see benchmarks.synthetic_docs) and processed in a fresh
+subprocess with the subject's processor, so peak RSS is measured in
+isolation. The table reports the questions the processor parsed, duplicate
+pairs found, wall seconds, parsed questions per second, peak RSS and the
+slowest pipeline stage from the run's metrics; --json appends every result
+as one JSON line, to compare runs before and after a change.
+
+Generated files are kept in --docs (and reused when they exist, since large
+files take a while to write) or in a temporary folder that is removed
+afterwards. Maths and Commerce parse at most 200 questions per file (their
+parsers stop at the first repeated or the 200th question number), so their
+larger sizes measure reading and cleaning, not parsing and dedup.
+
+Run from the repository root:
+    python -m benchmarks.bench_scaling
+    python -m benchmarks.bench_scaling --subjects Science Hindi --sizes 100 1000 --docs /tmp/synthetic
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+
+from benchmarks.synthetic_docs import LAYOUTS, generate
+from cbse.common.subjects import subject_processors
+
+DEFAULT_SIZES = (100, 1000, 10000, 100000)
+
+
+def _peak_rss_kb():
+    # VmHWM is reset on exec; ru_maxrss can carry over the parent's peak on Linux.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _child(subject, path):
+    from cbse.common.subjects import run_processor
+
+    with open(path, "rb") as f:
+        data = f.read()
+    start = time.perf_counter()
+    result = run_processor(subject, data, source=path)
+    elapsed = time.perf_counter() - start
+    stages = (result.metrics or {}).get("stages", {}) if result is not None else {}
+    print(json.dumps({
+        "seconds": elapsed,
+        "peak_rss_mb": _peak_rss_kb() / 1024,
+        "parsed": len(result.questions) if result is not None else 0,
+        "duplicates": len(result.duplicates) if result is not None else 0,
+        "stages": {name: totals["wall"] for name, totals in stages.items()},
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subjects", nargs="+", choices=sorted(LAYOUTS), default=list(LAYOUTS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES), help="questions per file")
+    parser.add_argument("--duplicate-rate", type=float, default=0.1)
+    parser.add_argument("--near-duplicate-rate", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--docs", help="folder to keep (and reuse) the generated files in")
+    parser.add_argument("--json", help="append each result as a JSON line to this file")
+    parser.add_argument("--child", nargs=2, metavar=("SUBJECT", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        docs = args.docs or tmp
+        os.makedirs(docs, exist_ok=True)
+        print(f"{'subject':<15} {'questions':>9} {'MB':>6} {'parsed':>7} {'dups':>6} {'seconds':>8} "
+              f"{'questions/s':>11} {'peak RSS MB':>11}  slowest stage", flush=True)
+        for subject in args.subjects:
+            for size in args.sizes:
+                ext = subject_processors[subject]["file_ext"]
+                path = os.path.join(docs, f"{subject}_{size}_d{args.duplicate_rate}_n{args.near_duplicate_rate}"
+                                          f"_s{args.seed}.{ext}")
+                if not os.path.exists(path):
+                    generate(subject, size, path, args.duplicate_rate, args.near_duplicate_rate, args.seed)
+                # The child's run_processor must not append to the app's metrics log.
+                out = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_scaling", "--child", subject, path],
+                    check=True, capture_output=True, text=True, env={**os.environ, "METRICS_FILE": ""},
+                )
+                r = json.loads(out.stdout.strip().splitlines()[-1])
+                slowest = max(r["stages"].items(), key=lambda item: item[1], default=None)
+                size_mb = os.path.getsize(path) / (1024 * 1024)
+                print(f"{subject:<15} {size:>9} {size_mb:>6.1f} {r['parsed']:>7} {r['duplicates']:>6} "
+                      f"{r['seconds']:>8.2f} {r['parsed'] / r['seconds']:>11.0f} {r['peak_rss_mb']:>11.1f}  "
+                      + (f"{slowest[0]} ({slowest[1]:.2f}s)" if slowest else "-"), flush=True)
+                if args.json:
+                    with open(args.json, "a", encoding="utf-8") as f:
+                        f.write(json.dumps({"subject": subject, "questions": size, "bytes": os.path.getsize(path),
+                                            "duplicate_rate": args.duplicate_rate,
+                                            "near_duplicate_rate": args.near_duplicate_rate,
+                                            "seed": args.seed, **r}) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Equivalence check: every DOCX subject must parse a chapter written with soft
+line breaks (each question's lines in one paragraph, separated by w:br, see
+benchmarks.synthetic_docs --soft-breaks) exactly as it parses the same
+chapter written one paragraph per line.
+
+For every DOCX subject both files are generated from the same seed and
+processed; the table reports the questions parsed, how many have options,
+and whether questions and duplicate pairs match. Exits non-zero on any
+mismatch.
+
+Run from the repository root:
+    python -m benchmarks.check_soft_breaks
+    python -m benchmarks.check_soft_breaks --subjects Chemistry Physics --questions 1000
+"""
+import io
+import os
+import sys
+import argparse
+import tempfile
+import contextlib
+
+from benchmarks.synthetic_docs import LAYOUTS, generate
+from cbse.common.subjects import load_processor, subject_processors
+
+DOCX_SUBJECTS = [subject for subject in LAYOUTS if subject_processors[subject]["file_ext"] == "docx"]
+
+
+def _process(subject, path):
+    # The processor itself rather than run_processor, which appends to the app's metrics log.
+    processor = load_processor(subject_processors[subject]["func"])
+    with open(path, "rb") as f:
+        data = f.read()
+    with contextlib.redirect_stdout(io.StringIO()):
+        return processor(data, output_folder=None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subjects", nargs="+", choices=DOCX_SUBJECTS, default=DOCX_SUBJECTS)
+    parser.add_argument("--questions", type=int, default=200, help="questions per file")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    failed = []
+    print(f"{'subject':<15} {'parsed':>7} {'MCQs':>6}  soft == plain")
+    with tempfile.TemporaryDirectory() as tmp:
+        for subject in args.subjects:
+            results = {}
+            for soft_breaks in (False, True):
+                path = os.path.join(tmp, f"{subject}_{'soft' if soft_breaks else 'plain'}.docx")
+                generate(subject, args.questions, path, seed=args.seed, soft_breaks=soft_breaks)
+                results[soft_breaks] = _process(subject, path)
+            plain, soft = results[False], results[True]
+            same = (plain is not None and soft is not None and plain.questions == soft.questions
+                    and plain.duplicates == soft.duplicates)
+            questions = soft.questions if soft is not None else []
+            print(f"{subject:<15} {len(questions):>7} {sum(1 for q in questions if q.get('options')):>6}  "
+                  f"{'yes' if same else 'NO'}", flush=True)
+            if not same:
+                failed.append(subject)
+    if failed:
+        sys.exit(f"Soft line breaks change the parse of: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Stress test for concurrent processing: N sessions process the same subject
+at the same time in one process, the way Streamlit runs one thread per
+browser session, and every session's output is checked against a serial
+baseline for its input.
+
+Each session does what app.run_file_processor does for an upload: it runs
+the processor on the file bytes (output_folder=None), stores the result in a
+shared ResultCache and reads it back, and checks the questions against a
+shared QuestionCorpus. With --output-folder every session also writes its
+result to the same folder through the file sink, as concurrent script runs
+would; that folder must end up holding one complete, unmixed result.
+
+Pass several input files so that sessions working on different documents
+overlap; they are assigned to sessions round-robin.
+
+Run from the repository root:
+    python -m benchmarks.stress_concurrent_sessions Science a.pdf b.pdf --sessions 16
+"""
+import os
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import contextlib
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+from cbse.common.duplicate_report import REPORT_FORMAT, REPORT_FORMATS, render_report
+from cbse.common.processor_io import write_result
+from cbse.common.question_corpus import QuestionCorpus, upload_hash
+from cbse.common.result_cache import ResultCache, cache_key
+from cbse.common.subjects import load_processor, report_style, subject_processors
+
+
+def run_session(subject, processor, file_bytes, source_file, cache_dir, corpus_db, output_folder, barrier):
+    """One simulated upload. Returns (questions, duplicates, cached) for checking."""
+    barrier.wait()
+    result = processor(file_bytes, output_folder=None)
+    if result is None:
+        raise RuntimeError(f"processor returned None for {source_file}")
+
+    cache = ResultCache(cache_dir)
+    key = cache_key(file_bytes, subject)
+    cache.put(key, result.questions, result.duplicates)
+    cached = cache.get(key)
+
+    with QuestionCorpus(corpus_db) as corpus:
+        file_hash = upload_hash(file_bytes)
+        corpus.find_matches(result.questions, exclude_upload=file_hash)
+        corpus.add_questions(result.questions, subject, None, source_file, file_hash, source_file=source_file)
+
+    if output_folder:
+        write_result(result, output_folder, "questions.json", style=report_style(subject))
+    return result.questions, result.duplicates, cached
+
+
+def check_output_folder(output_folder, baselines, style):
+    """The shared folder must hold exactly one input's complete result."""
+    with open(os.path.join(output_folder, "questions.json"), encoding="utf-8") as f:
+        questions = json.load(f)
+    with open(os.path.join(output_folder, "duplicate_output" + REPORT_FORMATS[REPORT_FORMAT]), encoding="utf-8") as f:
+        report = f.read()
+    return any(questions == b.questions and report == render_report(b.questions, b.duplicates, style, REPORT_FORMAT)
+               for b in baselines.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("subject", choices=sorted(subject_processors))
+    parser.add_argument("inputs", nargs="+", help="input files, assigned to sessions round-robin")
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--output-folder", action="store_true",
+                        help="also write every result to one shared output folder")
+    args = parser.parse_args()
+
+    processor = load_processor(subject_processors[args.subject]["func"])
+    inputs = {}
+    for path in args.inputs:
+        with open(path, "rb") as f:
+            inputs[path] = f.read()
+
+    # Processors print progress; keep the table readable.
+    quiet = contextlib.redirect_stdout(io.StringIO())
+    with quiet:
+        start = time.perf_counter()
+        baselines = {path: processor(data, output_folder=None) for path, data in inputs.items()}
+        serial_s = time.perf_counter() - start
+    for path, baseline in baselines.items():
+        if baseline is None:
+            raise SystemExit(f"{args.subject} processor returned nothing for {path}; pick inputs it can parse")
+
+    scratch = tempfile.mkdtemp(prefix="stress-sessions-")
+    failures = 0
+    try:
+        print(f"{'round':>5} {'sessions':>8} {'wall s':>8} {'serial-equivalent s':>20} {'mismatches':>11}")
+        for round_num in range(1, args.rounds + 1):
+            cache_dir = os.path.join(scratch, f"cache{round_num}")
+            corpus_db = os.path.join(scratch, f"corpus{round_num}.sqlite3")
+            output_folder = os.path.join(scratch, f"output{round_num}") if args.output_folder else None
+            assigned = [args.inputs[i % len(args.inputs)] for i in range(args.sessions)]
+            barrier = threading.Barrier(args.sessions)
+
+            with quiet, ThreadPoolExecutor(max_workers=args.sessions) as pool:
+                start = time.perf_counter()
+                futures = [pool.submit(run_session, args.subject, processor, inputs[path], os.path.basename(path),
+                                       cache_dir, corpus_db, output_folder, barrier) for path in assigned]
+                outcomes = []
+                for future in futures:
+                    try:
+                        outcomes.append(future.result())
+                    except Exception as e:
+                        outcomes.append(e)
+                wall_s = time.perf_counter() - start
+
+            mismatches = 0
+            for path, outcome in zip(assigned, outcomes):
+                expected = baselines[path]
+                if isinstance(outcome, Exception):
+                    print(f"  session on {path} failed: {outcome!r}")
+                    mismatches += 1
+                    continue
+                questions, duplicates, cached = outcome
+                if questions != expected.questions or duplicates != expected.duplicates or cached != (expected.questions, expected.duplicates):
+                    print(f"  session on {path} got output that differs from the serial run")
+                    mismatches += 1
+            if output_folder and not check_output_folder(output_folder, baselines, report_style(args.subject)):
+                print("  shared output folder does not hold one complete result")
+                mismatches += 1
+            with QuestionCorpus(corpus_db) as corpus:
+                stored = corpus.conn.execute("SELECT COUNT(DISTINCT upload_hash) FROM questions").fetchone()[0]
+            if stored != len(set(assigned)):
+                print(f"  corpus holds {stored} uploads, expected {len(set(assigned))}")
+                mismatches += 1
+
+            serial_equivalent = serial_s * args.sessions / len(inputs)
+            print(f"{round_num:>5} {args.sessions:>8} {wall_s:>8.2f} {serial_equivalent:>20.2f} {mismatches:>11}")
+            failures += mismatches
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    if failures:
+        raise SystemExit(f"{failures} mismatch(es) across {args.rounds} round(s)")
+    print("all sessions produced their own serial-run output")
+
+
+if __name__ == "__main__":
+    main()
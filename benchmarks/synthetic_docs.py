@@ -0,0 +1,329 @@
+"""
+Synthetic chapter files in the layouts the subject processors parse, for
+benchmarks that need inputs of a chosen size.
+
+A document of N questions is written as consecutive chapters of up to 200
+questions, numbered the way each subject's parser types them (e.g. 1-150
+MCQ, 151-185 short and 186-200 long for grades 6-10), with the subject's
+headings, A)-D) options, Answer:/Keywords:/Explanation: lines and dashed
+separators. A chapter smaller than 200 keeps every question type in
+proportion. Question texts are random word sequences, so they are distinct
+unless made duplicates on purpose: --duplicate-rate of the questions repeat
+an earlier question exactly and --near-duplicate-rate repeat one with a word
+appended (similarity about 0.9, above the 0.8 near-duplicate threshold).
+The same --seed always gives the same document. With --soft-breaks a DOCX
+puts each question's lines in one paragraph, separated by soft line breaks
+(w:br), as documents typed with Shift+Enter do; the parsed questions must
+match the one-paragraph-per-line document's.
+
+Run from the repository root:
+    python -m benchmarks.synthetic_docs Science 1000 science_1k.pdf
+    python -m benchmarks.synthetic_docs Hindi 10000 hindi_10k.docx --duplicate-rate 0.2
+    python -m benchmarks.synthetic_docs Chemistry 200 chemistry_soft.docx --soft-breaks
+"""
+import re
+import random
+import argparse
+
+ENGLISH_WORDS = (
+    "acid air angle animal atom balance battery boiling carbon cell change charge circuit climate cloud "
+    "colour current density desert digestion distance earth energy erosion evaporation fibre filter "
+    "food force forest friction fuel gas gravity habitat heat insect iron lens light liquid magnet "
+    "matter metal mixture moon motion muscle nutrient orbit oxygen plant pollen pressure rain river "
+    "rock root salt seed shadow soil solid sound speed star steam sugar sun temperature tissue tree "
+    "vapour volume water wave weather weight wind wire"
+).split()
+
+HINDI_WORDS = (
+    "कहानी लेखक कविता पात्र गाँव नदी पर्वत बालक माता पिता मित्र विद्यालय शिक्षक पुस्तक यात्रा "
+    "संदेश जीवन प्रकृति समाज परिवार खेत किसान बादल वर्षा सूरज चाँद पेड़ पक्षी घर बाजार"
+).split()
+
+TAMIL_WORDS = (
+    "கதை ஆசிரியர் கவிதை மரம் நதி மலை குழந்தை தாய் தந்தை நண்பன் பள்ளி புத்தகம் பயணம் "
+    "வாழ்க்கை இயற்கை சமூகம் குடும்பம் வயல் உழவர் மேகம் மழை சூரியன் நிலவு பறவை வீடு"
+).split()
+
+GRADE_6_TO_10_RANGES = ((1, 150), (151, 185), (186, 200))
+GRADE_11_TO_12_RANGES = ((1, 80), (81, 110), (111, 140), (141, 170), (171, 200))
+CHAPTER_SIZE = 200
+
+
+def chapter_numbers(size, ranges):
+    """
+    The `size` question numbers (at most CHAPTER_SIZE) a chapter uses: the
+    first numbers of every range in `ranges`, in proportion to the range sizes.
+    """
+    def spread(number):
+        first, last = next(r for r in ranges if r[0] <= number <= r[1])
+        return (number - first) / (last - first + 1)
+    return sorted(sorted(range(1, CHAPTER_SIZE + 1), key=spread)[:size])
+
+
+def chapters(count, ranges):
+    """Question numbers for `count` questions, one list per chapter."""
+    result = []
+    while count > 0:
+        size = min(count, CHAPTER_SIZE)
+        result.append(chapter_numbers(size, ranges))
+        count -= size
+    return result
+
+
+class TextSource:
+    """Random phrases from a vocabulary, and question texts with duplicates mixed in."""
+
+    def __init__(self, words, rng, duplicate_rate=0.0, near_duplicate_rate=0.0):
+        self.words = words
+        self.rng = rng
+        self.duplicate_rate = duplicate_rate
+        self.near_duplicate_rate = near_duplicate_rate
+        self.asked = []
+
+    def phrase(self, n):
+        return " ".join(self.rng.choice(self.words) for _ in range(n))
+
+    def question(self, template):
+        """A question text: a fresh one filled into `template` ({} for the phrase), or a repeat."""
+        roll = self.rng.random()
+        if self.asked and roll < self.duplicate_rate:
+            text = self.rng.choice(self.asked)
+        elif self.asked and roll < self.duplicate_rate + self.near_duplicate_rate:
+            text = f"{self.rng.choice(self.asked)} {self.rng.choice(self.words)}"
+        else:
+            text = template.format(self.phrase(6))
+        self.asked.append(text)
+        return text
+
+
+def _grade_6_to_10_lines(heading):
+    def build(count, text):
+        lines = []
+        for chapter, numbers in enumerate(chapters(count, GRADE_6_TO_10_RANGES), 1):
+            lines += ["CBSE - GRADE 8", heading, f"CHAPTER - {chapter} {text.phrase(2).title()}"]
+            for n in numbers:
+                if n <= 150:
+                    lines.append(f"{n}) {text.question('Which statement about {} is correct?')}")
+                    lines += [f"{letter}) {text.phrase(2)}" for letter in "ABCD"]
+                    lines.append(f"Answer: {'ABCD'[n % 4]}")
+                else:
+                    lines.append(f"{n}. {text.question('Explain how {} are related.')}")
+                    lines.append(f"Answer: {text.phrase(8).capitalize()}.")
+                    if n > 185:
+                        lines.append(f"{text.phrase(10).capitalize()}.")
+                    lines.append(f"Keywords: {', '.join(text.phrase(3).split())}")
+        return lines
+    return build
+
+
+def _maths_lines(count, text):
+    lines = []
+    for chapter, numbers in enumerate(chapters(count, GRADE_6_TO_10_RANGES), 1):
+        lines += ["CBSE GRADE 8", "Mathematics", f"Chapter {chapter} {text.phrase(2).title()}"]
+        for n in numbers:
+            if n <= 150:
+                lines.append(f"{n}. {text.question('How many {} are left over?')}")
+                lines += [f"{letter}) {text.phrase(1)} {n + i}" for i, letter in enumerate("ABCD")]
+                lines.append(f"Answer: {'ABCD'[n % 4]}")
+                if n % 3 == 0:
+                    lines += [f"Explanation: count the {text.phrase(2)}", f"and then the {text.phrase(2)}."]
+            else:
+                lines.append(f"{n}. {text.question('Find the total of {}.')}")
+                lines.append(f"Solution: add the {text.phrase(3)} together")
+                lines.append(f"Answer: the total is {n}")
+                lines.append(f"Keywords: {', '.join(text.phrase(2).split())}")
+    return lines
+
+
+def _hindi_lines(count, text):
+    lines = []
+    for chapter, numbers in enumerate(chapters(count, GRADE_6_TO_10_RANGES), 1):
+        lines += ["CBSE - GRADE 8", "हिंदी", f"अध्याय - {chapter} {text.phrase(2)}"]
+        for n in numbers:
+            if n <= 150:
+                lines.append(f"{n}. {text.question('{} के बारे में कौन सा कथन सही है?')}")
+                options = [text.phrase(2) for _ in range(4)]
+                lines += [f"{letter}) {option}" for letter, option in zip("कखगघ", options)]
+                lines.append(f"उत्तर: ग) {options[2]}")
+            else:
+                lines.append(f"{n}. {text.question('{} के बारे में लेखक ने क्या कहा?')}")
+                lines.append(f"उत्तर: {text.phrase(8)}।")
+                if n > 185:
+                    lines.append(f"{text.phrase(10)}।")
+                lines.append(f"मुख्य शब्द: {', '.join(text.phrase(3).split())}")
+    return lines
+
+
+def _tamil_lines(count, text):
+    headings = {"mcq": "சரியான விடையைத் தேர்ந்தெடுத்து எழுதுக", "short": "சிறு வினா", "long": "பெரு வினா"}
+    lines = []
+    for chapter, numbers in enumerate(chapters(count, GRADE_6_TO_10_RANGES), 1):
+        lines.append(f"Chapter {chapter}")
+        # Each section heading restarts the numbering at 1.
+        sections = {"mcq": [n for n in numbers if n <= 150], "short": [n for n in numbers if 150 < n <= 185],
+                    "long": [n for n in numbers if n > 185]}
+        for kind, section in sections.items():
+            if not section:
+                continue
+            lines.append(headings[kind])
+            for k in range(1, len(section) + 1):
+                if kind == "mcq":
+                    lines.append(f"{k}. {text.question('{} பற்றி எது சரி?')}")
+                    options = [text.phrase(2) for _ in range(4)]
+                    lines += [f"{letter}) {option}" for letter, option in zip("ABCD", options)]
+                    lines.append(f"Answer: B) {options[1]}")
+                else:
+                    lines.append(f"{k}. {text.question('{} பற்றி விளக்குக?')}")
+                    lines.append(f"Answer: {text.phrase(8 if kind == 'short' else 16)}")
+                    lines.append(f"Keywords: {', '.join(text.phrase(3).split())}")
+    return lines
+
+
+def _grade_11_to_12_lines(heading):
+    def build(count, text):
+        lines = []
+        for chapter, numbers in enumerate(chapters(count, GRADE_11_TO_12_RANGES), 1):
+            lines += ["CBSE - GRADE 11", heading, f"CHAPTER - {chapter} {text.phrase(2).title()}",
+                      f"This chapter covers {text.phrase(6)}.", "MULTIPLE CHOICE QUESTIONS"]
+            for n in numbers:
+                if n == 81:
+                    lines.append("VERY SHORT ANSWER QUESTIONS 2 MARKS REAL TIME APPLICATIONS")
+                elif n == 171:
+                    lines.append("5 MARKS LONG ANSWER")
+                if n <= 80:
+                    lines.append(f"{n}. {text.question('Which statement about {} is correct?')}")
+                    options = [text.phrase(2) for _ in range(4)]
+                    lines += [f"{letter}) {option}" for letter, option in zip("ABCD", options)]
+                    lines.append(f"Answer: C) {options[2]}")
+                    if n % 2:
+                        lines += [f"Explanation: the {text.phrase(4)}", f"because of the {text.phrase(4)}.",
+                                  "-----------------------"]
+                elif n <= 170:
+                    lines.append(f"{n}. {text.question('Explain the role of {}.')}")
+                    lines.append(f"Answer: {text.phrase(8).capitalize()}.")
+                    if n > 140:
+                        lines.append(f"{text.phrase(10).capitalize()}.")
+                    lines.append(f"Keywords: {', '.join(text.phrase(3).split())}")
+                else:
+                    lines.append(f"{n}) {text.question('Discuss {} in detail.')}")
+                    lines.append(f"Ans: {text.phrase(20).capitalize()}.")
+        return lines
+    return build
+
+
+def _business_lines(count, text):
+    lines = []
+    for chapter, numbers in enumerate(chapters(count, GRADE_11_TO_12_RANGES), 1):
+        lines += ["CBSE - GRADE 12", "BUSINESS STUDIES", "PART A", f"CHAPTER {chapter}", "Multiple choice questions"]
+        # The business parser renumbers questions in order of appearance, so a
+        # short chapter is numbered without gaps to keep the types it parses.
+        for n in range(1, len(numbers) + 1):
+            if n <= 80:
+                options = [text.phrase(2) for _ in range(4)]
+                inline = " ".join(f"{letter}) {option}" for letter, option in zip("ABCD", options))
+                lines.append(f"{n}) {text.question('Which statement about {} is correct?')} {inline}")
+                lines.append(f"Answer: C) {options[2]}")
+                if n % 3 == 0:
+                    lines.append(f"Explanation: the {text.phrase(6)}")
+                lines.append("")
+            else:
+                lines.append(f"{n}) {text.question('Explain the principle of {}.')}")
+                lines.append(f"Answer: {text.phrase(12).capitalize()}.")
+                lines.append(f"Keywords: {', '.join(text.phrase(3).split())}")
+    return lines
+
+
+# subject (as in subject_processors; the Social Science aliases share its
+# processor) -> (words, line builder, footer). PDFs get `footer` (formatted
+# with the page number) at the bottom of every page; DOCX files have none.
+LAYOUTS = {
+    "English": (ENGLISH_WORDS, _grade_6_to_10_lines("ENGLISH"), "--- Page {} ---"),
+    "Science": (ENGLISH_WORDS, _grade_6_to_10_lines("SCIENCE"), "--- Page {} ---"),
+    "Social_Science": (ENGLISH_WORDS, _grade_6_to_10_lines("SOCIAL SCIENCE"), "--- Page {} ---"),
+    "Maths": (ENGLISH_WORDS, _maths_lines, "Page {}"),
+    "Tamil": (TAMIL_WORDS, _tamil_lines, None),
+    "Hindi": (HINDI_WORDS, _hindi_lines, None),
+    "Biotechnology": (ENGLISH_WORDS, _grade_11_to_12_lines("BIOTECHNOLOGY"), None),
+    "Commerce": (ENGLISH_WORDS, _business_lines, None),
+    "Chemistry": (ENGLISH_WORDS, _grade_11_to_12_lines("CHEMISTRY"), None),
+    "Physics": (ENGLISH_WORDS, _grade_11_to_12_lines("PHYSICS"), None),
+}
+
+
+def build_lines(subject, questions, duplicate_rate=0.1, near_duplicate_rate=0.05, seed=0):
+    """The document's lines (one paragraph each) for `questions` questions of `subject`."""
+    words, build, _ = LAYOUTS[subject]
+    return build(questions, TextSource(words, random.Random(seed), duplicate_rate, near_duplicate_rate))
+
+
+def write_pdf(path, lines, footer=None, lines_per_page=40):
+    import fitz
+
+    doc = fitz.open()
+    for start in range(0, len(lines), lines_per_page):
+        page = doc.new_page()
+        # One call per page: insert_text lays out the lines 15pt apart.
+        page.insert_text((40, 40), lines[start:start + lines_per_page], fontsize=9, lineheight=1.6)
+        if footer:
+            page.insert_text((40, 820), footer.format(start // lines_per_page + 1), fontsize=8)
+    doc.save(path, garbage=1, deflate=True)
+    doc.close()
+
+
+# With soft breaks, option, answer, keyword and explanation lines join the
+# paragraph of the question before them; headings keep paragraphs of their own.
+_QUESTION_LINE_RE = re.compile(r"\s*\(?\d{1,3}\s*[.)]")
+_CONTINUATION_RE = re.compile(r"\s*(\(?[A-Da-dक-घ]\s*[).]|(Correct Answer|Answer|Ans|Keywords|Explanation|Solution)\b|उत्तर|मुख्य)")
+
+
+def write_docx(path, lines, soft_breaks=False):
+    import docx
+
+    document = docx.Document()
+    if not soft_breaks:
+        for line in lines:
+            document.add_paragraph(line)
+    else:
+        in_question = False
+        for line in lines:
+            if in_question and _CONTINUATION_RE.match(line):
+                paragraph.runs[-1].add_break()
+                paragraph.add_run(line)
+            else:
+                paragraph = document.add_paragraph(line)
+                in_question = bool(_QUESTION_LINE_RE.match(line))
+    document.save(path)
+
+
+def generate(subject, questions, path, duplicate_rate=0.1, near_duplicate_rate=0.05, seed=0, soft_breaks=False):
+    """
+    Writes a synthetic chapter file for `subject` (PDF or DOCX by its
+    processor's file type) to `path`. `soft_breaks` only applies to DOCX.
+    """
+    from cbse.common.subjects import subject_processors
+
+    lines = build_lines(subject, questions, duplicate_rate, near_duplicate_rate, seed)
+    if subject_processors[subject]["file_ext"] == "pdf":
+        write_pdf(path, lines, LAYOUTS[subject][2])
+    else:
+        write_docx(path, lines, soft_breaks)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("subject", choices=sorted(LAYOUTS))
+    parser.add_argument("questions", type=int)
+    parser.add_argument("output", help="file to write (.pdf or .docx, per the subject)")
+    parser.add_argument("--duplicate-rate", type=float, default=0.1)
+    parser.add_argument("--near-duplicate-rate", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--soft-breaks", action="store_true", help="DOCX only: one paragraph per question")
+    args = parser.parse_args()
+    generate(args.subject, args.questions, args.output, args.duplicate_rate, args.near_duplicate_rate, args.seed,
+             args.soft_breaks)
+    print(f"Wrote {args.output}: {args.questions} {args.subject} questions")
+
+
+if __name__ == "__main__":
+    main()
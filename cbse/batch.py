@@ -0,0 +1,172 @@
+"""
+Batch processing of a directory tree of chapter files.
+
+Every PDF/DOCX under ROOT is mapped to a subject, processed on a process
+pool, and its result is written to OUTPUT/<relative path without extension>/
+as soon as it finishes (questions.json plus duplicate_output.txt, or
+duplicate_output.jsonl with --report-format jsonl). OUTPUT/manifest.jsonl
+records one line per finished file; re-running the same command skips files
+whose last entry is "done" for the same file contents, parser rule version
+and dedup and report settings (result_cache.result_settings), so an
+interrupted run only resumes the unfinished (or failed, or changed) files.
+
+Subjects come from --map PATTERN=SUBJECT (glob on the path relative to
+ROOT, first match wins; repeatable) and fall back to --subject. Files whose
+extension does not match the subject's file type are skipped.
+
+    python -m cbse.batch chapters/ --output batch_out --subject Science
+    python -m cbse.batch chapters/ --output batch_out \\
+        --map "grade10/science/*=Science" --map "grade12/chemistry/*=Chemistry"
+"""
+import os
+import sys
+import json
+import time
+import fnmatch
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from cbse.common.duplicate_report import REPORT_FORMAT, REPORT_FORMATS
+from cbse.common.processor_io import write_result
+from cbse.common.result_cache import PARSER_RULE_VERSION, result_settings
+from cbse.common.subjects import init_worker, report_style, run_processor, subject_processors
+
+MANIFEST_NAME = "manifest.jsonl"
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def subject_for(rel_path, mappings, default_subject):
+    """First --map pattern matching `rel_path` (with / separators), else the default subject."""
+    for pattern, subject in mappings:
+        if fnmatch.fnmatch(rel_path, pattern):
+            return subject
+    return default_subject
+
+
+def discover(root, mappings, default_subject):
+    """Yields (rel_path, subject) for every file under root that maps to a subject of its file type."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            rel_path = os.path.relpath(os.path.join(dirpath, name), root).replace(os.sep, "/")
+            subject = subject_for(rel_path, mappings, default_subject)
+            if subject is None:
+                continue
+            ext = os.path.splitext(name)[1].lower().lstrip(".")
+            if ext == subject_processors[subject]["file_ext"]:
+                yield rel_path, subject
+
+
+def load_manifest(path):
+    """Last manifest entry per file. A truncated last line (from a killed run) is ignored."""
+    entries = {}
+    if not os.path.exists(path):
+        return entries
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            entries[entry["file"]] = entry
+    return entries
+
+
+def is_done(entry, subject, sha256, output_dir, report_format):
+    return (entry is not None and entry.get("status") == "done" and entry.get("subject") == subject
+            and entry.get("sha256") == sha256 and entry.get("rule_version") == PARSER_RULE_VERSION
+            and entry.get("settings") == result_settings(report_format)
+            and os.path.isdir(output_dir))
+
+
+def process_file(subject, src_path, output_dir, report_format=REPORT_FORMAT):
+    """Runs in a worker: processes one file and writes its result. Returns manifest fields."""
+    start = time.perf_counter()
+    with open(src_path, "rb") as f:
+        result = run_processor(subject, f.read(), source=src_path)
+    if result is None:
+        return {"status": "failed", "error": "processor returned no result", "seconds": time.perf_counter() - start}
+    write_result(result, output_dir, "questions.json", style=report_style(subject), report_format=report_format)
+    return {"status": "done", "questions": len(result.questions), "duplicates": len(result.duplicates),
+            "seconds": time.perf_counter() - start}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root", help="directory tree of chapter files")
+    parser.add_argument("--output", required=True, help="output directory (also holds the manifest)")
+    parser.add_argument("--subject", choices=sorted(subject_processors), help="subject for files no --map matches")
+    parser.add_argument("--map", action="append", default=[], metavar="PATTERN=SUBJECT",
+                        help="glob on the path relative to root, mapped to a subject")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--report-format", choices=sorted(REPORT_FORMATS), default=REPORT_FORMAT,
+                        help="duplicate report format (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    mappings = []
+    for item in args.map:
+        pattern, sep, subject = item.rpartition("=")
+        if not sep or subject not in subject_processors:
+            parser.error(f"--map {item!r}: expected PATTERN=SUBJECT with one of {', '.join(sorted(subject_processors))}")
+        mappings.append((pattern, subject))
+    if not mappings and not args.subject:
+        parser.error("give --subject, --map, or both")
+
+    os.makedirs(args.output, exist_ok=True)
+    manifest_path = os.path.join(args.output, MANIFEST_NAME)
+    previous = load_manifest(manifest_path)
+
+    pending, skipped = [], 0
+    for rel_path, subject in discover(args.root, mappings, args.subject):
+        src_path = os.path.join(args.root, rel_path)
+        output_dir = os.path.join(args.output, os.path.splitext(rel_path)[0])
+        sha256 = file_sha256(src_path)
+        if is_done(previous.get(rel_path), subject, sha256, output_dir, args.report_format):
+            skipped += 1
+            continue
+        pending.append((rel_path, subject, sha256, src_path, output_dir))
+
+    print(f"{len(pending)} file(s) to process, {skipped} already done")
+    failed = 0
+    with open(manifest_path, "a", encoding="utf-8") as manifest, \
+            ProcessPoolExecutor(max_workers=max(1, args.workers), initializer=init_worker) as pool:
+        futures = {pool.submit(process_file, subject, src_path, output_dir, args.report_format): (rel_path, subject, sha256)
+                   for rel_path, subject, sha256, src_path, output_dir in pending}
+        try:
+            for done, future in enumerate(as_completed(futures), 1):
+                rel_path, subject, sha256 = futures[future]
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    outcome = {"status": "failed", "error": repr(e)}
+                entry = {"file": rel_path, "subject": subject, "sha256": sha256,
+                         "rule_version": PARSER_RULE_VERSION, "settings": result_settings(args.report_format),
+                         **outcome}
+                # One flushed line per file, so a killed run loses at most the files still in flight.
+                manifest.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                manifest.flush()
+                if outcome["status"] != "done":
+                    failed += 1
+                    print(f"[{done}/{len(pending)}] ❌ {rel_path}: {outcome['error']}")
+                else:
+                    print(f"[{done}/{len(pending)}] ✅ {rel_path}: {outcome['questions']} questions "
+                          f"({outcome['seconds']:.1f}s)")
+        except KeyboardInterrupt:
+            print("Interrupted; finished files are in the manifest and will be skipped on the next run.")
+            pool.shutdown(wait=False, cancel_futures=True)
+            return 130
+
+    print(f"Done: {len(pending) - failed} processed, {failed} failed, {skipped} skipped")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
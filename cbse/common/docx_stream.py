@@ -0,0 +1,139 @@
+import zipfile
+import posixpath
+from collections import namedtuple
+from xml.etree.ElementTree import iterparse
+
+# Streams paragraph text straight out of word/document.xml instead of
+# building a python-docx Document, which loads every package part (including
+# embedded images) and the full XML object tree just to read paragraph.text.
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+_P, _R, _HYPERLINK = _W + "p", _W + "r", _W + "hyperlink"
+_BODY, _TBL, _TR, _TC = _W + "body", _W + "tbl", _W + "tr", _W + "tc"
+_PPR, _NUMPR, _NUMID, _ILVL, _VAL = _W + "pPr", _W + "numPr", _W + "numId", _W + "ilvl", _W + "val"
+_BR, _TYPE = _W + "br", _W + "type"
+
+# Text equivalents of run children, mirroring python-docx's Run.text.
+_RUN_TEXT = {
+    _W + "tab": "\t",
+    _W + "ptab": "\t",
+    _W + "cr": "\n",
+    _W + "noBreakHyphen": "-",
+}
+_T = _W + "t"
+
+# text: paragraph text as python-docx would report it.
+# num_id / ilvl: list numbering from w:numPr, or (None, None) for plain paragraphs.
+DocxParagraph = namedtuple("DocxParagraph", ["text", "num_id", "ilvl"])
+
+
+def _main_document_part(zf):
+    """Finds the main document part via the package relationships."""
+    try:
+        with zf.open("_rels/.rels") as f:
+            for _, elem in iterparse(f):
+                if elem.tag == _REL + "Relationship" and elem.get("Type", "").endswith("/officeDocument"):
+                    return posixpath.normpath(elem.get("Target").lstrip("/"))
+    except KeyError:
+        pass
+    return "word/document.xml"
+
+
+def _run_text(run):
+    parts = []
+    for child in run:
+        tag = child.tag
+        if tag == _T:
+            parts.append(child.text or "")
+        elif tag == _BR:
+            if child.get(_TYPE, "textWrapping") == "textWrapping":
+                parts.append("\n")
+        elif tag in _RUN_TEXT:
+            parts.append(_RUN_TEXT[tag])
+    return "".join(parts)
+
+
+def _paragraph_text(p):
+    # Only direct runs and hyperlink runs count, as in python-docx; text boxes
+    # and tracked insertions nested deeper are ignored.
+    parts = []
+    for child in p:
+        if child.tag == _R:
+            parts.append(_run_text(child))
+        elif child.tag == _HYPERLINK:
+            parts.extend(_run_text(r) for r in child if r.tag == _R)
+    return "".join(parts)
+
+
+def _numbering(p):
+    ppr = p.find(_PPR)
+    numpr = ppr.find(_NUMPR) if ppr is not None else None
+    if numpr is None:
+        return None, None
+    num_id_elm, ilvl_elm = numpr.find(_NUMID), numpr.find(_ILVL)
+    try:
+        num_id = int(num_id_elm.get(_VAL)) if num_id_elm is not None and num_id_elm.get(_VAL) is not None else None
+        ilvl = int(ilvl_elm.get(_VAL)) if ilvl_elm is not None and ilvl_elm.get(_VAL) is not None else 0
+    except ValueError:
+        return None, None
+    if num_id is None:
+        return None, None
+    return num_id, ilvl
+
+
+def _in_table_cell(ancestors):
+    # ancestors below w:body must be (w:tbl, w:tr, w:tc) repeated, i.e. block-level table nesting.
+    if len(ancestors) % 3:
+        return False
+    return all(ancestors[i:i + 3] == [_TBL, _TR, _TC] for i in range(0, len(ancestors), 3))
+
+
+def _iter_document(zf, stream, include_tables):
+    stack = []
+    body = None
+    try:
+        for event, elem in iterparse(stream, events=("start", "end")):
+            if event == "start":
+                stack.append(elem.tag)
+                if elem.tag == _BODY and body is None:
+                    body = elem
+                continue
+
+            depth = len(stack)
+            stack.pop()
+            if elem.tag == _P and depth >= 3 and stack[1] == _BODY:
+                ancestors = stack[2:]
+                if not ancestors or (include_tables and _in_table_cell(ancestors)):
+                    num_id, ilvl = _numbering(elem)
+                    yield DocxParagraph(_paragraph_text(elem), num_id, ilvl)
+
+            # Drop finished top-level blocks so memory stays flat for large documents.
+            if depth == 3 and body is not None and stack[-1] == _BODY:
+                elem.clear()
+                body.remove(elem)
+    finally:
+        stream.close()
+        zf.close()
+
+
+def iter_paragraphs(source, include_tables=False):
+    """
+    Iterates the paragraphs of a .docx file (path or binary file object) in
+    document order, yielding DocxParagraph tuples.
+
+    By default only body-level paragraphs are returned, matching
+    python-docx's Document.paragraphs. With include_tables=True, paragraphs
+    inside (nested) table cells are included as well, in reading order.
+
+    The package is opened eagerly so that invalid files raise here rather
+    than on first iteration.
+    """
+    zf = zipfile.ZipFile(source)
+    try:
+        stream = zf.open(_main_document_part(zf))
+    except Exception:
+        zf.close()
+        raise
+    return _iter_document(zf, stream, include_tables)
@@ -0,0 +1,62 @@
+from collections import defaultdict
+
+# Duplicate pairs grouped into clusters: every question linked to another by
+# a pair, directly or through other questions (A ~ B and B ~ C put A, B and
+# C in one cluster even if A and C were never paired). One plain dict per
+# cluster, so clusters can be written as JSON like the pair records:
+#   cluster        1-based cluster number, in order of the canonical question
+#   canonical      index of the cluster's earliest question, the one to keep
+#   canonicalNUM   its questionNUM
+#   members        indexes of all questions in the cluster, canonical first
+#   memberNUMs     their questionNUMs
+#   pairs          the "pair" numbers of the records linking the cluster
+
+
+class UnionFind:
+    """
+    Disjoint sets of question indexes. The root of every set is its smallest
+    index, so a question's root is the earliest question it is linked to.
+    """
+
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, x):
+        parent = self.parent
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]  # path halving
+            x = parent[x]
+        return x
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            if b < a:
+                a, b = b, a
+            self.parent[b] = a
+        return a
+
+
+def duplicate_clusters(questions, duplicates):
+    """The clusters the pair records in `duplicates` link, ordered by canonical question."""
+    sets = UnionFind()
+    for record in duplicates:
+        sets.union(record["original"], record["duplicate"])
+    members, pairs = defaultdict(set), defaultdict(list)
+    for idx in sets.parent:
+        members[sets.find(idx)].add(idx)
+    for record in duplicates:
+        pairs[sets.find(record["original"])].append(record["pair"])
+    clusters = []
+    for number, canonical in enumerate(sorted(members), 1):
+        indexes = sorted(members[canonical])
+        clusters.append({
+            "cluster": number,
+            "canonical": canonical,
+            "canonicalNUM": questions[canonical].get("questionNUM"),
+            "members": indexes,
+            "memberNUMs": [questions[idx].get("questionNUM") for idx in indexes],
+            "pairs": pairs[canonical],
+        })
+    return clusters
@@ -0,0 +1,202 @@
+import io
+import os
+import csv
+import json
+from collections import namedtuple
+
+from cbse.common.duplicate_clusters import duplicate_clusters
+from cbse.common.question_record import json_default
+
+# Duplicate detection returns one record (a plain dict, so results can be
+# cached and queued as JSON) per duplicate pair:
+#   pair           1-based pair number, in report order
+#   original       index of the original question in the questions list
+#   duplicate      index of the duplicate question
+#   originalNUM    questionNUM of the original
+#   duplicateNUM   questionNUM of the duplicate
+#   similarity     1.0 for exact duplicates, the shingle Jaccard score otherwise
+#   mismatches     the fields that differ between the two, as short labels
+#   matchedOn      only on pairs found by comparing another field than the
+#                  question text (see simhash.long_text_duplicates): that
+#                  field, e.g. "correctAnswer"; similarity is then the
+#                  fraction of SimHash fingerprint bits the two agree on
+# The questions themselves are not copied into the records; the text, JSON
+# lines and CSV reports below look them up when (and only when) they are
+# rendered. Question text is always written as raw UTF-8, never \uXXXX
+# escapes: escaping Devanagari or Tamil makes a report ~6x larger and unreadable.
+# The "clusters" formats group the pairs first (see duplicate_clusters), so
+# a question repeated five times is written once per copy, not once per pair.
+
+
+def duplicate_record(pair, orig_idx, dup_idx, questions, similarity, mismatches, matched_on=None):
+    record = {
+        "pair": pair,
+        "original": orig_idx,
+        "duplicate": dup_idx,
+        "originalNUM": questions[orig_idx].get("questionNUM"),
+        "duplicateNUM": questions[dup_idx].get("questionNUM"),
+        "similarity": similarity,
+        "mismatches": list(mismatches),
+    }
+    if matched_on:
+        record["matchedOn"] = matched_on
+    return record
+
+
+# How a subject's text report is laid out. Templates are str.format strings;
+# `summary`, `near_duplicate` and `text_match` (appended to the summary of
+# near-duplicates and of pairs matched on another field) and `entry` can use
+# the record's fields plus `mismatch_text`,
+# `orig` and `dup` (the two question dicts, e.g. {orig[subchapter]}), and
+# `entry` also `summary`, `orig_json`, `dup_json` and `rule`. The clusters
+# format uses `cluster_header` (with `count` and `pairs`) and `cluster_entry`,
+# which can use the cluster's fields plus `duplicate_count`, `duplicateNUMs`,
+# `links` (the summaries of its pairs), `canonical_json`, `duplicates_json`
+# and `rule`.
+ReportStyle = namedtuple("ReportStyle", [
+    "summary", "near_duplicate", "no_mismatch", "entry", "header", "empty", "rule", "indent", "text_match",
+    "cluster_header", "cluster_entry",
+], defaults=[
+    "DUPLICATE : {duplicateNUM} duplicates {originalNUM} - {mismatch_text}",
+    " (near-duplicate, similarity {similarity:.2f})",
+    "all fields match",
+    "{summary}\n\nOriginal:\n{orig_json}\n\nDuplicate:\n{dup_json}\n{rule}\n",
+    "Found {count} duplicate entries.\n{rule}\n\n",
+    "No duplicates found.\n",
+    "=" * 70,
+    4,
+    " (near-identical {matchedOn}, similarity {similarity:.2f})",
+    "Found {count} duplicate clusters ({pairs} pairs).\n{rule}\n\n",
+    "CLUSTER {cluster}: {canonicalNUM} and {duplicate_count} duplicate(s): {duplicateNUMs}\n\n{links}\n\n"
+    "Canonical:\n{canonical_json}\n\nDuplicates:\n{duplicates_json}\n{rule}\n",
+])
+
+DEFAULT_REPORT_STYLE = ReportStyle()
+
+# Report formats and the file extension each is written with:
+#   text            the subject's ReportStyle layout
+#   jsonl           one compact JSON object per pair (the record plus both questions)
+#   clusters        the ReportStyle cluster layout, each question written once per cluster
+#   clusters-jsonl  one compact JSON object per cluster (the cluster plus its questions)
+# The file sink writes REPORT_FORMAT, clusters unless the REPORT_FORMAT env
+# var picks another; "text" gives the one-entry-per-pair report.
+REPORT_FORMATS = {"text": ".txt", "jsonl": ".jsonl", "clusters": ".txt", "clusters-jsonl": ".jsonl"}
+REPORT_FORMAT = os.environ.get("REPORT_FORMAT", "clusters")
+
+
+class _Fields(dict):
+    # Missing question fields format as None, like question.get(field).
+    def __missing__(self, key):
+        return None
+
+
+def _question_json(question, style):
+    return json.dumps(question, indent=style.indent, ensure_ascii=False, default=json_default)
+
+
+def _record_fields(record, questions, style):
+    orig, dup = questions[record["original"]], questions[record["duplicate"]]
+    return dict(record, orig=_Fields(orig), dup=_Fields(dup), rule=style.rule,
+                mismatch_text=", ".join(record["mismatches"]) or style.no_mismatch)
+
+
+def _summary(fields, style):
+    summary = style.summary.format(**fields)
+    if fields.get("matchedOn"):
+        summary += style.text_match.format(**fields)
+    elif fields["similarity"] < 1.0:
+        summary += style.near_duplicate.format(**fields)
+    return summary
+
+
+def render_text(questions, duplicates, style=DEFAULT_REPORT_STYLE):
+    """The human-readable report with one entry per duplicate pair (the "text" format)."""
+    if not duplicates:
+        return style.empty
+    entries = []
+    for record in duplicates:
+        orig, dup = questions[record["original"]], questions[record["duplicate"]]
+        fields = _record_fields(record, questions, style)
+        summary = _summary(fields, style)
+        entries.append(style.entry.format(
+            summary=summary,
+            orig_json=_question_json(orig, style),
+            dup_json=_question_json(dup, style),
+            **fields,
+        ))
+    return style.header.format(count=len(duplicates), rule=style.rule) + "\n".join(entries)
+
+
+def render_jsonl(questions, duplicates):
+    """The records with both questions embedded, one compact JSON object per line."""
+    return "".join(
+        json.dumps(dict(record, originalQuestion=questions[record["original"]],
+                        duplicateQuestion=questions[record["duplicate"]]),
+                   ensure_ascii=False, separators=(",", ":"), default=json_default) + "\n"
+        for record in duplicates
+    )
+
+
+def render_clusters_text(questions, duplicates, style=DEFAULT_REPORT_STYLE):
+    """The human-readable report with one entry per duplicate cluster."""
+    if not duplicates:
+        return style.empty
+    records = {record["pair"]: record for record in duplicates}
+    entries = []
+    clusters = duplicate_clusters(questions, duplicates)
+    for cluster in clusters:
+        links = [_summary(_record_fields(records[pair], questions, style), style) for pair in cluster["pairs"]]
+        entries.append(style.cluster_entry.format(
+            duplicate_count=len(cluster["members"]) - 1,
+            duplicateNUMs=", ".join(map(str, cluster["memberNUMs"][1:])),
+            links="\n".join(links),
+            canonical_json=_question_json(questions[cluster["canonical"]], style),
+            duplicates_json="\n".join(_question_json(questions[idx], style) for idx in cluster["members"][1:]),
+            rule=style.rule,
+            **cluster,
+        ))
+    return (style.cluster_header.format(count=len(clusters), pairs=len(duplicates), rule=style.rule)
+            + "\n".join(entries))
+
+
+def render_clusters_jsonl(questions, duplicates):
+    """The clusters with their pair records and member questions, one compact JSON object per line."""
+    records = {record["pair"]: record for record in duplicates}
+    return "".join(
+        json.dumps(dict(cluster, records=[records[pair] for pair in cluster["pairs"]],
+                        questions=[questions[idx] for idx in cluster["members"]]),
+                   ensure_ascii=False, separators=(",", ":"), default=json_default) + "\n"
+        for cluster in duplicate_clusters(questions, duplicates)
+    )
+
+
+def render_report(questions, duplicates, style=DEFAULT_REPORT_STYLE, report_format=REPORT_FORMAT):
+    """The duplicate report in one of REPORT_FORMATS; `style` only applies to the text layouts."""
+    if report_format == "text":
+        return render_text(questions, duplicates, style)
+    if report_format == "jsonl":
+        return render_jsonl(questions, duplicates)
+    if report_format == "clusters":
+        return render_clusters_text(questions, duplicates, style)
+    if report_format == "clusters-jsonl":
+        return render_clusters_jsonl(questions, duplicates)
+    raise ValueError(f"unknown report format {report_format!r}; expected one of {', '.join(REPORT_FORMATS)}")
+
+
+CSV_COLUMNS = ["pair", "duplicateNUM", "originalNUM", "similarity", "mismatches", "duplicateQuestion", "originalQuestion",
+               "matchedOn"]
+
+
+def render_csv(questions, duplicates):
+    """One row per pair with the two question texts; mismatches are joined with "; "."""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(CSV_COLUMNS)
+    for record in duplicates:
+        writer.writerow([
+            record["pair"], record["duplicateNUM"], record["originalNUM"], record["similarity"],
+            "; ".join(record["mismatches"]),
+            questions[record["duplicate"]].get("question"), questions[record["original"]].get("question"),
+            record.get("matchedOn", "question"),
+        ])
+    return out.getvalue()
@@ -0,0 +1,211 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+
+from cbse.common.question_record import json_default
+from cbse.common.result_cache import cache_key
+from cbse.common.subjects import init_worker, run_processor
+
+# Location of the job database; override with the JOB_QUEUE_DB env var.
+JOB_QUEUE_DB_PATH = os.environ.get("JOB_QUEUE_DB", "job_queue.sqlite3")
+# A running job whose worker has not renewed its lease for this long is
+# assumed dead (killed worker, server restart) and is queued again.
+JOB_LEASE_SECONDS = int(os.environ.get("JOB_LEASE_SECONDS", 60))
+# A job whose worker died this many times is failed instead of retried.
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", 3))
+# Finished jobs are deleted after this long.
+JOB_RETENTION_SECONDS = int(os.environ.get("JOB_RETENTION_SECONDS", 7 * 24 * 3600))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id           TEXT PRIMARY KEY,
+    job_key      TEXT NOT NULL,
+    subject      TEXT NOT NULL,
+    filename     TEXT,
+    input        BLOB,
+    status       TEXT NOT NULL,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    questions    TEXT,
+    duplicates   TEXT,
+    metrics      TEXT,
+    profile      INTEGER NOT NULL DEFAULT 0,
+    error        TEXT,
+    submitted_at REAL NOT NULL,
+    started_at   REAL,
+    finished_at  REAL,
+    lease_until  REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, submitted_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_job_key ON jobs (job_key);
+"""
+
+
+class JobQueue:
+    """
+    Persistent queue of processing jobs in SQLite, shared by the app (which
+    submits jobs and polls them) and the worker processes (which claim and
+    run them). Job state lives only in the database, so it survives a
+    Streamlit rerun and a server restart; a job whose worker died is picked
+    up again once its lease runs out.
+    """
+
+    def __init__(self, db_path=JOB_QUEUE_DB_PATH):
+        self.db_path = db_path
+        # Autocommit mode; claim() opens its own write transaction.
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def submit(self, subject, filename, data, profile=False):
+        """
+        Queues one file and returns its job ID. Submitting the same bytes for
+        the same subject again returns the existing job if it is queued,
+        running or done, so work is never thrown away or done twice; a failed
+        one is queued again as a new job. Callers that poll (the app, on every
+        rerun) keep the job ID they got instead of resubmitting, so a file
+        that fails is not retried in a loop. With `profile`, the worker
+        profiles the run (see profiling.profiled); profiled and plain runs of
+        the same file are separate jobs.
+        """
+        key = cache_key(data, subject) + ("-profile" if profile else "")
+        row = self.conn.execute(
+            "SELECT id, status FROM jobs WHERE job_key = ? ORDER BY submitted_at DESC LIMIT 1", (key,)
+        ).fetchone()
+        if row is not None and row["status"] != FAILED:
+            return row["id"]
+        job_id = uuid.uuid4().hex
+        self.conn.execute(
+            "INSERT INTO jobs (id, job_key, subject, filename, input, profile, status, submitted_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, key, subject, filename, data, int(profile), QUEUED, time.time()),
+        )
+        return job_id
+
+    def get(self, job_id):
+        """
+        Returns a dict with the job's id, subject, filename, status, error and
+        timestamps, plus "questions", "duplicates" and "metrics" once it is
+        done; None for an unknown (or purged) ID.
+        """
+        row = self.conn.execute(
+            "SELECT id, subject, filename, status, questions, duplicates, metrics, error, submitted_at, started_at, "
+            "finished_at FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        for field in ("questions", "duplicates", "metrics"):
+            job[field] = json.loads(job[field]) if job[field] is not None else None
+        return job
+
+    def claim(self, lease_seconds=JOB_LEASE_SECONDS):
+        """
+        Atomically takes the oldest queued job (or one whose lease expired)
+        and marks it running. Returns (job_id, subject, filename, data, profile)
+        or None. Jobs whose lease expired JOB_MAX_ATTEMPTS times are marked failed.
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, input = NULL, finished_at = ?, lease_until = NULL "
+                "WHERE status = ? AND lease_until < ? AND attempts >= ?",
+                (FAILED, "worker stopped while processing this file", now, RUNNING, now, JOB_MAX_ATTEMPTS),
+            )
+            row = self.conn.execute(
+                "SELECT id, subject, filename, input, profile FROM jobs WHERE status = ? OR (status = ? AND lease_until < ?) "
+                "ORDER BY submitted_at LIMIT 1",
+                (QUEUED, RUNNING, now),
+            ).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, started_at = ?, lease_until = ? WHERE id = ?",
+                    (RUNNING, now, now + lease_seconds, row["id"]),
+                )
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        return row["id"], row["subject"], row["filename"], row["input"], bool(row["profile"])
+
+    def renew(self, job_id, lease_seconds=JOB_LEASE_SECONDS):
+        self.conn.execute("UPDATE jobs SET lease_until = ? WHERE id = ? AND status = ?",
+                          (time.time() + lease_seconds, job_id, RUNNING))
+
+    def complete(self, job_id, questions, duplicates, metrics=None):
+        # The input is no longer needed once the result is stored.
+        self.conn.execute(
+            "UPDATE jobs SET status = ?, questions = ?, duplicates = ?, metrics = ?, input = NULL, finished_at = ?, "
+            "lease_until = NULL WHERE id = ?",
+            (DONE, json.dumps(questions, ensure_ascii=False, default=json_default), json.dumps(duplicates, ensure_ascii=False),
+             json.dumps(metrics) if metrics is not None else None, time.time(), job_id),
+        )
+
+    def fail(self, job_id, error):
+        self.conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, input = NULL, finished_at = ?, lease_until = NULL WHERE id = ?",
+            (FAILED, error, time.time(), job_id),
+        )
+
+    def purge(self, older_than=JOB_RETENTION_SECONDS):
+        """Deletes finished jobs older than `older_than` seconds; returns how many."""
+        cur = self.conn.execute("DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                                (DONE, FAILED, time.time() - older_than))
+        return cur.rowcount
+
+
+def _keep_lease(db_path, job_id, stop, lease_seconds):
+    # Own connection: sqlite3 connections should not be shared across threads.
+    with JobQueue(db_path) as queue:
+        while not stop.wait(lease_seconds / 3):
+            queue.renew(job_id, lease_seconds)
+
+
+def run_worker(db_path=JOB_QUEUE_DB_PATH, poll_interval=0.5, lease_seconds=JOB_LEASE_SECONDS, max_jobs=None):
+    """
+    Worker loop: claims jobs one at a time and runs them with the subject's
+    processor, renewing the job's lease from a background thread while it
+    runs. Returns after `max_jobs` jobs if given, otherwise runs forever.
+    """
+    init_worker()
+    handled = 0
+    with JobQueue(db_path) as queue:
+        queue.purge()
+        while max_jobs is None or handled < max_jobs:
+            claimed = queue.claim(lease_seconds)
+            if claimed is None:
+                time.sleep(poll_interval)
+                continue
+            job_id, subject, filename, data, profile = claimed
+            stop = threading.Event()
+            lease = threading.Thread(target=_keep_lease, args=(db_path, job_id, stop, lease_seconds), daemon=True)
+            lease.start()
+            try:
+                result = run_processor(subject, data, source=filename, profile_name=job_id if profile else None)
+                if result is None:
+                    queue.fail(job_id, "processor returned no result")
+                else:
+                    queue.complete(job_id, result.questions, result.duplicates, result.metrics)
+            except Exception as e:
+                queue.fail(job_id, repr(e))
+            finally:
+                stop.set()
+                lease.join()
+            handled += 1
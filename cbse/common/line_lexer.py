@@ -0,0 +1,157 @@
+import re
+from collections import namedtuple
+
+from cbse.common.line_rules import _scope_inline_flags
+
+# Token kinds shared by all subject parsers. Subjects may add their own kinds
+# (e.g. maths' "Solution:" lines); anything no rule matches is TEXT.
+QUESTION_START = "QUESTION_START"
+OPTION = "OPTION"
+ANSWER = "ANSWER"
+KEYWORDS = "KEYWORDS"
+SEPARATOR = "SEPARATOR"
+EXPLANATION = "EXPLANATION"
+HEADING = "HEADING"
+TEXT = "TEXT"
+
+# kind:  one of the kinds above.
+# text:  the line exactly as given.
+# value: the question number (int) for QUESTION_START, otherwise the rule's
+#        first capture group (e.g. the option letter), or None.
+# body:  the rest of the line after the matched marker; the whole line for TEXT.
+Token = namedtuple("Token", ["kind", "text", "value", "body"])
+
+
+class LineLexer:
+    """
+    Classifies lines into typed tokens with one regex call per line.
+
+    `rules` is an ordered list of (kind, pattern) pairs. Each pattern matches
+    the marker at the start of a line (e.g. r"(\\d+)[.)]\\s*" for a question
+    number); all of them are folded into one alternation of named groups,
+    so the first rule in the list that matches a line decides its kind.
+    """
+
+    def __init__(self, rules, flags=0):
+        self.rules = list(rules)
+        parts = []
+        self._value_groups = {}
+        group = 0
+        for kind, pattern in self.rules:
+            scoped = _scope_inline_flags(pattern)
+            inner_groups = re.compile(scoped, flags).groups
+            group += 1
+            parts.append(f"(?P<{kind}>{scoped})")
+            # The kind's own capture groups follow its named group in numbering.
+            self._value_groups[kind] = group + 1 if inner_groups else None
+            group += inner_groups
+        self.regex = re.compile("|".join(parts), flags)
+
+    def classify(self, line):
+        m = self.regex.match(line)
+        if m is None:
+            return Token(TEXT, line, None, line)
+        kind = m.lastgroup
+        value_group = self._value_groups[kind]
+        value = m.group(value_group) if value_group else None
+        if kind == QUESTION_START and value is not None:
+            value = int(value)
+        return Token(kind, line, value, line[m.end():])
+
+    def tokenize(self, lines):
+        return [self.classify(line) for line in lines]
+
+
+def split_question_blocks(tokens):
+    """
+    Groups a token stream into question blocks, each starting at a
+    QUESTION_START token and running up to the next one. Tokens before the
+    first question are dropped.
+    """
+    blocks = []
+    current = None
+    for tok in tokens:
+        if tok.kind == QUESTION_START:
+            current = [tok]
+            blocks.append(current)
+        elif current is not None:
+            current.append(tok)
+    return blocks
+
+
+def index_of(block, kinds, start=0, stop=None):
+    """Index of the first token of `kinds` (a kind or tuple of kinds) in block[start:stop], or None."""
+    if isinstance(kinds, str):
+        kinds = (kinds,)
+    for i in range(start, len(block) if stop is None else stop):
+        if block[i].kind in kinds:
+            return i
+    return None
+
+
+def join_body(block, start, stop=None):
+    """
+    Text of block[start:stop] with the marker of the first token removed,
+    i.e. the first token's body followed by the remaining lines.
+    """
+    if start is None or start >= len(block):
+        return ""
+    return "\n".join([block[start].body] + [tok.text for tok in block[start + 1:stop]])
+
+
+def body_until_blank(block, start, stop=None):
+    """
+    Like join_body, but ends at the first blank line. Blank lines directly
+    after a marker with nothing following it (e.g. a lone "Answer:") are
+    skipped rather than ending the text.
+    """
+    if start is None or start >= len(block):
+        return ""
+    lines = [block[start].body]
+    has_text = bool(lines[0].strip())
+    for tok in block[start + 1:stop]:
+        if not tok.text.strip():
+            if has_text:
+                break
+            continue
+        lines.append(tok.text)
+        has_text = True
+    return "\n".join(lines)
+
+
+def option_texts(block):
+    """
+    Texts of the OPTION tokens in a block, in order. An option marker with no
+    text after it ("A)") takes the next non-blank line as its text.
+    """
+    options = []
+    i = 0
+    while i < len(block):
+        tok = block[i]
+        i += 1
+        if tok.kind != OPTION:
+            continue
+        text = tok.body.strip()
+        if not text:
+            while i < len(block) and not block[i].text.strip():
+                i += 1
+            if i < len(block):
+                text = block[i].text.strip()
+                i += 1
+        options.append(text)
+    return options
+
+
+def sub_block(lines, pattern, marker, repl=""):
+    """
+    Applies pattern.sub to a block's lines as one newline-terminated text, so
+    a match may span lines, and splits the result back into lines. Blocks in
+    which no line contains `marker` are returned as is without being joined.
+    """
+    if not any(marker.search(line) for line in lines):
+        return lines
+    text = pattern.sub(repl, "\n".join(lines) + "\n")
+    if not text:
+        return []
+    result = text.split("\n")
+    return result[:-1] if text.endswith("\n") else result
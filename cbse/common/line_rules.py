@@ -0,0 +1,113 @@
+import re
+
+_LEADING_FLAGS_RE = re.compile(r"^\(\?([imsx]+)\)")
+
+
+def _scope_inline_flags(pattern):
+    """
+    Turns a leading global flag group such as "(?i)^CBSE$" into the scoped form
+    "(?i:^CBSE$)", since global flags are only allowed at the very start of the
+    combined expression.
+    """
+    m = _LEADING_FLAGS_RE.match(pattern)
+    if not m:
+        return pattern
+    return f"(?{m.group(1)}:{pattern[m.end():]})"
+
+
+class KeywordCountRule:
+    """
+    Drops instruction lines such as "Answer the following questions briefly":
+    lines containing at least `min_count` whole-word occurrences of `keywords`
+    (case-insensitive).
+
+    This replaces lookahead patterns of the form
+    `^(?=(?:.*\\b(k1|k2|...)\\b.*?){3,}).*$`, which backtrack polynomially on
+    long lines that contain only a couple of keywords. Here the line is
+    scanned once, left to right, with a keyword alternation that has no
+    nested quantifiers, and the scan stops at the `min_count`-th hit, so the
+    cost is linear in the line length.
+    """
+
+    def __init__(self, keywords, min_count=3):
+        self.keywords = list(keywords)
+        self.min_count = min_count
+        alternation = "|".join(re.escape(k) for k in self.keywords)
+        self.regex = re.compile(rf"\b(?:{alternation})\b", re.IGNORECASE)
+
+    def __repr__(self):
+        return f"KeywordCountRule({self.keywords!r}, min_count={self.min_count})"
+
+    def matches(self, line):
+        count = 0
+        for _ in self.regex.finditer(line):
+            count += 1
+            if count >= self.min_count:
+                return True
+        return False
+
+
+class LineRuleSet:
+    """
+    A subject's line-removal patterns folded into a single precompiled
+    alternation, built once at import time.
+
+    `should_remove(line)` gives the same keep/drop decision as
+    `any(re.compile(p, flags).match(line) for p in patterns)` (or `.search`
+    with mode="search"), but with one regex call per line instead of one per
+    pattern. `matching_rule` compiles a named-group variant on first use so it
+    can still tell which rule dropped a line; it is only consulted for lines
+    that are dropped, and only when metrics are being collected.
+
+    Entries that are not strings are rule objects with a `matches(line)`
+    method (e.g. KeywordCountRule); they are checked after the combined regex
+    and keep their position for `matching_rule`.
+    """
+
+    def __init__(self, patterns, flags=re.IGNORECASE, mode="match"):
+        if mode not in ("match", "search"):
+            raise ValueError("mode must be 'match' or 'search'")
+        self.patterns = list(patterns)
+        self.mode = mode
+        self.flags = flags
+        self._regex_indexes = [i for i, pat in enumerate(self.patterns) if isinstance(pat, str)]
+        self._rules = [(i, pat) for i, pat in enumerate(self.patterns) if not isinstance(pat, str)]
+        scoped = [_scope_inline_flags(self.patterns[i]) for i in self._regex_indexes]
+        # Non-capturing groups for the hot path; capturing groups make the
+        # engine record spans on every attempt, which is measurably slower.
+        # An empty alternation would match everything, so use a never-matching regex.
+        self.regex = re.compile("|".join(f"(?:{pat})" for pat in scoped) or r"(?!)", flags)
+        self._find = self.regex.match if mode == "match" else self.regex.search
+        self._scoped = scoped
+        self._named_find = None
+
+    def should_remove(self, line, metrics=None):
+        """
+        Whether any rule drops `line`. With a RunMetrics, a dropped line is
+        also counted under "lines_dropped" for the rule that dropped it.
+        """
+        if self._find(line) is None and not any(rule.matches(line) for _, rule in self._rules):
+            return False
+        if metrics is not None:
+            metrics.count("lines_dropped", key=self.rule_label(self.matching_rule(line)))
+        return True
+
+    def rule_label(self, index):
+        """A readable name for rule `index`: the pattern itself, or the rule object's repr."""
+        rule = self.patterns[index]
+        return rule if isinstance(rule, str) else repr(rule)
+
+    def matching_rule(self, line):
+        """Index of the rule that drops `line`, or None if the line is kept."""
+        if self._named_find is None:
+            named = re.compile("|".join(f"(?P<r{i}>{pat})" for i, pat in zip(self._regex_indexes, self._scoped))
+                               or r"(?!)", self.flags)
+            self._named_find = named.match if self.mode == "match" else named.search
+        m = self._named_find(line)
+        index = int(m.lastgroup[1:]) if m is not None else None
+        for i, rule in self._rules:
+            if index is not None and i > index:
+                break
+            if rule.matches(line):
+                return i
+        return index
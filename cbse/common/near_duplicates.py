@@ -0,0 +1,269 @@
+import os
+import re
+import zlib
+from collections import defaultdict
+
+# ---------- Configuration ----------
+# Minimum estimated Jaccard similarity (over word + character shingles) for two
+# questions to be reported as near-duplicates. Exact matches always score 1.0.
+# Override with the NEAR_DUPLICATE_THRESHOLD env var; the LSH bands follow it.
+DEFAULT_NEAR_DUPLICATE_THRESHOLD = 0.8
+NEAR_DUPLICATE_THRESHOLD = float(os.environ.get("NEAR_DUPLICATE_THRESHOLD", DEFAULT_NEAR_DUPLICATE_THRESHOLD))
+
+NUM_PERMUTATIONS = 64     # MinHash signature length (must be a power of two)
+# Candidates whose signature agreement is this far below the threshold are
+# dropped before the exact Jaccard check.
+SIGNATURE_MARGIN = 0.15
+CHAR_SHINGLE_SIZE = 5
+WORD_SHINGLE_SIZE = 2
+
+# How find_duplicate_pairs searches; override with the DEDUP_MODE env var:
+#   lsh    MinHash LSH candidates checked by shingle Jaccard (approximate, the default)
+#   tfidf  every pair scored by TF-IDF cosine over the same shingles (precise;
+#          needs the optional numpy and scipy packages, see tfidf_similarity)
+DEDUP_MODES = ("lsh", "tfidf")
+DEDUP_MODE = os.environ.get("DEDUP_MODE", "lsh")
+
+_BIN_BITS = NUM_PERMUTATIONS.bit_length() - 1
+_BIN_MASK = NUM_PERMUTATIONS - 1
+_EMPTY_BIN = 1 << 32
+
+_PUNCT_RE = re.compile(r"[^\w\s]", re.UNICODE)
+
+
+# ---------- Normalisation & shingling ----------
+def normalize_question_text(text):
+    """Exact-match key: lowercase with all whitespace removed."""
+    return re.sub(r'\s+', '', text.lower()) if isinstance(text, str) else ""
+
+
+def shingle_set(text):
+    """
+    Returns the set of hashed shingles for a question: word n-grams plus
+    character n-grams over the whitespace-free text. Both kinds are prefixed
+    so a word shingle can never collide with a character shingle.
+    Hashes are crc32 rather than hash() so they are stable across processes.
+    """
+    if not isinstance(text, str):
+        return set()
+    lowered = _PUNCT_RE.sub(" ", text.lower())
+    words = lowered.split()
+    compact = "".join(words)
+    if not compact:
+        return set()
+
+    crc32 = zlib.crc32
+    if len(words) < WORD_SHINGLE_SIZE:
+        word_grams = words
+    else:
+        word_grams = [" ".join(words[i:i + WORD_SHINGLE_SIZE]) for i in range(len(words) - WORD_SHINGLE_SIZE + 1)]
+    shingles = {crc32(("w:" + g).encode("utf-8")) for g in word_grams}
+
+    if len(compact) <= CHAR_SHINGLE_SIZE:
+        shingles.add(crc32(("c:" + compact).encode("utf-8")))
+    else:
+        shingles.update(
+            crc32(("c:" + compact[i:i + CHAR_SHINGLE_SIZE]).encode("utf-8"))
+            for i in range(len(compact) - CHAR_SHINGLE_SIZE + 1)
+        )
+    return shingles
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    inter = len(a & b)
+    return inter / (len(a) + len(b) - inter)
+
+
+# ---------- MinHash & LSH ----------
+def minhash_signature(shingles):
+    """
+    Computes a NUM_PERMUTATIONS-long MinHash signature for a set of hashed
+    shingles using one-permutation hashing: each shingle hash is routed to one
+    bin by its low bits and every bin keeps its minimum. Empty bins borrow the
+    value of the next non-empty bin (rotation densification), so the cost is a
+    single pass over the shingles instead of one pass per permutation.
+    """
+    if not shingles:
+        return None
+    bins = [_EMPTY_BIN] * NUM_PERMUTATIONS
+    for h in shingles:
+        b = h & _BIN_MASK
+        v = h >> _BIN_BITS
+        if v < bins[b]:
+            bins[b] = v
+
+    if _EMPTY_BIN in bins:
+        for b in range(NUM_PERMUTATIONS):
+            if bins[b] != _EMPTY_BIN:
+                continue
+            step = 1
+            while bins[(b + step) % NUM_PERMUTATIONS] == _EMPTY_BIN:
+                step += 1
+            # Offset by the rotation distance so borrowed values stay distinguishable.
+            bins[b] = bins[(b + step) % NUM_PERMUTATIONS] + step * _EMPTY_BIN
+    return tuple(bins)
+
+
+def estimated_similarity(sig1, sig2):
+    return sum(1 for x, y in zip(sig1, sig2) if x == y) / len(sig1)
+
+
+def lsh_bands(threshold, num_perm=NUM_PERMUTATIONS):
+    """
+    (bands, rows) of a banded index for `threshold`. A pair of similarity s
+    shares a bucket with probability 1 - (1 - s**rows)**bands, an S-curve
+    that climbs steepest near (1 / bands)**(1 / rows). Rows are added while
+    that point stays at or below the threshold, with as many bands as the
+    signature still fills: 8 x 8 for 0.8 and 64 permutations. Fewer rows
+    let far less similar pairs in (16 x 4 turns at 0.5), and on a large
+    file those outnumber the duplicates, so the search turns quadratic.
+    """
+    rows = 1
+    while rows < num_perm and (1 / (num_perm // (rows + 1))) ** (1 / (rows + 1)) <= threshold:
+        rows += 1
+    return num_perm // rows, rows
+
+
+class MinHashLSH:
+    """
+    Banded LSH index over MinHash signatures. Items that agree on every row of
+    at least one band land in the same bucket and become candidate pairs, so
+    only a small fraction of all pairs is ever compared. The bands and rows
+    come from the similarity threshold (see lsh_bands).
+    """
+
+    def __init__(self, threshold=NEAR_DUPLICATE_THRESHOLD, num_perm=NUM_PERMUTATIONS):
+        self.bands, self.rows = lsh_bands(threshold, num_perm)
+        self.buckets = [defaultdict(list) for _ in range(self.bands)]
+
+    def _band_keys(self, signature):
+        # A band takes every bands-th bin rather than a run of neighbouring
+        # ones: empty bins copy their next filled bin, so neighbours often
+        # hold one value and a band of them would agree far more than its
+        # row count suggests.
+        bands = self.bands
+        return [signature[band:bands * self.rows:bands] for band in range(bands)]
+
+    def query(self, signature):
+        """Returns the keys of all previously inserted items sharing a bucket."""
+        found = set()
+        for bucket, key in zip(self.buckets, self._band_keys(signature)):
+            hits = bucket.get(key)
+            if hits:
+                found.update(hits)
+        return found
+
+    def insert(self, key, signature):
+        for bucket, band_key in zip(self.buckets, self._band_keys(signature)):
+            bucket[band_key].append(key)
+
+
+def exact_duplicates(texts, groups=None):
+    """
+    Yields (index, original_index, first) for every non-empty text.
+    original_index is the earliest earlier text with the same normalised
+    text, from another group if `groups` (one group number per text) is
+    given, or None. first is True for the text's first copy in its group
+    (its first copy overall without groups): the copies a similarity search
+    has to index, since they may be the earliest match of a later text.
+    """
+    first_copies = {}  # normalised text -> its first copy in each group, in document order
+    for idx, text in enumerate(texts):
+        norm = normalize_question_text(text)
+        if not norm:
+            continue
+        copies = first_copies.setdefault(norm, [])
+        group = None if groups is None else groups[idx]
+        orig = next((c for c in copies if group is None or groups[c] != group), None)
+        first = not any(group is None or groups[c] == group for c in copies)
+        if first:
+            copies.append(idx)
+        yield idx, orig, first
+
+
+# ---------- Public API ----------
+def find_duplicate_pairs(texts, threshold=None, mode=DEDUP_MODE, groups=None):
+    """
+    Finds duplicate and near-duplicate questions in document order.
+
+    Returns a list of (original_index, duplicate_index, similarity) tuples,
+    one for every text that duplicates an earlier one. Like the old exact-match
+    `seen` dictionary, each duplicate is reported once, against the earliest
+    matching question. Exact matches (identical normalised text) have a
+    similarity of 1.0; near-duplicates are LSH candidates whose true shingle
+    Jaccard similarity is at least `threshold` (NEAR_DUPLICATE_THRESHOLD by
+    default), or with mode "tfidf" any pair whose TF-IDF cosine is at least
+    `threshold` (TFIDF_COSINE_THRESHOLD by default). Empty texts are skipped.
+    With `groups`, one group number per text, a text is only matched
+    against texts of other groups.
+    """
+    if mode == "tfidf":
+        try:
+            from cbse.common.tfidf_similarity import TFIDF_COSINE_THRESHOLD, find_tfidf_pairs
+        except ImportError as e:
+            raise ImportError(f"dedup mode 'tfidf' needs numpy and scipy: {e}") from e
+        return find_tfidf_pairs(texts, TFIDF_COSINE_THRESHOLD if threshold is None else threshold, groups=groups)
+    if mode != "lsh":
+        raise ValueError(f"unknown dedup mode {mode!r}; expected one of {', '.join(DEDUP_MODES)}")
+    if threshold is None:
+        threshold = NEAR_DUPLICATE_THRESHOLD
+    lsh = MinHashLSH(threshold)
+    shingle_sets, signatures = {}, {}
+    pairs = []
+    min_estimate = threshold - SIGNATURE_MARGIN
+
+    for idx, orig, first in exact_duplicates(texts, groups):
+        if orig is not None:
+            pairs.append((orig, idx, 1.0))
+            if not first:
+                continue
+
+        shingles = shingle_set(texts[idx])
+        signature = minhash_signature(shingles)
+        if signature is None:
+            continue
+
+        if orig is None:
+            for cand in sorted(lsh.query(signature)):
+                if groups is not None and groups[cand] == groups[idx]:
+                    continue
+                if estimated_similarity(signature, signatures[cand]) < min_estimate:
+                    continue
+                score = jaccard(shingles, shingle_sets[cand])
+                if score >= threshold:
+                    pairs.append((cand, idx, round(score, 4)))
+                    break
+
+        if first:
+            shingle_sets[idx] = shingles
+            signatures[idx] = signature
+            lsh.insert(idx, signature)
+
+    return pairs
+
+
+def find_cross_file_pairs(texts_by_file, threshold=None, mode=DEDUP_MODE):
+    """
+    Duplicates across several files, e.g. the chapters uploaded together.
+
+    `texts_by_file` is a list with one list of question texts per file. All
+    texts are checked together in file order, each only against the texts
+    of other files, so a question repeated within its own file still gets
+    its earliest match in another one. Pairs are returned as
+    (original_file, original_index, duplicate_file, duplicate_index, similarity)
+    tuples, with file and question indexes into `texts_by_file`.
+    """
+    texts, owners = [], []
+    for file_idx, file_texts in enumerate(texts_by_file):
+        for idx, text in enumerate(file_texts):
+            texts.append(text)
+            owners.append((file_idx, idx))
+
+    pairs = []
+    groups = [file_idx for file_idx, _ in owners]
+    for orig_idx, dup_idx, similarity in find_duplicate_pairs(texts, threshold, mode, groups):
+        (orig_file, orig_q), (dup_file, dup_q) = owners[orig_idx], owners[dup_idx]
+        pairs.append((orig_file, orig_q, dup_file, dup_q, similarity))
+    return pairs
@@ -0,0 +1,105 @@
+from itertools import combinations
+from collections import defaultdict
+
+from cbse.common.duplicate_report import duplicate_record
+from cbse.common.simhash import text_words
+
+# ---------- Configuration ----------
+# MCQs sharing at least this many options are candidates, however their
+# question texts are worded: each is indexed under every subset of this
+# many of its options (the 4 three-option subsets of a 4-option MCQ).
+OPTION_SET_MIN_SHARED = 3
+# A candidate is only reported when the two question texts also share this
+# fraction of their words, so MCQs that merely reuse stock options ("Both A
+# and B", "None of these") with an unrelated question are not paired.
+OPTION_SET_MIN_QUESTION_OVERLAP = 0.3
+
+
+# ---------- Keys ----------
+def normalize_option(text):
+    """Lowercased words of an option, punctuation stripped, single-spaced."""
+    return " ".join(text_words(str(text)))
+
+
+def option_set(item):
+    """
+    The question's distinct normalised options, or an empty frozenset if it
+    has none. Any question with an options list counts as an MCQ, whatever
+    its processor calls the type (Hindi's is "बहुविकल्पीय प्रश्न"). Options
+    without a letter ("12", "3/4") are left out: the same numbers answer
+    many unrelated maths MCQs.
+    """
+    options = item.get("options")
+    if not isinstance(options, list):
+        return frozenset()
+    return frozenset(norm for norm in map(normalize_option, options) if any(c.isalpha() for c in norm))
+
+
+def option_set_keys(options, min_shared=OPTION_SET_MIN_SHARED):
+    """
+    Order-independent keys for an option set: the sorted tuple of every
+    `min_shared`-option subset, to look up in a dict. Two sets share a key
+    exactly when they have `min_shared` or more options in common. Sets
+    with fewer options get no keys.
+    """
+    return list(combinations(sorted(options), min_shared))
+
+
+def _word_overlap(a, b):
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+# ---------- Public API ----------
+def find_option_set_pairs(questions, min_shared=OPTION_SET_MIN_SHARED,
+                          min_question_overlap=OPTION_SET_MIN_QUESTION_OVERLAP):
+    """
+    MCQs whose options are (nearly) the same set as an earlier MCQ's, in
+    any order, like near_duplicates.find_duplicate_pairs:
+    (original_index, duplicate_index, similarity) for every MCQ sharing
+    `min_shared`+ options with an earlier one whose question words overlap
+    it by `min_question_overlap`, against the earliest such MCQ. Similarity
+    is the fraction of their options the two share.
+    """
+    index = defaultdict(list)
+    # Option sets and question words of the indexed MCQs, by index.
+    indexed = {}
+    pairs = []
+    for idx, item in enumerate(questions):
+        options = option_set(item)
+        keys = option_set_keys(options, min_shared)
+        if not keys:
+            continue
+        words = set(text_words(item.get("question")))
+        for orig_idx in sorted({orig for key in keys for orig in index.get(key, ())}):
+            orig_options, orig_words = indexed[orig_idx]
+            if _word_overlap(words, orig_words) >= min_question_overlap:
+                pairs.append((orig_idx, idx, round(len(options & orig_options) / len(options | orig_options), 4)))
+                break
+        indexed[idx] = (options, words)
+        for key in keys:
+            index[key].append(idx)
+    return pairs
+
+
+def option_set_duplicates(questions, duplicates):
+    """
+    Duplicate records (numbered on from `duplicates`) for reworded MCQs
+    found by find_option_set_pairs, skipping pairs `duplicates` already
+    reports and questions it already reports as duplicates. The records are
+    marked "matchedOn": "options", with the fields that differ as mismatches.
+    """
+    reported = {(record["original"], record["duplicate"]) for record in duplicates}
+    duplicate_questions = {record["duplicate"] for record in duplicates}
+    records = []
+    for orig_idx, dup_idx, similarity in find_option_set_pairs(questions):
+        if (orig_idx, dup_idx) in reported or dup_idx in duplicate_questions:
+            continue
+        orig, item = questions[orig_idx], questions[dup_idx]
+        mismatches = [f"{field} mismatch" for field in ("question", "correctAnswer")
+                      if str(item.get(field)) != str(orig.get(field))]
+        differing = len(option_set(item) ^ option_set(orig))
+        if differing:
+            mismatches.append(f"{differing} options mismatched")
+        records.append(duplicate_record(len(duplicates) + len(records) + 1, orig_idx, dup_idx, questions,
+                                        similarity, mismatches, matched_on="options"))
+    return records
@@ -0,0 +1,101 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF
+
+from cbse.common.run_metrics import RunMetrics
+
+# Number of worker processes used for large PDFs (1 disables the pool).
+PDF_EXTRACT_WORKERS = int(os.environ.get("PDF_EXTRACT_WORKERS", os.cpu_count() or 1))
+# Below this many pages, process start-up costs more than it saves.
+PARALLEL_MIN_PAGES = int(os.environ.get("PDF_PARALLEL_MIN_PAGES", 64))
+
+# PyMuPDF is not thread-safe, and Streamlit runs each session on its own
+# thread, so all in-process fitz calls go through this lock. Pool workers
+# are separate processes and do not need it.
+_FITZ_LOCK = threading.Lock()
+
+
+def _page_texts(doc, start, stop, metrics):
+    with metrics.stage("extract"):
+        texts = [doc.load_page(page_num).get_text() for page_num in range(start, stop)]
+    metrics.count("pages", stop - start)
+    return texts
+
+
+def _clean_pages(texts, page_fn, metrics):
+    # Plain Python on extracted strings, so it runs outside the fitz lock.
+    if not page_fn:
+        return texts
+    with metrics.stage("clean"):
+        return [page_fn(text, metrics) for text in texts]
+
+
+def open_pdf(pdf_source):
+    """Opens a PDF given as a path or as bytes (see processor_io.read_source)."""
+    if isinstance(pdf_source, bytes):
+        return fitz.open(stream=pdf_source, filetype="pdf")
+    return fitz.open(pdf_source)
+
+
+def _extract_range_in_worker(pdf_source, start, stop, page_fn):
+    # Each worker opens its own handle; fitz documents cannot be shared across processes.
+    metrics = RunMetrics()
+    with metrics.stage("extract"):
+        doc = open_pdf(pdf_source)
+    try:
+        pages = _page_texts(doc, start, stop, metrics)
+    finally:
+        doc.close()
+    return _clean_pages(pages, page_fn, metrics), metrics.as_dict()
+
+
+def page_ranges(page_count, workers):
+    """Splits [0, page_count) into at most `workers` contiguous ranges."""
+    workers = max(1, min(workers, page_count))
+    chunk = -(-page_count // workers)
+    return [(start, min(start + chunk, page_count)) for start in range(0, page_count, chunk)]
+
+
+def read_pdf_pages(pdf_source, page_fn=None, workers=None, metrics=None):
+    """
+    Opens a PDF given as a path or as bytes and returns one entry per page, in
+    page order: `page_fn(page_text, metrics)` if a page function is given,
+    otherwise the raw page text. Raises whatever fitz raises if the PDF cannot
+    be opened. Text extraction is timed as the "extract" stage of `metrics`
+    and the page function as "clean"; on the process pool these are the
+    workers' times added up.
+
+    Small documents are read serially, holding the fitz lock only while
+    the document is open and its text extracted; the page function runs
+    after the lock is released. Larger
+    ones are split into page ranges that are extracted on a process pool,
+    each worker re-opening `pdf_source`; the per-page results are merged back
+    in page order, so the output is identical to the serial path. `page_fn`
+    must be a module-level function so it can be sent to the workers.
+    """
+    workers = PDF_EXTRACT_WORKERS if workers is None else workers
+    metrics = RunMetrics() if metrics is None else metrics
+    pages = None
+    with _FITZ_LOCK:
+        with metrics.stage("extract"):
+            doc = open_pdf(pdf_source)
+        try:
+            page_count = len(doc)
+            if workers <= 1 or page_count < PARALLEL_MIN_PAGES:
+                pages = _page_texts(doc, 0, page_count, metrics)
+        finally:
+            doc.close()
+    if pages is not None:
+        return _clean_pages(pages, page_fn, metrics)
+
+    ranges = page_ranges(page_count, workers)
+    with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+        futures = [pool.submit(_extract_range_in_worker, pdf_source, start, stop, page_fn) for start, stop in ranges]
+        results = []
+        for future in futures:
+            pages, worker_metrics = future.result()
+            results.extend(pages)
+            metrics.merge(worker_metrics)
+    return results
@@ -0,0 +1,90 @@
+import io
+import os
+import json
+import shutil
+import tempfile
+from collections import namedtuple
+
+from cbse.common.duplicate_report import DEFAULT_REPORT_STYLE, REPORT_FORMAT, REPORT_FORMATS, render_report
+from cbse.common.question_record import json_default
+
+# What every subject processor returns.
+# questions:  the parsed questions (question_record.Question), in output order.
+# duplicates: one record per duplicate pair (see duplicate_report); the text
+#             report is rendered from these only when it is written or downloaded.
+# metrics:    per-stage timings and counters for the run (RunMetrics.as_dict()),
+#             or None for results that were not produced by a processor run.
+ProcessorResult = namedtuple("ProcessorResult", ["questions", "duplicates", "metrics"], defaults=[None])
+
+_SWAP_ATTEMPTS = 10
+
+
+def read_source(source):
+    """
+    Normalizes a processor input to a path or bytes: paths are returned as
+    str, bytes-like objects as bytes, and binary file objects are read.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    return source.read()
+
+
+def as_file(source):
+    """A path or binary file object for readers such as zipfile; bytes are wrapped in BytesIO."""
+    source = read_source(source)
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+
+def write_result(result, output_folder, json_filename, duplicate_filename="duplicate_output.txt", extra_files=None,
+                 style=DEFAULT_REPORT_STYLE, report_format=REPORT_FORMAT):
+    """
+    File sink for a ProcessorResult: replaces `output_folder` with a folder
+    holding the questions JSON, the duplicate report in `report_format` (the
+    text format laid out by `style`; the report file takes that format's
+    extension) and any `extra_files` ({filename: text}). Returns the JSON and
+    report paths.
+
+    The files are written to a private staging folder next to `output_folder`
+    and swapped in by rename, so concurrent runs writing the same folder never
+    delete each other's files mid-write; the folder always holds one complete
+    run's output (the last one to finish).
+    """
+    output_folder = os.path.normpath(output_folder)
+    parent = os.path.dirname(os.path.abspath(output_folder))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=f".{os.path.basename(output_folder)}-", dir=parent)
+    os.chmod(staging, 0o755)  # mkdtemp creates it owner-only
+
+    report = render_report(result.questions, result.duplicates, style, report_format)
+    duplicate_filename = os.path.splitext(duplicate_filename)[0] + REPORT_FORMATS[report_format]
+    files = {duplicate_filename: report, **(extra_files or {})}
+    with open(os.path.join(staging, json_filename), "w", encoding="utf-8") as f:
+        json.dump(result.questions, f, indent=4, ensure_ascii=False, default=json_default)
+    for filename, text in files.items():
+        with open(os.path.join(staging, filename), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    # Move the previous output aside, then rename ours into place. If another
+    # run swapped its folder in between, the rename fails and we retry.
+    for _ in range(_SWAP_ATTEMPTS):
+        retired = f"{staging}.old"
+        try:
+            os.rename(output_folder, retired)
+        except FileNotFoundError:
+            retired = None
+        try:
+            os.rename(staging, output_folder)
+        except OSError:
+            if retired:
+                shutil.rmtree(retired, ignore_errors=True)
+            continue
+        if retired:
+            shutil.rmtree(retired, ignore_errors=True)
+        break
+    else:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise OSError(f"could not replace {output_folder!r}: it keeps being replaced by another run")
+
+    return os.path.join(output_folder, json_filename), os.path.join(output_folder, duplicate_filename)
@@ -0,0 +1,127 @@
+import os
+import time
+import cProfile
+import threading
+import tracemalloc
+import contextlib
+
+# Where profiles of processor runs are written; override with the PROFILE_DIR env var.
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+# Set PROFILE_PROCESSING=1 to profile every upload; the app's sidebar toggle
+# starts from this and can switch profiling on for a single session.
+PROFILE_PROCESSING = os.environ.get("PROFILE_PROCESSING", "").lower() in ("1", "true", "yes", "on")
+# Allocation sites listed in the tracemalloc report.
+PROFILE_TOP_ALLOCATIONS = int(os.environ.get("PROFILE_TOP_ALLOCATIONS", 30))
+# Profiles older than this are deleted whenever a new one is written.
+PROFILE_RETENTION_SECONDS = int(os.environ.get("PROFILE_RETENTION_SECONDS", 7 * 24 * 3600))
+# During a run, allocations are snapshotted again each time the traced memory
+# grows by this factor past the last snapshot, so the report can show what
+# was allocated near the peak and not only what survived the run.
+PEAK_SNAPSHOT_GROWTH = 1.25
+# Frames kept per allocation; more frames make tracemalloc slower.
+_TRACEMALLOC_FRAMES = 5
+# How often the traced memory is checked for a new peak.
+_PEAK_POLL_SECONDS = 0.05
+_PROFILE_SUFFIXES = (".prof", ".allocations.txt")
+
+
+def profile_paths(name, profile_dir=PROFILE_DIR):
+    """The {"stats": .prof path, "allocations": .txt path} a profile named `name` is written to."""
+    return {"stats": os.path.join(profile_dir, f"{name}.prof"),
+            "allocations": os.path.join(profile_dir, f"{name}.allocations.txt")}
+
+
+def prune_profiles(profile_dir=PROFILE_DIR, older_than=PROFILE_RETENTION_SECONDS):
+    """Deletes the profile files in `profile_dir` last written more than `older_than` seconds ago; returns how many."""
+    cutoff = time.time() - older_than
+    removed = 0
+    try:
+        entries = list(os.scandir(profile_dir))
+    except OSError:
+        return 0
+    for entry in entries:
+        if not entry.name.endswith(_PROFILE_SUFFIXES):
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            pass  # removed by another worker in the meantime
+    return removed
+
+
+def _watch_peak(stop, largest, growth=PEAK_SNAPSHOT_GROWTH, interval=_PEAK_POLL_SECONDS):
+    # Runs on its own thread; tracemalloc traces every thread, so the
+    # snapshots see the profiled thread's allocations.
+    while not stop.wait(interval):
+        traced = tracemalloc.get_traced_memory()[0]
+        if traced > largest["traced"] * growth:
+            largest["snapshot"] = tracemalloc.take_snapshot()
+            largest["traced"] = traced
+
+
+def _top_sites(snapshot, top):
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    ))
+    lines = []
+    for stat in snapshot.statistics("lineno")[:top]:
+        frame = stat.traceback[0]
+        lines.append(f"{stat.size / 1024:10.1f} KiB {stat.count:8} blocks  {frame.filename}:{frame.lineno}")
+    return lines
+
+
+def _allocation_report(largest, end_snapshot, traced, peak, top):
+    lines = [f"Peak traced memory during the run: {peak / 1024:.1f} KiB; still allocated at the end: "
+             f"{traced / 1024:.1f} KiB", ""]
+    if largest["snapshot"] is not None:
+        lines += [f"Near the peak: top {top} allocation sites when {largest['traced'] / 1024:.1f} KiB were traced "
+                  f"(the largest snapshot taken during the run), by size:", ""]
+        lines += _top_sites(largest["snapshot"], top) + [""]
+    lines += [f"Surviving the run: top {top} allocation sites still holding memory at the end, by size:", ""]
+    lines += _top_sites(end_snapshot, top)
+    return "\n".join(lines) + "\n"
+
+
+@contextlib.contextmanager
+def profiled(name, profile_dir=PROFILE_DIR, top=PROFILE_TOP_ALLOCATIONS):
+    """
+    Runs the block under cProfile and tracemalloc and writes both results
+    to `profile_dir`: a .prof file (load it with pstats or snakeviz) and a
+    text report of the peak traced memory with the top allocation sites
+    near the peak (from snapshots a background thread takes as memory
+    grows) and at the end of the run. Profiles older than
+    PROFILE_RETENTION_SECONDS are deleted first. Yields the paths (see
+    profile_paths). Only the calling thread is profiled, so PDF pages
+    extracted on a process pool do not show up; workers set up with
+    subjects.init_worker extract in-process.
+    """
+    paths = profile_paths(name, profile_dir)
+    os.makedirs(profile_dir, exist_ok=True)
+    prune_profiles(profile_dir)
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(_TRACEMALLOC_FRAMES)
+    tracemalloc.reset_peak()
+    largest = {"snapshot": None, "traced": tracemalloc.get_traced_memory()[0]}
+    stop = threading.Event()
+    watcher = threading.Thread(target=_watch_peak, args=(stop, largest), daemon=True)
+    watcher.start()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield paths
+    finally:
+        profiler.disable()
+        stop.set()
+        watcher.join()
+        traced, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        if started_tracing:
+            tracemalloc.stop()
+        profiler.dump_stats(paths["stats"])
+        with open(paths["allocations"], "w", encoding="utf-8") as f:
+            f.write(_allocation_report(largest, snapshot, traced, peak, top))
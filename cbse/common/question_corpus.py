@@ -0,0 +1,229 @@
+import os
+import time
+import sqlite3
+import hashlib
+
+from cbse.common.near_duplicates import normalize_question_text
+from cbse.common.simhash import (
+    LONG_TEXT_FIELDS, SIMHASH_MAX_DISTANCE, block_keys, hamming_distance, long_text_simhash,
+    similarity_from_distance,
+)
+
+# Location of the persistent corpus; override with the QUESTION_CORPUS_DB env var.
+CORPUS_DB_PATH = os.environ.get("QUESTION_CORPUS_DB", "question_corpus.sqlite3")
+
+# SQLite caps the number of bound parameters per statement, so large uploads
+# are looked up in chunks.
+_LOOKUP_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id           INTEGER PRIMARY KEY,
+    upload_hash  TEXT NOT NULL,
+    source_file  TEXT,
+    subject      TEXT NOT NULL,
+    grade        TEXT,
+    chapter      TEXT,
+    question_num TEXT,
+    question     TEXT,
+    content_hash TEXT NOT NULL,
+    created_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_questions_content_hash ON questions (content_hash);
+CREATE INDEX IF NOT EXISTS idx_questions_upload_hash ON questions (upload_hash);
+
+-- SimHash fingerprints of long question texts, answers and solutions, and
+-- their permuted-table blocks (simhash.block_keys). The block keys depend on
+-- SIMHASH_MAX_DISTANCE; after changing it, delete these two tables' rows.
+CREATE TABLE IF NOT EXISTS long_texts (
+    id           INTEGER PRIMARY KEY,
+    upload_hash  TEXT NOT NULL,
+    source_file  TEXT,
+    subject      TEXT NOT NULL,
+    grade        TEXT,
+    chapter      TEXT,
+    question_num TEXT,
+    question     TEXT,
+    field        TEXT NOT NULL,
+    fingerprint  INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_long_texts_upload_hash ON long_texts (upload_hash);
+CREATE TABLE IF NOT EXISTS long_text_blocks (
+    block_key    INTEGER NOT NULL,
+    long_text_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_long_text_blocks_key ON long_text_blocks (block_key);
+CREATE INDEX IF NOT EXISTS idx_long_text_blocks_text ON long_text_blocks (long_text_id);
+"""
+
+
+def content_hash(text):
+    """SHA-256 of the normalised question text, or None for empty questions."""
+    norm = normalize_question_text(text)
+    if not norm:
+        return None
+    return hashlib.sha256(norm.encode("utf-8")).hexdigest()
+
+
+def upload_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _signed64(fingerprint):
+    # SQLite integers are signed 64-bit.
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+
+def long_text_fingerprints(item):
+    """(field, fingerprint) for every long text field of a question dict."""
+    fingerprints = []
+    for field in LONG_TEXT_FIELDS:
+        fingerprint = long_text_simhash(item.get(field))
+        if fingerprint is not None:
+            fingerprints.append((field, fingerprint))
+    return fingerprints
+
+
+class QuestionCorpus:
+    """
+    On-disk index of every question parsed from earlier uploads, so a new
+    upload can be checked for duplicates across files, chapters and subjects.
+    """
+
+    def __init__(self, db_path=CORPUS_DB_PATH):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def find_matches(self, questions, exclude_upload=None):
+        """
+        Looks up every question's content hash in the corpus, and its long
+        texts' SimHash fingerprints (for questions with no identical match).
+        Returns a list of dicts pairing each question of this upload with the
+        stored questions it duplicates: "matchedOn" is "question" (similarity
+        1.0) for identical question texts, otherwise the field whose long text
+        is near-identical. Rows stored from `exclude_upload` (the same file)
+        are ignored.
+        """
+        by_hash = {}
+        for item in questions:
+            h = content_hash(item.get("question", ""))
+            if h:
+                by_hash.setdefault(h, []).append(item)
+        matches, exact = [], set()
+        hashes = list(by_hash)
+        for start in range(0, len(hashes), _LOOKUP_CHUNK):
+            chunk = hashes[start:start + _LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            sql = (f"SELECT content_hash, subject, grade, chapter, source_file, question_num, question "
+                   f"FROM questions WHERE content_hash IN ({placeholders})")
+            params = list(chunk)
+            if exclude_upload:
+                sql += " AND upload_hash != ?"
+                params.append(exclude_upload)
+            for row in self.conn.execute(sql, params):
+                for item in by_hash[row["content_hash"]]:
+                    exact.add(id(item))
+                    matches.append({
+                        "questionNUM": item.get("questionNUM"),
+                        "question": item.get("question"),
+                        "matchedSubject": row["subject"],
+                        "matchedGrade": row["grade"],
+                        "matchedChapter": row["chapter"],
+                        "matchedFile": row["source_file"],
+                        "matchedQuestionNUM": row["question_num"],
+                        "matchedOn": "question",
+                        "similarity": 1.0,
+                    })
+        matches += self._find_long_text_matches([item for item in questions if id(item) not in exact], exclude_upload)
+        return matches
+
+    def _find_long_text_matches(self, questions, exclude_upload):
+        probes = {}  # block key -> [(item, field, fingerprint)]
+        for item in questions:
+            for field, fingerprint in long_text_fingerprints(item):
+                for key in block_keys(fingerprint):
+                    probes.setdefault(key, []).append((item, field, fingerprint))
+
+        matches, seen = [], set()
+        keys = list(probes)
+        for start in range(0, len(keys), _LOOKUP_CHUNK):
+            chunk = keys[start:start + _LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            sql = (f"SELECT b.block_key, t.id, t.subject, t.grade, t.chapter, t.source_file, t.question_num, "
+                   f"t.field, t.fingerprint FROM long_text_blocks b JOIN long_texts t ON t.id = b.long_text_id "
+                   f"WHERE b.block_key IN ({placeholders})")
+            params = list(chunk)
+            if exclude_upload:
+                sql += " AND t.upload_hash != ?"
+                params.append(exclude_upload)
+            for row in self.conn.execute(sql, params):
+                stored = row["fingerprint"] & ((1 << 64) - 1)
+                for item, field, fingerprint in probes[row["block_key"]]:
+                    # A pair agreeing on several blocks comes back once per block.
+                    if field != row["field"] or (id(item), field, row["id"]) in seen:
+                        continue
+                    seen.add((id(item), field, row["id"]))
+                    distance = hamming_distance(fingerprint, stored)
+                    if distance > SIMHASH_MAX_DISTANCE:
+                        continue
+                    matches.append({
+                        "questionNUM": item.get("questionNUM"),
+                        "question": item.get("question"),
+                        "matchedSubject": row["subject"],
+                        "matchedGrade": row["grade"],
+                        "matchedChapter": row["chapter"],
+                        "matchedFile": row["source_file"],
+                        "matchedQuestionNUM": row["question_num"],
+                        "matchedOn": field,
+                        "similarity": similarity_from_distance(distance),
+                    })
+        return matches
+
+    def add_questions(self, questions, subject, grade, chapter, upload, source_file=None):
+        """
+        Stores all questions of one upload, with the fingerprints of their long
+        texts, in a single transaction. Re-adding the same upload replaces its
+        earlier rows instead of duplicating them.
+        """
+        now = time.time()
+        rows = []
+        for item in questions:
+            h = content_hash(item.get("question", ""))
+            if not h:
+                continue
+            rows.append((upload, source_file, subject, grade, chapter,
+                         item.get("questionNUM"), item.get("question"), h, now))
+
+        with self.conn:
+            self.conn.execute("DELETE FROM questions WHERE upload_hash = ?", (upload,))
+            self.conn.executemany(
+                "INSERT INTO questions (upload_hash, source_file, subject, grade, chapter, "
+                "question_num, question, content_hash, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self.conn.execute("DELETE FROM long_text_blocks WHERE long_text_id IN "
+                              "(SELECT id FROM long_texts WHERE upload_hash = ?)", (upload,))
+            self.conn.execute("DELETE FROM long_texts WHERE upload_hash = ?", (upload,))
+            for item in questions:
+                for field, fingerprint in long_text_fingerprints(item):
+                    cur = self.conn.execute(
+                        "INSERT INTO long_texts (upload_hash, source_file, subject, grade, chapter, question_num, "
+                        "question, field, fingerprint) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (upload, source_file, subject, grade, chapter, item.get("questionNUM"), item.get("question"),
+                         field, _signed64(fingerprint)),
+                    )
+                    self.conn.executemany("INSERT INTO long_text_blocks (block_key, long_text_id) VALUES (?, ?)",
+                                          [(key, cur.lastrowid) for key in block_keys(fingerprint)])
+        return len(rows)
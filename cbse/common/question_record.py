@@ -0,0 +1,61 @@
+import sys
+from collections.abc import Mapping
+
+# The keys of a question, in the order every processor writes them. Each
+# question type uses a subsequence: MCQs have options and
+# correctOptionIndex, written answers an answerKeyword list, maths a
+# solution, Tamil a subchapter.
+QUESTION_FIELDS = ("questionNUM", "question", "questionType", "image", "options", "correctOptionIndex", "solution",
+                   "correctAnswer", "answerKeyword", "mark", "subchapter")
+# Fields holding one of a handful of values, shared by every question.
+_INTERNED_FIELDS = frozenset(("questionType", "subchapter"))
+
+
+class Question(Mapping):
+    """
+    One parsed question, kept from the processor through dedup, the corpus
+    and the reports: one slot per field instead of a dict's hash table, with
+    questionType and subchapter interned. It reads like the dict it replaces
+    (item["question"], item.get("options"), dict(item)), iterating its set
+    fields in QUESTION_FIELDS order whatever order the parse filled them in,
+    so serializing it needs no key-reordering pass. Fields never set are
+    absent, as they would be from the dict.
+    """
+
+    __slots__ = QUESTION_FIELDS
+
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            self[name] = value
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except (AttributeError, TypeError):
+            raise KeyError(name) from None
+
+    def __setitem__(self, name, value):
+        if name not in QUESTION_FIELDS:
+            raise KeyError(name)
+        if name in _INTERNED_FIELDS and isinstance(value, str):
+            value = sys.intern(value)
+        setattr(self, name, value)
+
+    def __iter__(self):
+        return (name for name in QUESTION_FIELDS if hasattr(self, name))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"Question({self.as_dict()!r})"
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in QUESTION_FIELDS if hasattr(self, name)}
+
+
+def json_default(obj):
+    """json.dump(..., default=json_default) writes a Question as its dict."""
+    if isinstance(obj, Question):
+        return obj.as_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
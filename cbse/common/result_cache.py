@@ -0,0 +1,118 @@
+import os
+import json
+import hashlib
+import tempfile
+
+from cbse.common.duplicate_report import REPORT_FORMAT
+from cbse.common.near_duplicates import (CHAR_SHINGLE_SIZE, DEDUP_MODE, NEAR_DUPLICATE_THRESHOLD, NUM_PERMUTATIONS,
+                                         SIGNATURE_MARGIN, WORD_SHINGLE_SIZE)
+from cbse.common.option_sets import OPTION_SET_MIN_QUESTION_OVERLAP, OPTION_SET_MIN_SHARED
+from cbse.common.question_record import json_default
+from cbse.common.simhash import LONG_TEXT_FIELDS, LONG_TEXT_MIN_WORDS, SIMHASH_MAX_DISTANCE
+
+# Bump whenever a processor's extraction, parsing or dedup rules change, so
+# results cached by an older version are never served for the same upload.
+PARSER_RULE_VERSION = "9"
+
+CACHE_DIR = os.environ.get("RESULT_CACHE_DIR", ".result_cache")
+CACHE_MAX_BYTES = int(os.environ.get("RESULT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+
+def result_settings(report_format=None):
+    """
+    Every setting other than the upload, the subject and the parser rule
+    version that changes what a run finds or writes, by name: the dedup
+    mode and its threshold, the MinHash, SimHash and option-set parameters
+    and the report format (REPORT_FORMAT unless `report_format` is given).
+    """
+    settings = {
+        "dedup_mode": DEDUP_MODE,
+        "near_duplicate_threshold": NEAR_DUPLICATE_THRESHOLD,
+        "num_permutations": NUM_PERMUTATIONS,
+        "signature_margin": SIGNATURE_MARGIN,
+        "char_shingle_size": CHAR_SHINGLE_SIZE,
+        "word_shingle_size": WORD_SHINGLE_SIZE,
+        "simhash_max_distance": SIMHASH_MAX_DISTANCE,
+        "long_text_min_words": LONG_TEXT_MIN_WORDS,
+        "long_text_fields": list(LONG_TEXT_FIELDS),
+        "option_set_min_shared": OPTION_SET_MIN_SHARED,
+        "option_set_min_question_overlap": OPTION_SET_MIN_QUESTION_OVERLAP,
+        "report_format": REPORT_FORMAT if report_format is None else report_format,
+    }
+    if DEDUP_MODE == "tfidf":
+        # Only read in tfidf mode: tfidf_similarity needs numpy and scipy.
+        from cbse.common.tfidf_similarity import TFIDF_COSINE_THRESHOLD
+        settings["tfidf_cosine_threshold"] = TFIDF_COSINE_THRESHOLD
+    return settings
+
+
+def cache_key(data: bytes, subject: str, rule_version: str = PARSER_RULE_VERSION) -> str:
+    """SHA-256 over the upload bytes, the subject, the parser rule version and result_settings()."""
+    h = hashlib.sha256(data)
+    h.update(b"\0" + subject.encode("utf-8") + b"\0" + rule_version.encode("utf-8"))
+    h.update(b"\0" + json.dumps(result_settings(), sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    Disk-backed cache of processing results (questions + duplicate records).
+    Entries are plain JSON files; a hit refreshes the file's mtime, and the
+    least recently used files are evicted once the directory grows past
+    `max_bytes`.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """Returns (questions, duplicates) for a cached key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return entry.get("questions"), entry.get("duplicates")
+
+    def put(self, key, questions, duplicates):
+        entry = {"questions": questions, "duplicates": duplicates}
+        # Write to a temp file first so readers never see a half-written entry.
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False, default=json_default)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import contextlib
+
+# Pipeline stages the processors time, in pipeline order:
+#   extract    reading the PDF pages / DOCX paragraphs
+#   clean      dropping noise lines and normalizing the text
+#   parse      splitting the text into question dicts
+#   dedup      duplicate detection
+#   serialize  writing the output files (only when an output folder is set)
+STAGES = ("extract", "clean", "parse", "dedup", "serialize")
+
+# Every run_processor call appends one JSON line to this file; override with
+# the METRICS_FILE env var, or set it to "" to turn the log off.
+METRICS_FILE = os.environ.get("METRICS_FILE", "processing_metrics.jsonl")
+
+_END = object()
+
+
+class RunMetrics:
+    """
+    Wall and CPU time per pipeline stage, plus counters, for one processor
+    run. CPU time is the running thread's (time.thread_time), so concurrent
+    sessions do not count each other's work. Everything is kept in plain
+    dicts so the metrics can come back from pool workers and be stored as JSON.
+
+    Counters used by the processors:
+      pages / paragraphs   input size
+      lines_in             lines that went into cleaning
+      lines_dropped        {rule: lines it dropped}
+      questions_by_type    {questionType: count}
+      questions, duplicates
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+        self.mark()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - wall, time.thread_time() - cpu)
+
+    def timed(self, iterable, name, counter=None):
+        """
+        Yields the items of `iterable`, timing each step as stage `name` and
+        counting the items under `counter`; for streaming readers whose
+        reading is interleaved with the loop that consumes them.
+        """
+        items = iter(iterable)
+        while True:
+            with self.stage(name):
+                item = next(items, _END)
+            if item is _END:
+                return
+            if counter:
+                self.count(counter)
+            yield item
+
+    def mark(self):
+        """Starts the clock for the next lap()."""
+        self._lap_wall, self._lap_cpu = time.perf_counter(), time.thread_time()
+        self._inner_wall = self._inner_cpu = 0.0
+
+    def lap(self, name):
+        """
+        Adds the time since the last lap() or mark() to stage `name`, for
+        pipelines written as one straight sequence of steps. Time recorded
+        with stage() or timed() in between stays with those stages.
+        """
+        wall = time.perf_counter() - self._lap_wall - self._inner_wall
+        cpu = time.thread_time() - self._lap_cpu - self._inner_cpu
+        self._add(name, wall, cpu)
+        self.mark()
+
+    def add_time(self, name, wall, cpu):
+        self._add(name, wall, cpu)
+        self._inner_wall += wall
+        self._inner_cpu += cpu
+
+    def _add(self, name, wall, cpu):
+        totals = self.stages.setdefault(name, {"wall": 0.0, "cpu": 0.0})
+        totals["wall"] += wall
+        totals["cpu"] += cpu
+
+    def count(self, name, n=1, key=None):
+        """Adds `n` to counter `name`, or to its `key` entry for per-rule and per-type breakdowns."""
+        if key is None:
+            self.counters[name] = self.counters.get(name, 0) + n
+        else:
+            by_key = self.counters.setdefault(name, {})
+            by_key[key] = by_key.get(key, 0) + n
+
+    def merge(self, other):
+        """Adds another run's as_dict() (e.g. a pool worker's) into this one."""
+        for name, totals in other["stages"].items():
+            self._add(name, totals["wall"], totals["cpu"])
+        for name, value in other["counters"].items():
+            if isinstance(value, dict):
+                for key, n in value.items():
+                    self.count(name, n, key)
+            else:
+                self.count(name, value)
+
+    def count_result(self, questions, duplicates):
+        for q in questions:
+            self.count("questions_by_type", key=str(q.get("questionType")))
+        self.count("questions", len(questions))
+        self.count("duplicates", len(duplicates))
+
+    def as_dict(self):
+        return {
+            "stages": {name: dict(totals) for name, totals in self.stages.items()},
+            "counters": {name: dict(value) if isinstance(value, dict) else value
+                         for name, value in self.counters.items()},
+        }
+
+    def attach(self, result):
+        """`result` (a ProcessorResult) with these metrics filled in."""
+        return result._replace(metrics=self.as_dict())
+
+
+def append_metrics(record, path=METRICS_FILE):
+    """
+    Appends `record` as one JSON line to the metrics file (a no-op if `path`
+    is empty). Each record is a single write to a file opened for appending,
+    so concurrent workers do not interleave their lines.
+    """
+    if not path:
+        return
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line)
@@ -0,0 +1,187 @@
+import string
+import hashlib
+import functools
+from collections import Counter, defaultdict
+
+from cbse.common.duplicate_report import duplicate_record
+
+# ---------- Configuration ----------
+SIMHASH_BITS = 64
+# Fingerprints at most this many bits apart are near-identical texts. A
+# fingerprint bit differs with probability angle/pi between the two texts'
+# word-count vectors, so 5 bits of 64 is roughly a cosine of 0.97: a few
+# words changed in a 100-word answer.
+SIMHASH_MAX_DISTANCE = 5
+# Only texts this long are fingerprinted. Word-bag fingerprints of short
+# texts flip too many bits per edited word; those are left to the shingle
+# check in near_duplicates.
+LONG_TEXT_MIN_WORDS = 30
+# Question fields compared as long texts, in the order pairs are reported.
+LONG_TEXT_FIELDS = ("question", "correctAnswer", "solution")
+
+# Stripped from both ends of every word; includes the Devanagari danda.
+_PUNCTUATION = string.punctuation + "।॥“”‘’"
+
+
+# ---------- Fingerprints ----------
+def text_words(text):
+    """Lowercased words with surrounding punctuation stripped."""
+    if not isinstance(text, str):
+        return []
+    words = (w.strip(_PUNCTUATION) for w in text.lower().split())
+    return [w for w in words if w]
+
+
+# Bit counters for all 64 fingerprint bits are kept in one integer, one
+# 32-bit lane per bit, so a word's contribution is a single big-int add.
+_LANE_BITS = 32
+_LANE_MASK = (1 << _LANE_BITS) - 1
+# _BYTE_LANES[position][value]: a 1 in the lane of every bit set in `value`
+# when it is the hash's byte at `position`.
+_BYTE_LANES = [[sum(1 << ((position * 8 + bit) * _LANE_BITS) for bit in range(8) if value >> bit & 1)
+                for value in range(256)] for position in range(SIMHASH_BITS // 8)]
+
+
+@functools.lru_cache(maxsize=65536)
+def _word_lanes(word):
+    # blake2b rather than hash() so fingerprints are stable across processes
+    # and can be stored in the corpus.
+    digest = hashlib.blake2b(word.encode("utf-8"), digest_size=SIMHASH_BITS // 8).digest()
+    lanes = 0
+    for position, value in enumerate(digest):
+        lanes |= _BYTE_LANES[position][value]
+    return lanes
+
+
+def simhash(words):
+    """
+    64-bit SimHash of a list of words, each weighted by its count: bit i is
+    set when the words whose hash has bit i set outweigh those that do not.
+    """
+    counts = Counter(words)
+    total = sum(counts.values())
+    lanes = 0
+    for word, weight in counts.items():
+        lanes += weight * _word_lanes(word)
+    fingerprint = 0
+    for bit in range(SIMHASH_BITS):
+        if 2 * ((lanes >> (bit * _LANE_BITS)) & _LANE_MASK) > total:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def long_text_simhash(text, min_words=LONG_TEXT_MIN_WORDS):
+    """The SimHash of `text`, or None if it has fewer than `min_words` words."""
+    words = text_words(text)
+    return simhash(words) if len(words) >= min_words else None
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+def similarity_from_distance(distance):
+    return round(1 - distance / SIMHASH_BITS, 4)
+
+
+def block_spans(blocks, bits=SIMHASH_BITS):
+    """(shift, mask) of each of `blocks` near-equal bit blocks covering the fingerprint."""
+    spans, shift = [], 0
+    for i in range(blocks):
+        width = bits // blocks + (1 if i < bits % blocks else 0)
+        spans.append((shift, (1 << width) - 1))
+        shift += width
+    return spans
+
+
+def block_keys(fingerprint, max_distance=SIMHASH_MAX_DISTANCE):
+    """
+    The fingerprint's blocks for a max_distance + 1 block split, tagged
+    with their block number in the bits above the block (blocks are at most
+    32 bits wide for max_distance >= 1, so the keys fit an SQLite integer).
+    Two fingerprints at most `max_distance` bits apart agree on at least one
+    whole block, so looking up every block finds all of them.
+    """
+    return [(i << 32) | ((fingerprint >> shift) & mask)
+            for i, (shift, mask) in enumerate(block_spans(max_distance + 1))]
+
+
+class SimHashIndex:
+    """
+    Permuted-table index over SimHash fingerprints: one table per block,
+    each keyed by that block's bits (the table a permutation moving the block
+    to the front would sort by). A query looks up its own blocks and checks
+    the Hamming distance of the few candidates, instead of scanning every
+    fingerprint.
+    """
+
+    def __init__(self, max_distance=SIMHASH_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.table = defaultdict(list)
+        self.fingerprints = {}
+
+    def query(self, fingerprint):
+        """(key, distance) of every inserted fingerprint within max_distance bits, by key."""
+        candidates = set()
+        for block_key in block_keys(fingerprint, self.max_distance):
+            candidates.update(self.table.get(block_key, ()))
+        found = []
+        for key in sorted(candidates):
+            distance = hamming_distance(fingerprint, self.fingerprints[key])
+            if distance <= self.max_distance:
+                found.append((key, distance))
+        return found
+
+    def insert(self, key, fingerprint):
+        self.fingerprints[key] = fingerprint
+        for block_key in block_keys(fingerprint, self.max_distance):
+            self.table[block_key].append(key)
+
+
+# ---------- Public API ----------
+def find_long_text_pairs(texts, max_distance=SIMHASH_MAX_DISTANCE, min_words=LONG_TEXT_MIN_WORDS):
+    """
+    Near-identical long texts, like near_duplicates.find_duplicate_pairs:
+    (original_index, duplicate_index, similarity) for every text of at least
+    `min_words` words whose fingerprint is within `max_distance` bits of an
+    earlier one, reported once against the earliest. Similarity is the
+    fraction of fingerprint bits the two agree on.
+    """
+    index = SimHashIndex(max_distance)
+    pairs = []
+    for idx, text in enumerate(texts):
+        fingerprint = long_text_simhash(text, min_words)
+        if fingerprint is None:
+            continue
+        matches = index.query(fingerprint)
+        if matches:
+            orig_idx, distance = matches[0]
+            pairs.append((orig_idx, idx, similarity_from_distance(distance)))
+        index.insert(idx, fingerprint)
+    return pairs
+
+
+def long_text_duplicates(questions, duplicates, fields=LONG_TEXT_FIELDS):
+    """
+    Duplicate records (numbered on from `duplicates`) for questions whose
+    long question text, answer or solution is a lightly edited copy of an
+    earlier question's, skipping pairs `duplicates` already reports (and
+    question texts it already reports as duplicates). The records carry the
+    field they matched on as "matchedOn", and the other fields that differ
+    as mismatches.
+    """
+    reported = {(record["original"], record["duplicate"]) for record in duplicates}
+    duplicate_questions = {record["duplicate"] for record in duplicates}
+    records = []
+    for field in fields:
+        texts = [item.get(field) for item in questions]
+        for orig_idx, dup_idx, similarity in find_long_text_pairs(texts):
+            if (orig_idx, dup_idx) in reported or (field == "question" and dup_idx in duplicate_questions):
+                continue
+            reported.add((orig_idx, dup_idx))
+            orig, item = questions[orig_idx], questions[dup_idx]
+            mismatches = [f"{other} mismatch" for other in ("question", "questionType", "correctAnswer", "solution")
+                          if other != field and str(item.get(other)) != str(orig.get(other))]
+            records.append(duplicate_record(len(duplicates) + len(records) + 1, orig_idx, dup_idx, questions,
+                                            similarity, mismatches, matched_on=field))
+    return records
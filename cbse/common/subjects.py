@@ -0,0 +1,91 @@
+import io
+import time
+import functools
+import importlib
+import contextlib
+
+from cbse.common.duplicate_report import DEFAULT_REPORT_STYLE
+from cbse.common.profiling import profiled
+from cbse.common.run_metrics import append_metrics
+
+# Central map to define how each subject should be processed, shared by the
+# app and scripts. "func" is a "module:function" import path; processor
+# modules (and PyMuPDF/python-docx behind them) are only imported when a
+# subject is first processed, so importing this map does not pay for all of
+# them. Every processor takes the uploaded bytes and returns a
+# ProcessorResult; output_folder=None keeps it from writing anything to disk.
+subject_processors = {
+    # Grades 6-10
+    "English": {"func": "cbse.six_to_ten_studies.english_main:process_english_pdf", "file_ext": "pdf"},
+    "Science": {"func": "cbse.six_to_ten_studies.science_main:process_science_pdf", "file_ext": "pdf"},
+    "Social_Science": {"func": "cbse.six_to_ten_studies.social_science_main:process_social_science_pdf", "file_ext": "pdf"},
+    "Maths": {"func": "cbse.six_to_ten_studies.maths_main:process_maths_pdf", "file_ext": "pdf"},
+    "Tamil": {"func": "cbse.six_to_ten_studies.tamil_main:process_tamil_pdf", "file_ext": "docx"},
+    "Hindi": {"func": "cbse.six_to_ten_studies.hindi_main:process_hindi_pdf", "file_ext": "docx"},
+    
+    # Aliases for Social Science point to the same processor
+    "History": {"func": "cbse.six_to_ten_studies.social_science_main:process_social_science_pdf", "file_ext": "pdf"},
+    "Political Science": {"func": "cbse.six_to_ten_studies.social_science_main:process_social_science_pdf", "file_ext": "pdf"},
+    "Geography": {"func": "cbse.six_to_ten_studies.social_science_main:process_social_science_pdf", "file_ext": "pdf"},
+
+    # Grades 11-12
+    "Biotechnology": {"func": "cbse.higher_studies.biotechnology_main:process_biotechnology_docx", "file_ext": "docx"},
+    "Commerce": {"func": "cbse.higher_studies.business_studies_main:process_business_studies_docx", "file_ext": "docx"},
+    "Chemistry": {"func": "cbse.higher_studies.chemistry_main:process_chemistry_docx", "file_ext": "docx"},
+    "Physics": {"func": "cbse.higher_studies.physics_main:process_physics_docx", "file_ext": "docx"},
+}
+
+
+@functools.lru_cache(maxsize=None)
+def load_processor(import_path):
+    """Imports and returns the function named by a "module:function" path, once per process."""
+    module_name, func_name = import_path.split(":")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def report_style(subject):
+    """The ReportStyle the subject's processor module lays its text report out with."""
+    module_name, _ = subject_processors[subject]["func"].split(":")
+    return getattr(importlib.import_module(module_name), "REPORT_STYLE", DEFAULT_REPORT_STYLE)
+
+
+def init_worker():
+    """
+    Initializer for process pools that run one file per worker: a nested page
+    pool for every large PDF would only oversubscribe the CPUs.
+    """
+    from cbse.common import pdf_extract
+    pdf_extract.PDF_EXTRACT_WORKERS = 1
+
+
+def run_processor(subject, data, source=None, profile_name=None):
+    """
+    Processes one file's bytes in memory with the subject's processor and
+    returns its ProcessorResult (or None). Module level so it can be sent to
+    pool workers; the processor's progress prints are discarded. Each run's
+    stage timings and counters are appended to the metrics file, with
+    `source` (e.g. the file name) to tell the runs apart.
+
+    With a `profile_name`, the processor runs under profiling.profiled and
+    the result's metrics get a "profile" entry with the written files' paths.
+    """
+    processor = load_processor(subject_processors[subject]["func"])
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if profile_name is None:
+            result = processor(data, output_folder=None)
+        else:
+            with profiled(profile_name) as profile:
+                result = processor(data, output_folder=None)
+            if result is not None and result.metrics is not None:
+                result.metrics["profile"] = profile
+    append_metrics({
+        "finished_at": time.time(),
+        "subject": subject,
+        "source": source,
+        "bytes": len(data),
+        "status": "done" if result is not None else "failed",
+        "seconds": time.perf_counter() - start,
+        **(result.metrics if result is not None and result.metrics else {}),
+    })
+    return result
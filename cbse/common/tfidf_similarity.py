@@ -0,0 +1,109 @@
+import numpy as np
+from scipy import sparse
+
+from cbse.common.near_duplicates import exact_duplicates, shingle_set
+
+# Minimum TF-IDF cosine similarity for two questions to be near-duplicates.
+# Cosine runs above the shingle Jaccard for the same pair (a question with
+# a word appended scores ~0.9 Jaccard, ~0.95 cosine), hence the higher bar.
+TFIDF_COSINE_THRESHOLD = 0.85
+# Questions per block of the all-pairs product: one block product holds at
+# most BLOCK_SIZE x BLOCK_SIZE similarities, however many questions there are.
+TFIDF_BLOCK_SIZE = 2048
+
+
+def split_exact_duplicates(texts, groups=None):
+    """
+    Exact-match pairs (against the first occurrence, similarity 1.0), plus
+    the indexes and shingle sets of the distinct non-empty texts left to
+    compare. With `groups` (see near_duplicates.exact_duplicates), exact
+    pairs are across groups only; the texts left to compare are the first
+    copy of each text in each group, and any copy without an exact match
+    in another group.
+    """
+    pairs, unique_idx, shingle_sets = [], [], []
+    for idx, orig, first in exact_duplicates(texts, groups):
+        if orig is not None:
+            pairs.append((orig, idx, 1.0))
+        if first or orig is None:
+            shingles = shingle_set(texts[idx])
+            if shingles:
+                unique_idx.append(idx)
+                shingle_sets.append(shingles)
+    return pairs, unique_idx, shingle_sets
+
+
+def tfidf_matrix(shingle_sets):
+    """
+    L2-normalized TF-IDF rows (CSR, one per shingle set). Shingles are
+    binary terms, weighted by smoothed IDF, log((1 + n) / (1 + df)) + 1.
+    """
+    columns = {}
+    indptr, indices = [0], []
+    for shingles in shingle_sets:
+        indices.extend(columns.setdefault(h, len(columns)) for h in shingles)
+        indptr.append(len(indices))
+    indices = np.asarray(indices, dtype=np.int64)
+    df = np.bincount(indices, minlength=len(columns))
+    idf = np.log((1 + len(shingle_sets)) / (1 + df)) + 1
+    matrix = sparse.csr_matrix((idf[indices], indices, np.asarray(indptr, dtype=np.int64)),
+                               shape=(len(shingle_sets), len(columns)))
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    return sparse.diags(1 / np.where(norms > 0, norms, 1)) @ matrix
+
+
+def earliest_similar(matrix, threshold, block_size=TFIDF_BLOCK_SIZE, groups=None):
+    """
+    For every row, the earliest earlier row with cosine similarity of at
+    least `threshold` and that similarity: two arrays, with -1 for rows that
+    have none. With `groups` (an array of one group number per row), only
+    rows of other groups count. Rows are compared block against block (only
+    blocks at or left of the diagonal) so memory stays bounded by the block size.
+    """
+    n = matrix.shape[0]
+    best_row = np.full(n, -1, dtype=np.int64)
+    best_similarity = np.zeros(n)
+    for r0 in range(0, n, block_size):
+        rows = matrix[r0:r0 + block_size]
+        # Column blocks in order, so the first hit found for a row is its earliest.
+        for c0 in range(0, r0 + 1, block_size):
+            product = (rows @ matrix[c0:c0 + block_size].T).tocoo()
+            dup = product.row + r0
+            orig = product.col + c0
+            keep = (product.data >= threshold) & (orig < dup) & (best_row[dup] < 0)
+            if groups is not None:
+                keep &= groups[orig] != groups[dup]
+            if not keep.any():
+                continue
+            dup, orig, similarity = dup[keep], orig[keep], product.data[keep]
+            order = np.lexsort((orig, dup))
+            dup, orig, similarity = dup[order], orig[order], similarity[order]
+            first = np.concatenate(([True], dup[1:] != dup[:-1]))
+            best_row[dup[first]] = orig[first]
+            best_similarity[dup[first]] = similarity[first]
+    return best_row, best_similarity
+
+
+def find_tfidf_pairs(texts, threshold=TFIDF_COSINE_THRESHOLD, block_size=TFIDF_BLOCK_SIZE, groups=None):
+    """
+    The precise counterpart of near_duplicates' LSH search, with the same
+    result: (original_index, duplicate_index, similarity) for every text
+    that duplicates an earlier one, against the earliest match (in another
+    group, with `groups`). Exact matches score 1.0; every other pair is
+    scored (no candidate sampling) by TF-IDF cosine over the same shingles,
+    and kept at `threshold` or above.
+    """
+    pairs, unique_idx, shingle_sets = split_exact_duplicates(texts, groups)
+    if shingle_sets:
+        row_groups = None if groups is None else np.asarray([groups[idx] for idx in unique_idx])
+        best_row, best_similarity = earliest_similar(tfidf_matrix(shingle_sets), threshold, block_size, row_groups)
+        # With groups, a first copy can also have an exact match in another group.
+        exact = {dup for _, dup, _ in pairs}
+        for row in np.flatnonzero(best_row >= 0):
+            if unique_idx[row] in exact:
+                continue
+            # Rounding can put a self-similar pair a hair over 1.0.
+            similarity = min(1.0, round(float(best_similarity[row]), 4))
+            pairs.append((unique_idx[best_row[row]], unique_idx[row], similarity))
+    pairs.sort(key=lambda pair: pair[1])
+    return pairs
@@ -1,76 +1,68 @@
 import re
-import json
 import os
-import shutil
 
-# --- python-docx imports (careful to avoid name collisions) ---
-from docx import Document as LoadDocument      # to open .docx
-from docx.document import Document as _Document  # internal docx type
-from docx.text.paragraph import Paragraph
-from docx.table import Table, _Cell
-
-
-def process_business_studies_docx(docx_path):
-    output_folder = "output_business_studies"
-    json_output_path = os.path.join(output_folder, "business_studies_questions.json")
-    duplicate_output_path = os.path.join(output_folder, "duplicate_output.txt")
-    txt_output_path = os.path.join(output_folder, os.path.basename(docx_path).replace(".docx", "_cleaned.txt"))
-
-    # --- Step 1: Clean/Create Output Directory ---
-    if os.path.exists(output_folder):
-        shutil.rmtree(output_folder)
-    os.makedirs(output_folder, exist_ok=True)
+from cbse.common.docx_stream import iter_paragraphs
+from cbse.common.duplicate_report import ReportStyle, duplicate_record
+from cbse.common.line_lexer import (
+    ANSWER, KEYWORDS, OPTION, QUESTION_START, LineLexer,
+    body_until_blank, index_of, option_texts, split_question_blocks,
+)
+from cbse.common.line_rules import LineRuleSet
+from cbse.common.near_duplicates import find_duplicate_pairs
+from cbse.common.option_sets import option_set_duplicates
+from cbse.common.processor_io import ProcessorResult, as_file, write_result
+from cbse.common.question_record import Question
+from cbse.common.run_metrics import RunMetrics
+from cbse.common.simhash import long_text_duplicates
+
+# Layout of this subject's text duplicate report.
+REPORT_STYLE = ReportStyle(summary="DUPLICATE : {duplicateNUM} is a duplicate of {originalNUM} - {mismatch_text}", indent=2)
+
+# --- Header/heading lines dropped by clean_extracted_text (compiled once at import) ---
+NOISE_LINE_RULES = LineRuleSet([
+    r"CBSE\s*[-–]\s*GRADE\s*[-–]?\s*11",
+    r"GRADE\s*[-–]?\s*12",
+    r"CHEMISTRY",
+    r"STRUCTURE\s+OF\s+ATOM",
+    r"^CHAPTER\s*[-–]?\s*\d+",
+    r"^\s*Answer\s+the\s+following",
+    r"Multiple\s+choice\s+questions",
+    r"^\d+$",
+    r"5\s*MARKS.*LONG\s*ANSWER",
+    r"4\s*MARKS.*QUESTIONS",
+    r"SHORT\s*ANSWER.*3\s*MARKS",
+    r"VERY\s*SHORT\s*ANSWER.*2\s*MARKS.*REAL\s*TIME\s*APPLICATIONS",
+], mode="search")
+
+# --- Line grammar for parse_questions_from_text ---
+LINE_LEXER = LineLexer([
+    (QUESTION_START, r"(\d{1,3})\s*[.)](?:\s+|$)"),
+    (ANSWER, r"(?i)\s*(?:Correct\s+)?Answer:\s*"),
+    (KEYWORDS, r"(?i)\s*Keywords:\s*"),
+    (OPTION, r"([A-D])\)\s*"),
+])
+
+
+def process_business_studies_docx(docx_source, output_folder="output_business_studies"):
+    """
+    Extracts questions from a .docx given as a path, bytes or binary file
+    object and returns a ProcessorResult. If output_folder is set, the JSON,
+    the duplicate report and the cleaned text are also written there.
+    """
+    if isinstance(docx_source, (str, os.PathLike)):
+        txt_filename = os.path.basename(docx_source).replace(".docx", "_cleaned.txt")
+    else:
+        txt_filename = "business_studies_cleaned.txt"
 
     # ---------- HELPERS: DOCX EXTRACTION & CLEANING ----------
-    def _iter_block_items(parent):
-        if isinstance(parent, _Document):
-            parent_elm = parent.element.body
-        elif isinstance(parent, _Cell):
-            parent_elm = parent._tc
-        elif isinstance(parent, Table):
-            for row in parent.rows:
-                for cell in row.cells:
-                    for item in _iter_block_items(cell):
-                        yield item
-            return
-        else:
-            return
-
-        for child in parent_elm.iterchildren():
-            if child.tag.endswith('}p'):
-                yield Paragraph(child, parent)
-            elif child.tag.endswith('}tbl'):
-                tbl = Table(child, parent)
-                for item in _iter_block_items(tbl):
-                    yield item
-
-    def _get_num_info(p):
-        try:
-            pPr = p._p.pPr
-            if pPr is None or pPr.numPr is None:
-                return None
-            numId_elm = pPr.numPr.numId
-            ilvl_elm = pPr.numPr.ilvl
-            numId = int(numId_elm.val) if numId_elm is not None and numId_elm.val is not None else None
-            ilvl = int(ilvl_elm.val) if ilvl_elm is not None and ilvl_elm.val is not None else 0
-            if numId is None:
-                return None
-            return (numId, ilvl)
-        except Exception:
-            return None
-
     def _extract_lines_with_numbering(doc_path):
-        doc = LoadDocument(doc_path)
         counters = {}
         lines = []
 
-        for item in _iter_block_items(doc):
-            if not isinstance(item, Paragraph):
-                continue
+        for item in iter_paragraphs(doc_path, include_tables=True):
             text = (item.text or "").strip()
-            num_info = _get_num_info(item)
-            if num_info:
-                numId, ilvl = num_info
+            if item.num_id is not None:
+                numId, ilvl = item.num_id, item.ilvl
                 if numId not in counters:
                     counters[numId] = {}
                 counters[numId][ilvl] = counters[numId].get(ilvl, 0) + 1
@@ -92,28 +84,19 @@ def process_business_studies_docx(docx_path):
                     collapsed.append("")
             else:
                 collapsed.append(ln)
+        metrics.count("paragraphs", len(lines))
         return "\n".join(collapsed)
 
     def clean_extracted_text(text):
         lines = text.splitlines()
+        metrics.count("lines_in", len(lines))
         cleaned_lines = []
         i = 0
 
         while i < len(lines):
             stripped_line = lines[i].strip()
 
-            if re.search(r"CBSE\s*[-–]\s*GRADE\s*[-–]?\s*11", stripped_line, re.IGNORECASE) or \
-               re.search(r"GRADE\s*[-–]\s*12", stripped_line, re.IGNORECASE) or \
-               re.search(r"CHEMISTRY", stripped_line, re.IGNORECASE) or \
-               re.search(r"STRUCTURE\s+OF\s+ATOM", stripped_line, re.IGNORECASE) or \
-               re.match(r"^CHAPTER\s*[-–]?\s*\d+", stripped_line, re.IGNORECASE) or \
-               re.match(r"^\s*Answer\s+the\s+following", stripped_line, re.IGNORECASE) or \
-               re.search(r"Multiple\s+choice\s+questions", stripped_line, re.IGNORECASE) or \
-               re.match(r"^\d+$", stripped_line) or \
-               re.search(r"5\s*MARKS.*LONG\s*ANSWER", stripped_line, re.IGNORECASE) or \
-               re.search(r"4\s*MARKS.*QUESTIONS", stripped_line, re.IGNORECASE) or \
-               re.search(r"SHORT\s*ANSWER.*3\s*MARKS", stripped_line, re.IGNORECASE) or \
-               re.search(r"VERY\s*SHORT\s*ANSWER.*2\s*MARKS.*REAL\s*TIME\s*APPLICATIONS", stripped_line, re.IGNORECASE):
+            if NOISE_LINE_RULES.should_remove(stripped_line, metrics):
                 i += 1
                 continue
 
@@ -123,6 +106,7 @@ def process_business_studies_docx(docx_path):
                     skip_count += 1
                 if i + 2 < len(lines) and re.search(r"CHAPTER", lines[i + 2], re.IGNORECASE):
                     skip_count += 1
+                metrics.count("lines_dropped", skip_count, key="BUSINESS STUDIES heading")
                 i += skip_count
                 continue
 
@@ -208,50 +192,46 @@ def process_business_studies_docx(docx_path):
     
     def parse_questions_from_text(content: str):
         content = clean_explanation_and_dashes(content)
-        question_blocks = re.split(r"(?m)^(?=\d{1,3}\s*[\.\)]\s+)", content)
         questions_json = []
 
-        for block in filter(None, (b.strip() for b in question_blocks)):
-            m = re.match(r"^(\d{1,3})\s*[\.\)]\s*(.*)", block, re.S)
-            if not m: continue
-            
-            qnum = int(m.group(1))
+        for block in split_question_blocks(LINE_LEXER.tokenize(content.split("\n"))):
+            qnum = block[0].value
             qtype, mark = get_type_and_mark(qnum)
             if not qtype: continue
 
             if qtype == "MCQ":
-                question_head = re.split(r"\n[A-D]\)", block)[0]
-                question_text = re.sub(r"^\d{1,3}\s*[\.\)]\s*|\s*\n\s*", " ", question_head).strip()
-                options = [re.sub(r"^[A-D]\)\s*", "", opt).strip() for opt in re.findall(r"^[A-D]\)\s*.*", block, re.M)]
-                ans_match = re.search(r"Answer:\s*((?:.|\n)*?)(?:\n\s*\n|$)", block, re.I)
-                clean_answer = ""
-                if ans_match:
-                    clean_answer = re.sub(r"^[A-D]\)\s*", "", ans_match.group(1).strip()).strip()
+                option_index = index_of(block, OPTION, 1)
+                question_head = [block[0].body] + [tok.text for tok in block[1:option_index]]
+                question_text = " ".join(line.strip() for line in question_head if line.strip())
+                options = option_texts(block)
+                answer_text = body_until_blank(block, index_of(block, ANSWER, 1)).strip()
+                clean_answer = re.sub(r"^[A-D]\)\s*", "", answer_text).strip() if answer_text else ""
                 
                 idx = None
                 if options and clean_answer:
                     norm_ans = normalize_text_for_match(clean_answer)
                     idx = next((i for i, opt in enumerate(options) if normalize_text_for_match(opt) == norm_ans), None)
 
-                data = {"questionNUM": f"docx_{qnum}", "question": question_text, "questionType": qtype, "image": None}
+                data = Question(questionNUM=f"docx_{qnum}", question=question_text, questionType=qtype, image=None)
                 if options: data["options"] = options
                 if idx is not None: data["correctOptionIndex"] = idx
                 if clean_answer: data["correctAnswer"] = clean_answer
                 data["mark"] = mark
             else:
-                lines = block.splitlines()
-                q_lines = [re.sub(r"^\d{1,3}\s*[\.\)]\s*", "", line).strip() for line in lines if not line.strip().startswith(("Answer:", "Keywords:"))]
-                question_text = " ".join(filter(None, q_lines))
+                question_end = index_of(block, (ANSWER, KEYWORDS), 1)
+                q_lines = [block[0].body] + [tok.text for tok in block[1:question_end]]
+                question_text = " ".join(filter(None, (line.strip() for line in q_lines)))
                 
-                ans_match = re.search(r"Answer:\s*((?:.|\n)*?)(?:Keywords:|\n\s*\n|$)", block, re.I)
-                correct_answer_text = ans_match.group(1).strip() if ans_match else ""
+                answer_index = index_of(block, ANSWER, 1)
+                answer_end = index_of(block, KEYWORDS, answer_index + 1) if answer_index is not None else None
+                correct_answer_text = body_until_blank(block, answer_index, answer_end).strip()
                 
-                kw_match = re.search(r"Keywords:\s*((?:.|\n)*?)(?:\n\s*\n|$)", block, re.I)
+                keywords_index = index_of(block, KEYWORDS, 1)
                 answer_keywords = []
-                if kw_match:
-                    answer_keywords = [t.strip() for t in re.split(r"[,\n]+", kw_match.group(1).strip()) if t.strip()]
+                if keywords_index is not None:
+                    answer_keywords = [t.strip() for t in re.split(r"[,\n]+", body_until_blank(block, keywords_index).strip()) if t.strip()]
 
-                data = {"questionNUM": f"docx_{qnum}", "question": question_text, "questionType": qtype, "image": None}
+                data = Question(questionNUM=f"docx_{qnum}", question=question_text, questionType=qtype, image=None)
                 if correct_answer_text: data["correctAnswer"] = correct_answer_text
                 if answer_keywords: data["answerKeyword"] = answer_keywords
                 data["mark"] = mark
@@ -259,45 +239,36 @@ def process_business_studies_docx(docx_path):
             questions_json.append(data)
         return questions_json
 
-    # --- Step 2: Extract and Clean Text from DOCX ---
+    # --- Step 1: Extract and Clean Text from DOCX ---
+    metrics = RunMetrics()
     try:
-        raw_text = _extract_lines_with_numbering(docx_path)
-        cleaned_text = clean_extracted_text(raw_text)
-        with open(txt_output_path, "w", encoding="utf-8") as f:
-            f.write(cleaned_text)
+        with metrics.stage("extract"):
+            raw_text = _extract_lines_with_numbering(as_file(docx_source))
+        with metrics.stage("clean"):
+            cleaned_text = clean_extracted_text(raw_text)
     except Exception as e:
         print(f"❌ Failed to extract content from DOCX: {e}")
         print("❌ Please check the file format and review the console logs for processing errors.")
-        return
+        return None
+    metrics.mark()
 
-    # --- Step 3: Parse Questions from Text ---
+    # --- Step 2: Parse Questions from Text ---
     ordered_questions = parse_questions_from_text(cleaned_text)
-    
-    # --- Step 4: Write JSON Output ---
-    with open(json_output_path, "w", encoding="utf-8") as f:
-        json.dump(ordered_questions, f, ensure_ascii=False, indent=4)
-    print(f"✅ Extracted and converted {len(ordered_questions)} questions -> {json_output_path}")
-
-    # --- Step 5: Duplicate Detection ---
-    def normalize_question_text(text):
-        return re.sub(r'\s+', '', text.lower()) if isinstance(text, str) else ""
+    metrics.lap("parse")
 
+    # --- Step 3: Duplicate Detection ---
     def count_option_mismatches(opt1, opt2):
         s1 = set(map(str, opt1)) if isinstance(opt1, list) else set()
         s2 = set(map(str, opt2)) if isinstance(opt2, list) else set()
         return len(s1.symmetric_difference(s2))
 
-    seen = {}
-    reports = []
+    duplicates = []
     dup_count = 0
 
-    for item in ordered_questions:
-        norm = normalize_question_text(item.get("question", ""))
-        if not norm: continue
-        
-        if norm in seen:
+    question_texts = [item.get("question", "") for item in ordered_questions]
+    for orig_idx, dup_idx, similarity in find_duplicate_pairs(question_texts):
             dup_count += 1
-            orig = seen[norm]
+            orig, item = ordered_questions[orig_idx], ordered_questions[dup_idx]
             mismatch = []
             if item.get("questionType") != orig.get("questionType"):
                 mismatch.append("questionType mismatch")
@@ -308,18 +279,22 @@ def process_business_studies_docx(docx_path):
                 if mismatches_count > 0:
                     mismatch.append(f"{mismatches_count} options mismatched")
             
-            summary = f"DUPLICATE : {item['questionNUM']} is a duplicate of {orig['questionNUM']} - {', '.join(mismatch) or 'all fields match'}"
-            reports.append(f"{summary}\n\nOriginal:\n{json.dumps(orig, indent=2)}\n\nDuplicate:\n{json.dumps(item, indent=2)}\n{'='*70}\n")
-        else:
-            seen[norm] = item
-
-    with open(duplicate_output_path, "w", encoding="utf-8") as f:
-        if reports:
-            f.write(f"Found {dup_count} duplicate entries.\n{'='*70}\n\n" + "\n".join(reports))
-        else:
-            f.write("No duplicates found.\n")
-
-    print(f"✅ Duplicate report saved to {duplicate_output_path} ({dup_count} duplicates found)")
+            duplicates.append(duplicate_record(dup_count, orig_idx, dup_idx, ordered_questions, similarity, mismatch))
+    duplicates += long_text_duplicates(ordered_questions, duplicates)
+    duplicates += option_set_duplicates(ordered_questions, duplicates)
+
+    metrics.lap("dedup")
+    metrics.count_result(ordered_questions, duplicates)
+    result = ProcessorResult(ordered_questions, duplicates)
+
+    # --- Step 4: Optional file output ---
+    if output_folder:
+        with metrics.stage("serialize"):
+            json_output_path, duplicate_output_path = write_result(result, output_folder, "business_studies_questions.json", style=REPORT_STYLE,
+                                                                   extra_files={txt_filename: cleaned_text})
+        print(f"✅ Extracted and converted {len(ordered_questions)} questions -> {json_output_path}")
+        print(f"✅ Duplicate report saved to {duplicate_output_path} ({dup_count} duplicates found)")
+    return metrics.attach(result)
 
 
 # --- Run ---
@@ -1,8 +1,20 @@
 import re
-import json
-import os
-import shutil
-from docx import Document
+
+from cbse.common.docx_stream import iter_paragraphs
+from cbse.common.duplicate_report import ReportStyle, duplicate_record
+from cbse.common.line_lexer import (
+    ANSWER, KEYWORDS, OPTION, QUESTION_START, LineLexer,
+    body_until_blank, index_of, join_body, option_texts, split_question_blocks, sub_block,
+)
+from cbse.common.near_duplicates import find_duplicate_pairs
+from cbse.common.option_sets import option_set_duplicates
+from cbse.common.processor_io import ProcessorResult, as_file, write_result
+from cbse.common.question_record import Question
+from cbse.common.run_metrics import RunMetrics
+from cbse.common.simhash import long_text_duplicates
+
+# Layout of this subject's text duplicate report.
+REPORT_STYLE = ReportStyle(summary="DUPLICATE : {duplicateNUM} is a duplicate of {originalNUM} - {mismatch_text}", indent=2)
 
 
 # ---------- helpers ----------
@@ -57,7 +69,7 @@ def process_block_for_explanation(block_lines, q_pattern):
     return block_lines
 
 
-def clean_text_lines(lines):
+def clean_text_lines(lines, metrics):
     cleaned = []
     normalized_targets = {
         "multiplechoicequestions",
@@ -66,12 +78,13 @@ def clean_text_lines(lines):
         "casestudyanswerindetail",
         "answerthefollowingquestionsbriefly",
     }
-    has_mcq_marker = any(norm_alnum(l.strip()) == "multiplechoicequestions" for l in lines)
-    skip_until_mcq = has_mcq_marker
+    mcq_markers = [i for i, l in enumerate(lines) if norm_alnum(l.strip()) == "multiplechoicequestions"]
+    skip_until_mcq = bool(mcq_markers)
 
-    for raw in lines:
+    for i, raw in enumerate(lines):
         line = raw.strip()
         if not line or line == "\x0c":
+            metrics.count("lines_dropped", key="blank line")
             continue
 
         nline = norm_alnum(line)
@@ -79,22 +92,35 @@ def clean_text_lines(lines):
         if skip_until_mcq:
             if nline == "multiplechoicequestions":
                 skip_until_mcq = False
+            metrics.count("lines_dropped", key="before MULTIPLE CHOICE QUESTIONS")
             continue
 
         if nline in normalized_targets:
+            metrics.count("lines_dropped", key="section heading")
             continue
         if all(w in nline for w in ("answer", "following", "questions")):
+            metrics.count("lines_dropped", key="instruction line")
             continue
         if re.match(r'^\s*CHAPTER\s*[-–—]?\s*\d+\b.*$', line, re.IGNORECASE):
+            metrics.count("lines_dropped", key="CHAPTER heading")
+            # Every chapter of a multi-chapter document has its own introduction up
+            # to its MULTIPLE CHOICE QUESTIONS marker; skip it like the first one's,
+            # unless a question comes before the marker.
+            marker = next((m for m in mcq_markers if m > i), None)
+            skip_until_mcq = marker is not None and not any(re.match(r'^\s*\d{1,3}[.)]', l) for l in lines[i + 1:marker])
             continue
         u = line.upper()
         if "CBSE" in u and "GRADE" in u:
+            metrics.count("lines_dropped", key="CBSE GRADE header")
             continue
         if line.upper() == "PHYSICS":
+            metrics.count("lines_dropped", key="subject name")
             continue
         if re.fullmatch(r'\d+', line):
+            metrics.count("lines_dropped", key="page number")
             continue
         if re.fullmatch(r'[A-Z]+', line):
+            metrics.count("lines_dropped", key="all-caps word")
             continue
 
         cleaned.append(line)
@@ -102,9 +128,10 @@ def clean_text_lines(lines):
 
 
 def format_into_clean_blocks(lines):
+    """Groups lines into question blocks (lists of lines), each starting at a question number."""
     dense_lines = [line for line in lines if line.strip()]
     if not dense_lines:
-        return ""
+        return []
 
     q_pattern = re.compile(r'^\s*(\d{1,3})[.)]\s*')
 
@@ -117,7 +144,7 @@ def format_into_clean_blocks(lines):
         if is_start and current_block_lines:
             processed = process_block_for_explanation(current_block_lines, q_pattern)
             if processed:
-                all_blocks.append("\n".join(processed))
+                all_blocks.append(processed)
             current_block_lines = []
 
         current_block_lines.append(line)
@@ -125,18 +152,21 @@ def format_into_clean_blocks(lines):
     if current_block_lines:
         processed = process_block_for_explanation(current_block_lines, q_pattern)
         if processed:
-            all_blocks.append("\n".join(processed))
+            all_blocks.append(processed)
 
-    separator = "\n" + "-" * 25 + "\n"
-    return separator.join(all_blocks)
+    return all_blocks
 
 
-def extract_text_from_docx(docx_path):
-    doc = Document(docx_path)
-    lines = [para.text for para in doc.paragraphs]
-    content_lines = clean_text_lines(lines)
-    final_text = format_into_clean_blocks(content_lines)
-    return final_text
+def extract_blocks_from_docx(docx_path, metrics):
+    with metrics.stage("extract"):
+        paragraphs = [para.text for para in iter_paragraphs(docx_path)]
+        # Soft line breaks (w:br) come through as "\n"; each is a line of its own.
+        lines = [line for text in paragraphs for line in text.split("\n")]
+    metrics.count("paragraphs", len(paragraphs))
+    metrics.count("lines_in", len(lines))
+    with metrics.stage("clean"):
+        content_lines = clean_text_lines(lines, metrics)
+        return format_into_clean_blocks(content_lines)
 
 
 def normalize_text(s: str) -> str:
@@ -158,54 +188,55 @@ def get_type_and_mark(qnum: int):
         return "General", 0
 
 
-def clean_explanation_and_dashes(text: str) -> str:
-    text = re.sub(r"Explanation\s*:.*?(?:-+\n)", "", text, flags=re.S | re.I)
-    text = re.sub(r"-{3,}", "", text)
-    return text.strip()
+SECTION_HEADING_RE = re.compile(
+    r"(VERY\s*SHORT\s*ANSWER.*?APPLICATIONS|SHORT\s*ANSWER.*?\d+\s*MARKS|LONG\s*ANSWER.*?\d+\s*MARKS)",
+    re.I | re.S,
+)
+SECTION_HEADING_MARKER_RE = re.compile(r"SHORT|LONG", re.I)
+EXPLANATION_RE = re.compile(r"Explanation\s*:.*?(?:-+\n|\Z)", re.I | re.S)
+EXPLANATION_MARKER_RE = re.compile(r"Explanation", re.I)
+DASH_RUN_RE = re.compile(r"-{3,}")
 
 
-def parse_questions_from_text(content: str):
-    content = re.sub(
-        r"(VERY\s*SHORT\s*ANSWER.*?APPLICATIONS|SHORT\s*ANSWER.*?\d+\s*MARKS|LONG\s*ANSWER.*?\d+\s*MARKS)",
-        "",
-        content,
-        flags=re.I | re.S,
-    )
-    content = clean_explanation_and_dashes(content)
-    question_blocks = re.split(r"(?m)^(?=\s*\(?\d{1,3}\s*[\.\)])", content)
+def clean_explanation_and_dashes(block):
+    """Drops "Explanation:" spans (up to a dashed line or the end of the block) and dash runs."""
+    block = sub_block(block, EXPLANATION_RE, EXPLANATION_MARKER_RE)
+    return [DASH_RUN_RE.sub("", line) for line in block]
 
-    questions_json = []
 
-    for block in question_blocks:
-        block = block.strip()
-        if not block:
-            continue
+# Line grammar for parse_questions_from_blocks. Answer lines are listed before
+# options so "Ans: B" is never read as option "A".
+LINE_LEXER = LineLexer([
+    (QUESTION_START, r"\s*\(?(\d{1,3})\s*[.)]\s*"),
+    (ANSWER, r"(?i)\s*(?:Correct Answer|Answer|Ans)\s*[:\-]\s*"),
+    (KEYWORDS, r"(?i)\s*Keywords\s*[:\-]\s*"),
+    (OPTION, r"\s*([A-Da-d])[).]\s*"),
+])
 
-        m = re.match(r"^\s*\(?(\d{1,3})\s*[\.\)]\s*(.*)", block, re.S)
-        if not m:
-            continue
-        qnum = int(m.group(1))
+
+def iter_question_tokens(blocks):
+    """Token blocks of each question, after headings, explanations and dashes are removed."""
+    for block in blocks:
+        block = sub_block(block, SECTION_HEADING_RE, SECTION_HEADING_MARKER_RE)
+        block = clean_explanation_and_dashes(block)
+        yield from split_question_blocks(LINE_LEXER.tokenize(block))
+
+
+def parse_questions_from_blocks(blocks):
+    questions_json = []
+
+    for block in iter_question_tokens(blocks):
+        qnum = block[0].value
         qtype, mark = get_type_and_mark(qnum)
 
         if qtype == "MCQ":
-            question_head = re.split(r"\n\s*[A-Da-d][\)\.]", block)[0]
-            question_text = re.sub(r"^\s*\(?\d{1,3}\s*[\.\)]\s*", "", question_head).strip()
-            question_text = re.sub(r"\s*\n\s*", " ", question_text)
-
-            options = []
-            options_block = re.findall(r"^[A-Da-d][\)\.]?\s*.*", block, re.M)
-            for opt in options_block:
-                if re.match(r"(?i)answer", opt):
-                    continue
-                opt_clean = re.sub(r"^[A-Da-d][\)\.]?\s*", "", opt).strip()
-                options.append(opt_clean)
-
-            ans_match = re.search(
-                r"(Answer|Ans|Correct Answer)\s*[:\-]\s*((?:.|\n)*?)(?:\n\s*\n|$)",
-                block,
-                re.I,
-            )
-            correct_answer_text = ans_match.group(2).strip() if ans_match else ""
+            option_index = index_of(block, OPTION, 1)
+            question_head = [block[0].body] + [tok.text for tok in block[1:option_index]]
+            question_text = " ".join(line.strip() for line in question_head if line.strip())
+
+            options = option_texts(block)
+
+            correct_answer_text = body_until_blank(block, index_of(block, ANSWER, 1)).strip()
             clean_answer = (
                 re.sub(r"^[A-Da-d][\)\.]?\s*", "", correct_answer_text).strip()
                 if correct_answer_text
@@ -220,12 +251,12 @@ def parse_questions_from_text(content: str):
                         idx = i
                         break
 
-            data = {
-                "questionNUM": f"docx_{qnum}",
-                "question": question_text,
-                "questionType": qtype,
-                "image": None,
-            }
+            data = Question(
+                questionNUM=f"docx_{qnum}",
+                question=question_text,
+                questionType=qtype,
+                image=None,
+            )
             if options:
                 data["options"] = options
             if idx is not None:
@@ -235,34 +266,27 @@ def parse_questions_from_text(content: str):
             data["mark"] = mark
 
         else:
-            question_lines = []
-            lines = block.splitlines()
-            for line in lines:
-                if re.match(r"(Answer|Ans|Keywords)\s*[:\-]", line, re.I):
-                    break
-                clean_line = re.sub(r"^\s*\(?\d{1,3}\s*[\.\)]\s*", "", line).strip()
-                if clean_line:
-                    question_lines.append(clean_line)
-            question_text = " ".join(question_lines)
-
-            ans_match = re.search(
-                r"(Answer|Ans)\s*[:\-]\s*((?:.|\n)*?)(?:Keywords|$)", block, re.I
-            )
-            correct_answer_text = ans_match.group(2).strip() if ans_match else ""
+            question_end = index_of(block, (ANSWER, KEYWORDS), 1)
+            question_lines = [block[0].body] + [tok.text for tok in block[1:question_end]]
+            question_text = " ".join(line.strip() for line in question_lines if line.strip())
+
+            answer_index = index_of(block, ANSWER, 1)
+            keywords_index = index_of(block, KEYWORDS, 1)
+            answer_end = index_of(block, KEYWORDS, answer_index + 1) if answer_index is not None else None
+            correct_answer_text = join_body(block, answer_index, answer_end).strip()
 
-            kw_match = re.search(r"Keywords\s*[:\-]\s*((?:.|\n)*?)$", block, re.I)
             answer_keywords = []
-            if kw_match:
-                kw_blob = kw_match.group(1).strip()
+            if keywords_index is not None:
+                kw_blob = join_body(block, keywords_index).strip()
                 raw = re.split(r"[,\n]+", kw_blob)
                 answer_keywords = [t.strip() for t in raw if t.strip()]
 
-            data = {
-                "questionNUM": f"docx_{qnum}",
-                "question": question_text,
-                "questionType": qtype,
-                "image": None,
-            }
+            data = Question(
+                questionNUM=f"docx_{qnum}",
+                question=question_text,
+                questionType=qtype,
+                image=None,
+            )
             if correct_answer_text:
                 data["correctAnswer"] = correct_answer_text
             if answer_keywords:
@@ -275,69 +299,61 @@ def parse_questions_from_text(content: str):
 
 
 # -------- Unified Single Function --------
-def process_chemistry_docx(docx_path):
-    # Step 1: Output folder setup
-    output_folder = "output_chemistry"
-    json_output_path = os.path.join(output_folder, "chemistry_questions.json")
-    duplicate_output_path = os.path.join(output_folder, "duplicate_output.txt")
-
-    if os.path.exists(output_folder):
-        shutil.rmtree(output_folder)
-    os.makedirs(output_folder, exist_ok=True)
-    print(f"Output directory '{output_folder}' has been created.")
-
-    # Step 2: Extract + Parse
-    text_content = extract_text_from_docx(docx_path)
-    ordered_questions = parse_questions_from_text(text_content)
-
-    # Step 3: Save JSON
-    with open(json_output_path, "w", encoding="utf-8") as f:
-        json.dump(ordered_questions, f, ensure_ascii=False, indent=4)
-    print(f"✅ Converted questions -> '{json_output_path}'")
-
-    # Step 4: Duplicate Detection
+def process_chemistry_docx(docx_source, output_folder="output_chemistry"):
+    """
+    Extracts questions from a .docx given as a path, bytes or binary file
+    object and returns a ProcessorResult. If output_folder is set, the JSON
+    and duplicate report are also written there.
+    """
+    # Step 1: Extract + Parse
+    metrics = RunMetrics()
+    blocks = extract_blocks_from_docx(as_file(docx_source), metrics)
+    metrics.mark()
+    ordered_questions = parse_questions_from_blocks(blocks)
+    metrics.lap("parse")
+
+    # Step 2: Duplicate Detection
     print("Running duplicate detection...")
-
-    def normalize_question_text(text):
-        return re.sub(r'\s+', '', text.lower()) if isinstance(text, str) else ""
-
     def count_option_mismatches(opt1, opt2):
         s1 = set(map(str, opt1)) if isinstance(opt1, list) else set()
         s2 = set(map(str, opt2)) if isinstance(opt2, list) else set()
         return len(s1.symmetric_difference(s2))
 
-    seen = {}
-    reports = []
+    duplicates = []
     dup_count = 0
 
-    for item in ordered_questions:
-        norm = normalize_question_text(item.get("question", ""))
-        if not norm:
-            continue
-        if norm in seen:
-            dup_count += 1
-            orig = seen[norm]
-            mismatch = []
-            if item.get("questionType") != orig.get("questionType"):
-                mismatch.append("questionType mismatch")
-            if str(item.get("correctAnswer")) != str(orig.get("correctAnswer")):
-                mismatch.append("correctAnswer mismatch")
-            if item.get("questionType", "").lower() == "mcq":
-                mismatches_count = count_option_mismatches(item.get('options'), orig.get('options'))
-                if mismatches_count > 0:
-                    mismatch.append(f"{mismatches_count} options mismatched")
-            summary = f"DUPLICATE : {item['questionNUM']} is a duplicate of {orig['questionNUM']} - {', '.join(mismatch) or 'all fields match'}"
-            reports.append(f"{summary}\n\nOriginal:\n{json.dumps(orig, indent=2)}\n\nDuplicate:\n{json.dumps(item, indent=2)}\n{'='*70}\n")
-        else:
-            seen[norm] = item
-
-    with open(duplicate_output_path, "w", encoding="utf-8") as f:
-        if reports:
-            f.write(f"Found {dup_count} duplicate entries.\n{'='*70}\n\n" + "\n".join(reports))
-            print(f"Duplicate detection complete. Found {dup_count} duplicates. Report saved to {duplicate_output_path}")
-        else:
-            f.write("No duplicates found.\n")
-            print(f"Duplicate detection complete. No duplicates found. Report saved to {duplicate_output_path}")
+    question_texts = [item.get("question", "") for item in ordered_questions]
+    for orig_idx, dup_idx, similarity in find_duplicate_pairs(question_texts):
+        dup_count += 1
+        orig, item = ordered_questions[orig_idx], ordered_questions[dup_idx]
+        mismatch = []
+        if item.get("questionType") != orig.get("questionType"):
+            mismatch.append("questionType mismatch")
+        if str(item.get("correctAnswer")) != str(orig.get("correctAnswer")):
+            mismatch.append("correctAnswer mismatch")
+        if item.get("questionType", "").lower() == "mcq":
+            mismatches_count = count_option_mismatches(item.get('options'), orig.get('options'))
+            if mismatches_count > 0:
+                mismatch.append(f"{mismatches_count} options mismatched")
+        duplicates.append(duplicate_record(dup_count, orig_idx, dup_idx, ordered_questions, similarity, mismatch))
+    duplicates += long_text_duplicates(ordered_questions, duplicates)
+    duplicates += option_set_duplicates(ordered_questions, duplicates)
+
+    if duplicates:
+        print(f"Duplicate detection complete. Found {len(duplicates)} duplicates.")
+    else:
+        print("Duplicate detection complete. No duplicates found.")
+    metrics.lap("dedup")
+    metrics.count_result(ordered_questions, duplicates)
+    result = ProcessorResult(ordered_questions, duplicates)
+
+    # Step 3: Optional file output
+    if output_folder:
+        with metrics.stage("serialize"):
+            json_output_path, duplicate_output_path = write_result(result, output_folder, "chemistry_questions.json", style=REPORT_STYLE)
+        print(f"✅ Converted questions -> '{json_output_path}'")
+        print(f"Report saved to {duplicate_output_path}")
+    return metrics.attach(result)
 
 
 # -------- Example Usage --------
@@ -1,45 +1,61 @@
-import docx
 import re
-import json
 import os
-import shutil
 
-def process_hindi_pdf(doc_path):
-    output_folder = "output_hindi"
-    json_output_path = os.path.join(output_folder, "hindi_questions.json")
-    duplicate_output_path = os.path.join(output_folder, "duplicate_output.txt")
-
-    # --- Step 1: Clean/Create Output Directory ---
-    if os.path.exists(output_folder):
-        shutil.rmtree(output_folder)
-    os.makedirs(output_folder, exist_ok=True)
-
-    # --- Step 2: Extract and Structure Questions ---
+from cbse.common.docx_stream import iter_paragraphs
+from cbse.common.duplicate_report import duplicate_record
+from cbse.common.line_lexer import QUESTION_START, SEPARATOR, LineLexer, split_question_blocks
+from cbse.common.line_rules import KeywordCountRule, LineRuleSet
+from cbse.common.near_duplicates import find_duplicate_pairs
+from cbse.common.option_sets import option_set_duplicates
+from cbse.common.processor_io import ProcessorResult, as_file, write_result
+from cbse.common.question_record import Question
+from cbse.common.run_metrics import RunMetrics
+from cbse.common.simhash import long_text_duplicates
+
+# --- Line cleaning rules (compiled once at import) ---
+REMOVE_PATTERNS = [
+    r"(?i)^CBSE\s*[-–]?\s*GRADE\s*[-–]?\s*\d+\s*$",      # CBSE - GRADE – 6
+    r"(?i)^GRADE\s*[-–]?\s*\d+\s*$",                      # GRADE – 6 or GRADE 6
+    r"(?i)^CBSE\s*$",                                    # CBSE
+    r"(?i)^हिंदी\s*$",                                    # हिंदी (Hindi)
+    r"(?i)^इकाई\s*[-–]?\s*\d+.*$",                        # इकाई – 4 (Unit – 4)
+    r"(?i)^अध्याय\s*[-–]?\s*\d+.*$",                      # अध्याय – 3 (Chapter – 3)
+    r"^\d{1,3}\s*$",                                     # Just a number like 1, 23, 100
+    r"^\s*$",                                            # Blank lines
+    r"^---\s*Page\s*\d+\s*---$",                          # --- Page 5 ---
+    r"^(?=.*\bCBSE\b)(?=.*\bGRADE\b)[A-Z\s\-–0-9]*$",      # Line has both CBSE and GRADE in uppercase
+    KeywordCountRule(["उत्तर", "निम्नलिखित", "प्रश्नों", "संक्षेप में", "संक्षिप्त"])  # Hindi equivalent of answer-related terms
+]
+REMOVE_RULES = LineRuleSet(REMOVE_PATTERNS)
+
+# --- Line tokens consumed by parse_questions_by_number ---
+LINE_LEXER = LineLexer([
+    (SEPARATOR, r"-{3,}$"),
+    (QUESTION_START, r"(\d+)[.)]\s*"),
+])
+
+
+def process_hindi_pdf(doc_source, output_folder="output_hindi"):
+    """
+    Extracts questions from a Word document given as a path, bytes or binary
+    file object and returns a ProcessorResult, or None if the document cannot
+    be opened. If output_folder is set, the JSON and duplicate report are
+    also written there.
+    """
+    # --- Step 1: Extract and Structure Questions ---
+    metrics = RunMetrics()
     try:
-        doc = docx.Document(doc_path)
+        with metrics.stage("extract"):
+            paragraphs = iter_paragraphs(as_file(doc_source))
     except Exception as e:
         print(f"❌ Error opening Word document: {e}")
-        return
-
-    remove_patterns = [
-        r"(?i)^CBSE\s*[-–]?\s*GRADE\s*[-–]?\s*\d+\s*$",      # CBSE - GRADE – 6
-        r"(?i)^GRADE\s*[-–]?\s*\d+\s*$",                      # GRADE – 6 or GRADE 6
-        r"(?i)^CBSE\s*$",                                    # CBSE
-        r"(?i)^हिंदी\s*$",                                    # हिंदी (Hindi)
-        r"(?i)^इकाई\s*[-–]?\s*\d+.*$",                        # इकाई – 4 (Unit – 4)
-        r"(?i)^अध्याय\s*[-–]?\s*\d+.*$",                      # अध्याय – 3 (Chapter – 3)
-        r"^\d{1,3}\s*$",                                     # Just a number like 1, 23, 100
-        r"^\s*$",                                            # Blank lines
-        r"^---\s*Page\s*\d+\s*---$",                          # --- Page 5 ---
-        r"^(?=.*\bCBSE\b)(?=.*\bGRADE\b)[A-Z\s\-–0-9]*$",      # Line has both CBSE and GRADE in uppercase
-        r"(?i)^(?=(?:.*\b(उत्तर|निम्नलिखित|प्रश्नों|संक्षेप में|संक्षिप्त)\b.*?){3,}).*$"  # Hindi equivalent of answer-related terms
-    ]
-    compiled_remove_patterns = [re.compile(pat, re.IGNORECASE) for pat in remove_patterns]
+        return None
+    metrics.mark()
 
     main_question_pattern = re.compile(r"^(\d{1,3})[).]", re.IGNORECASE)
     
     def should_remove_line(line):
-        return any(pat.match(line.strip()) for pat in compiled_remove_patterns)
+        return REMOVE_RULES.should_remove(line.strip(), metrics)
 
     def process_answer_line(line):
         stripped = line.strip()
@@ -61,8 +77,9 @@ def process_hindi_pdf(doc_path):
 
     all_lines = []
 
-    for para in doc.paragraphs:
+    for para in metrics.timed(paragraphs, "extract", "paragraphs"):
         lines = para.text.split("\n")
+        metrics.count("lines_in", len(lines))
         cleaned_on_page = []
         for line in lines:
             line_stripped = line.strip()
@@ -93,21 +110,13 @@ def process_hindi_pdf(doc_path):
             processed_final_lines.append(line)
 
     lines_for_json = [line for line in processed_final_lines if line.strip()]
+    metrics.lap("clean")
 
     def parse_questions_by_number(all_lines):
         questions = []
-        i = 0
-        numbered_q_pattern = re.compile(r"^(\d+)[.)]\s*(.*)")
-        separator_pattern = re.compile(r"^[-]{3,}$")
-        
-        while i < len(all_lines):
-            line = all_lines[i].strip()
-            match = numbered_q_pattern.match(line)
-            if not match:
-                i += 1
-                continue
 
-            current_q_num = int(match.group(1))
+        for block in split_question_blocks(LINE_LEXER.tokenize(all_lines)):
+            current_q_num = block[0].value
             qtype = ""
             if 1 <= current_q_num <= 150:
                 qtype = "बहुविकल्पीय प्रश्न"  # MCQ
@@ -116,41 +125,16 @@ def process_hindi_pdf(doc_path):
             elif 186 <= current_q_num <= 200:
                 qtype = "निम्नलिखित प्रश्नों के उत्तर लिखिए"  # Long Answer
             else:
-                i += 1
                 continue
             
-            q_lines, answer_lines_raw = [], []
-            
-            # --- Gather all lines for the question block ---
-            start_of_question_index = i
-            while i < len(all_lines) and not separator_pattern.match(all_lines[i]):
-                current_line = all_lines[i].strip()
-                if i > start_of_question_index and numbered_q_pattern.match(current_line):
-                    break
-                q_lines.append(current_line)
-                i += 1
-            
-            # --- Skip separator ---
-            if i < len(all_lines) and separator_pattern.match(all_lines[i]):
-                i += 1
-
-            # --- Gather all lines for the answer block ---
-            while i < len(all_lines):
-                current_line = all_lines[i].strip()
-                if numbered_q_pattern.match(current_line):
-                    break
-                answer_lines_raw.append(current_line)
-                i += 1
-
-            question_text_raw = " ".join(q_lines)
-            question_text_raw = re.sub(r"^\d+[.)]\s*", "", question_text_raw, count=1).strip()
-            
-            question_obj = {
-                "questionNUM": f"doc_{current_q_num}",
-                "questionType": qtype,
-                "image": None,
-            }
+            # --- Question lines run up to the separator; everything after it is the answer ---
+            separator_index = next((i for i, tok in enumerate(block) if tok.kind == SEPARATOR), len(block))
+            q_lines = [block[0].body] + [tok.text for tok in block[1:separator_index]]
+            answer_lines_raw = [tok.text for tok in block[separator_index + 1:]]
 
+            question_text_raw = " ".join(q_lines).strip()
+
+            # A Question lists its fields in output order whatever order each branch sets them in.
             if qtype == "बहुविकल्पीय प्रश्न":
                 option_split_pattern = re.compile(r'\s+([क-घA-D][.)])\s*')
                 parts = option_split_pattern.split(question_text_raw)
@@ -158,10 +142,6 @@ def process_hindi_pdf(doc_path):
                 question_text = parts[0].strip()
                 options = [p.strip() for p in parts[2::2] if p.strip()]
 
-                question_obj["question"] = question_text
-                question_obj["options"] = options
-                question_obj["mark"] = 1
-                
                 full_answer_block = "\n".join(answer_lines_raw)
 
                 # This version of the answer still has the option marker, e.g., "(C) राणा के आदेशों का पालन"
@@ -171,9 +151,6 @@ def process_hindi_pdf(doc_path):
                 # This version removes the marker, e.g., "राणा के आदेशों का पालन".
                 # This is the desired format for the "correctAnswer" field.
                 answer_without_marker = re.sub(r"^\s*\(?[क-घA-D]\)?\s*[.)]?\s*", "", answer_with_marker, flags=re.IGNORECASE).strip()
-                
-                # Assign the clean text (without the marker) to the correctAnswer field
-                question_obj["correctAnswer"] = answer_without_marker
 
                 correct_option_index = None
                 # First, try to find the index by matching the clean answer text exactly with one of the options.
@@ -200,17 +177,20 @@ def process_hindi_pdf(doc_path):
                         idx = hindi_map.get(letter) or eng_map.get(letter.upper())
                         if idx is not None and 0 <= idx < len(options):
                             correct_option_index = idx
-                
-                question_obj["correctOptionIndex"] = correct_option_index
+
+                question_obj = Question(
+                    questionNUM=f"doc_{current_q_num}",
+                    question=question_text,
+                    questionType=qtype,
+                    image=None,
+                    options=options,
+                    correctOptionIndex=correct_option_index,
+                    # The clean text (without the marker)
+                    correctAnswer=answer_without_marker,
+                    mark=1,
+                )
                 
             else: # "निम्नलिखित प्रश्नों के उत्तर लिखिए"
-                question_obj["question"] = question_text_raw
-                
-                if 151 <= current_q_num <= 185:
-                    question_obj["mark"] = 2
-                elif 186 <= current_q_num <= 200:
-                    question_obj["mark"] = 5
-
                 full_answer_text = "\n".join(answer_lines_raw)
                 full_answer_text = re.sub(r"^(?:उत्तर:|Answer:)\s*", "", full_answer_text.strip(), flags=re.IGNORECASE)
                 
@@ -226,90 +206,61 @@ def process_hindi_pdf(doc_path):
                 else:  # No keyword marker found
                     final_answer = full_answer_text.strip()
                     keywords = []
-                
-                question_obj["correctAnswer"] = final_answer
-                question_obj["answerKeyword"] = keywords
+
+                question_obj = Question(
+                    questionNUM=f"doc_{current_q_num}",
+                    question=question_text_raw,
+                    questionType=qtype,
+                    image=None,
+                    correctAnswer=final_answer,
+                    answerKeyword=keywords,
+                )
+                if 151 <= current_q_num <= 185:
+                    question_obj["mark"] = 2
+                elif 186 <= current_q_num <= 200:
+                    question_obj["mark"] = 5
             
             questions.append(question_obj)
 
         return questions
 
-    all_questions = parse_questions_by_number(lines_for_json)
-    
-    # --- Reorder dictionary keys for consistent JSON output ---
-    ordered_questions = []
-    for q in all_questions:
-        q_type = q.get("questionType")
-        
-        if q_type == "बहुविकल्पीय प्रश्न":
-            ordered_q = {
-                "questionNUM": q.get("questionNUM"),
-                "question": q.get("question"),
-                "questionType": q_type,
-                "image": q.get("image"),
-                "options": q.get("options"),
-                "correctOptionIndex": q.get("correctOptionIndex"),
-                "correctAnswer": q.get("correctAnswer"),
-                "mark": q.get("mark")
-            }
-        elif q_type == "निम्नलिखित प्रश्नों के उत्तर लिखिए":
-            ordered_q = {
-                "questionNUM": q.get("questionNUM"),
-                "question": q.get("question"),
-                "questionType": q_type,
-                "image": q.get("image"),
-                "correctAnswer": q.get("correctAnswer"),
-                "answerKeyword": q.get("answerKeyword"),
-                "mark": q.get("mark")
-            }
-        else:
-            ordered_q = q
-
-        ordered_questions.append(ordered_q)
-
-    # --- Save JSON output ---
-    with open(json_output_path, "w", encoding="utf-8") as f:
-        json.dump(ordered_questions, f, indent=4, ensure_ascii=False)
-
-    # --- Step 3: Duplicate Detection ---
-    def normalize_question_text(text):
-        return re.sub(r'\s+', '', text.lower()) if isinstance(text, str) else ""
+    ordered_questions = parse_questions_by_number(lines_for_json)
+    metrics.lap("parse")
 
+    # --- Step 2: Duplicate Detection ---
     def count_option_mismatches(opt1, opt2):
         s1 = set(map(str, opt1)) if isinstance(opt1, list) else set()
         s2 = set(map(str, opt2)) if isinstance(opt2, list) else set()
         return len(s1.symmetric_difference(s2))
 
-    seen = {}
-    reports = []
+    duplicates = []
     dup_count = 0
-    for item in ordered_questions:
-        norm = normalize_question_text(item.get("question", ""))
-        if not norm:
-            continue
-        if norm in seen:
-            dup_count += 1
-            orig = seen[norm]
-            mismatch = []
-            if item.get("questionType") != orig.get("questionType"):
-                mismatch.append("questionType mismatch")
-            if str(item.get("correctAnswer")) != str(orig.get("correctAnswer")):
-                mismatch.append("correctAnswer mismatch")
-            if item.get("questionType", "") == "बहुविकल्पीय प्रश्न":
-                mismatch.append(f"{count_option_mismatches(item.get('options'), orig.get('options'))} options mismatched")
-            summary = f"DUPLICATE : {item['questionNUM']} duplicates {orig['questionNUM']} - {', '.join(mismatch) or 'all fields match'}"
-            reports.append(f"{summary}\n\nOriginal:\n{json.dumps(orig, indent=4, ensure_ascii=False)}\n\nDuplicate:\n{json.dumps(item, indent=4, ensure_ascii=False)}\n{'='*70}\n")
-        else:
-            seen[norm] = item
-
-    with open(duplicate_output_path, "w", encoding="utf-8") as f:
-        if reports:
-            f.write(f"Found {dup_count} duplicate entries.\n{'='*70}\n\n" + "\n".join(reports))
-        else:
-            f.write("No duplicates found.\n")
-
-    print(f"✅ Extracted {len(ordered_questions)} questions to {json_output_path}")
-    print(f"✅ Duplicate report saved to {duplicate_output_path}")
+    question_texts = [item.get("question", "") for item in ordered_questions]
+    for orig_idx, dup_idx, similarity in find_duplicate_pairs(question_texts):
+        dup_count += 1
+        orig, item = ordered_questions[orig_idx], ordered_questions[dup_idx]
+        mismatch = []
+        if item.get("questionType") != orig.get("questionType"):
+            mismatch.append("questionType mismatch")
+        if str(item.get("correctAnswer")) != str(orig.get("correctAnswer")):
+            mismatch.append("correctAnswer mismatch")
+        if item.get("questionType", "") == "बहुविकल्पीय प्रश्न":
+            mismatch.append(f"{count_option_mismatches(item.get('options'), orig.get('options'))} options mismatched")
+        duplicates.append(duplicate_record(dup_count, orig_idx, dup_idx, ordered_questions, similarity, mismatch))
+    duplicates += long_text_duplicates(ordered_questions, duplicates)
+    duplicates += option_set_duplicates(ordered_questions, duplicates)
+
+    metrics.lap("dedup")
+    metrics.count_result(ordered_questions, duplicates)
+    result = ProcessorResult(ordered_questions, duplicates)
+
+    # --- Step 3: Optional file output ---
+    if output_folder:
+        with metrics.stage("serialize"):
+            json_output_path, duplicate_output_path = write_result(result, output_folder, "hindi_questions.json")
+        print(f"✅ Extracted {len(ordered_questions)} questions to {json_output_path}")
+        print(f"✅ Duplicate report saved to {duplicate_output_path}")
+    return metrics.attach(result)
 
 # --- Run ---
 if __name__ == "__main__":
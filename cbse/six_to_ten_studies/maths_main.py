@@ -1,51 +1,51 @@
-import fitz  # PyMuPDF
 import re    # Regular expression module
-import json  # JSON module for output
 import os    # For path and directory operations
-import shutil # For removing directory trees
 
-def process_maths_pdf(pdf_path):
+from cbse.common.duplicate_report import ReportStyle, duplicate_record
+from cbse.common.line_lexer import (
+    ANSWER, EXPLANATION, KEYWORDS, OPTION, QUESTION_START, LineLexer, index_of, join_body, split_question_blocks,
+)
+from cbse.common.line_rules import LineRuleSet
+from cbse.common.near_duplicates import find_duplicate_pairs
+from cbse.common.option_sets import option_set_duplicates
+from cbse.common.pdf_extract import read_pdf_pages
+from cbse.common.processor_io import ProcessorResult, read_source, write_result
+from cbse.common.question_record import Question
+from cbse.common.run_metrics import RunMetrics
+from cbse.common.simhash import long_text_duplicates
+
+# Layout of this subject's text duplicate report.
+REPORT_STYLE = ReportStyle(summary="DUPLICATE {pair}: {duplicateNUM} duplicates {originalNUM} - {mismatch_text}")
+
+# --- Header lines dropped before parsing (compiled once at import) ---
+NOISE_LINE_RULES = LineRuleSet([
+    r'^(?=.*CBSE).*GRADE',   # a line mentioning both CBSE and GRADE
+    r'Chapter\s*\d{1,2}',
+    r'Mathematics',
+], mode="search")
+
+# --- Line tokens consumed by parse_questions_to_json_structure ---
+SOLUTION = "SOLUTION"  # worked solution shown before the answer of short/long questions
+LINE_LEXER = LineLexer([
+    (QUESTION_START, r"\s*(\d{1,3})\s*\.\s*"),
+    (EXPLANATION, r"Explanation:"),
+    (ANSWER, r"(?i)Answer:\s*"),
+    (KEYWORDS, r"(?i)Keywords:\s*"),
+    (SOLUTION, r"(?i)Solution:\s*"),
+    (OPTION, r"([A-D])\)\s*"),
+])
+
+def process_maths_pdf(pdf_source, output_folder="output_maths"):
     """
-    Processes a mathematics PDF to extract questions into a structured JSON file
-    and generate a report on any duplicate questions found.
+    Processes a mathematics PDF (a path, bytes or binary file object) to
+    extract its questions and generate a report on any duplicate questions
+    found, returned together as a ProcessorResult.
 
-    The entire process is self-contained, creating an 'output_maths' folder
-    for the final files.
+    If output_folder is set, maths_questions.json and duplicate_output.txt are
+    also written there; pass None to keep the results in memory only.
     """
-    # --- 1. Setup Output Directory ---
-    output_folder = "output_maths"
-    json_output_path = os.path.join(output_folder, "maths_questions.json")
-    duplicate_output_path = os.path.join(output_folder, "duplicate_output.txt")
-
-    if os.path.exists(output_folder):
-        shutil.rmtree(output_folder)
-    os.makedirs(output_folder, exist_ok=True)
-    
-    # --- 2. Nested Helper Functions for PDF Parsing and Cleaning ---
+    # --- 1. Nested Helper Functions for PDF Parsing and Cleaning ---
     
-    def remove_explanations_from_questions(lines):
-        final_lines = []
-        skip_mode = False
-        next_question_pattern = None
-        for i, line in enumerate(lines):
-            line_stripped = line.strip()
-            if skip_mode:
-                if next_question_pattern and re.match(next_question_pattern, line_stripped):
-                    skip_mode = False
-                    final_lines.append(line)
-                continue
-            if line_stripped.startswith("Explanation:"):
-                skip_mode = True
-                for offset in range(i + 1, len(lines)):
-                    match = re.match(r'^(\d{1,3})\s*\.', lines[offset].strip())
-                    if match:
-                        next_q_num = int(match.group(1))
-                        next_question_pattern = rf'^{next_q_num}\s*\.'
-                        break
-                continue
-            final_lines.append(line)
-        return final_lines
-
     # This function is no longer called, as keywords are now parsed.
     # It is kept here to minimize structural changes to the original file.
     def remove_keywords_from_questions(lines):
@@ -79,45 +79,37 @@ def process_maths_pdf(pdf_path):
 
     def parse_questions_to_json_structure(lines):
         all_questions_data = []
-        full_text = "\n".join(lines)
         parsed_question_numbers = set()
-        question_blocks = re.split(r'\n(?=\s*\d{1,3}\s*\.)', full_text)
 
-        for block in question_blocks:
-            block = block.strip()
-            if not block: continue
-            
-            q_num_match = re.match(r'^\s*(\d{1,3})\s*\.\s*(.*)', block, re.DOTALL)
-            if not q_num_match: continue
-            
-            q_num = int(q_num_match.group(1))
+        for block in split_question_blocks(LINE_LEXER.tokenize(lines)):
+            # Worked explanations run up to the next question and are dropped.
+            explanation_index = index_of(block, EXPLANATION)
+            if explanation_index is not None:
+                block = block[:explanation_index]
+
+            q_num = block[0].value
             if q_num in parsed_question_numbers:
                 continue
             parsed_question_numbers.add(q_num)
             
             question_type = get_question_type(q_num)
-            content_text = q_num_match.group(2).strip()
-            question_data = {"questionNUM": f"pdf_{q_num}", "questionType": question_type, "image": None}
+            # A Question lists its fields in output order whatever order each branch sets them in.
+            question_data = None
 
             if question_type == "MCQ":
-                parts = re.split(r'\nAnswer:\s*', content_text, flags=re.IGNORECASE, maxsplit=1)
-                if len(parts) < 2: continue
+                answer_index = index_of(block, ANSWER, 1)
+                if answer_index is None: continue
                 
-                question_and_options_part, answer_part = parts
-                question_text_lines, options = [], []
+                answer_part = join_body(block, answer_index)
+                question_text_lines, options = [block[0].body], []
                 
-                for line in question_and_options_part.split('\n'):
-                    stripped_line = line.strip()
-                    if re.match(r'^[A-D]\)\s*', stripped_line):
-                        options.append(re.sub(r'^[A-D]\)\s*', '', stripped_line).strip())
+                for tok in block[1:answer_index]:
+                    if tok.kind == OPTION:
+                        options.append(tok.body.strip())
                     else:
-                        question_text_lines.append(line)
+                        question_text_lines.append(tok.text)
                 
                 if not options: continue
-                
-                question_data["question"] = "\n".join(question_text_lines).strip()
-                question_data["options"] = options
-                question_data["mark"] = 1
 
                 answer_letter_match = re.search(r'^\s*([A-D])\b', answer_part.strip(), re.IGNORECASE)
                 correct_answer_text = ""
@@ -136,135 +128,109 @@ def process_maths_pdf(pdf_path):
                     if cleaned_answer in options:
                         correct_option_index = options.index(cleaned_answer) + 1
 
-                question_data["correctAnswer"] = correct_answer_text
-                question_data["correctOptionIndex"] = correct_option_index
+                question_data = Question(
+                    questionNUM=f"pdf_{q_num}",
+                    question="\n".join(question_text_lines).strip(),
+                    questionType=question_type,
+                    image=None,
+                    options=options,
+                    correctOptionIndex=correct_option_index,
+                    correctAnswer=correct_answer_text,
+                    mark=1,
+                )
 
             elif question_type in ["ShortAnswer", "LongAnswer"]:
-                keywords_split = re.split(r'\nKeywords:\s*', content_text, flags=re.IGNORECASE, maxsplit=1)
-                main_content = keywords_split[0]
-                keywords_text = keywords_split[1] if len(keywords_split) > 1 else ""
+                keywords_index = index_of(block, KEYWORDS, 1)
+                keywords_text = join_body(block, keywords_index)
 
-                answer_split = re.split(r'\nAnswer:\s*', main_content, flags=re.IGNORECASE, maxsplit=1)
-                if len(answer_split) < 2: continue
+                answer_index = index_of(block, ANSWER, 1, keywords_index)
+                if answer_index is None: continue
                 
-                before_answer_part, answer_part = answer_split
-                solution_split = re.split(r'\nSolution:\s*', before_answer_part, flags=re.IGNORECASE, maxsplit=1)
+                solution_index = index_of(block, SOLUTION, 1, answer_index)
+                question_end = answer_index if solution_index is None else solution_index
                 
-                question_data["question"] = solution_split[0].strip() if len(solution_split) > 1 else before_answer_part.strip()
-                question_data["solution"] = solution_split[1].strip() if len(solution_split) > 1 else ""
-                question_data["correctAnswer"] = answer_part.strip()
-                question_data["answerKeyword"] = [k.strip() for k in keywords_text.split(',') if k.strip()]
+                question_data = Question(
+                    questionNUM=f"pdf_{q_num}",
+                    question=join_body(block, 0, question_end).strip(),
+                    questionType=question_type,
+                    image=None,
+                    solution=join_body(block, solution_index, answer_index).strip() if solution_index is not None else "",
+                    correctAnswer=join_body(block, answer_index, keywords_index).strip(),
+                    answerKeyword=[k.strip() for k in keywords_text.split(',') if k.strip()],
+                )
 
                 if question_type == "ShortAnswer":
                     question_data["mark"] = 3
                 elif question_type == "LongAnswer":
                     question_data["mark"] = 5
             
-            if "question" in question_data and question_data["question"]:
+            if question_data and question_data["question"]:
                 all_questions_data.append(question_data)
 
         return all_questions_data
 
-    # --- 3. Main PDF Processing Logic ---
+    # --- 2. Main PDF Processing Logic ---
+    pdf_source = read_source(pdf_source)
+    metrics = RunMetrics()
     try:
-        pdf_document = fitz.open(pdf_path)
+        pages = read_pdf_pages(pdf_source, metrics=metrics)
     # === THIS IS THE CORRECTED LINE ===
     except FileNotFoundError:
-        print(f"Error: The file '{pdf_path}' was not found.")
-        return
+        print(f"Error: The file '{pdf_source}' was not found.")
+        return None
+    metrics.mark()
 
-    extracted_text = "".join(page.get_text() for page in pdf_document)
-    pdf_document.close()
+    extracted_text = "".join(pages)
 
     cleaned_text = re.sub(r'Page\s*\d+', '', extracted_text)
     lines = cleaned_text.splitlines()
+    metrics.count("lines_in", len(lines))
 
     filtered_lines = [
         line.strip() for line in lines if line.strip() and
-        not (re.search(r'CBSE', line, re.IGNORECASE) and re.search(r'GRADE', line, re.IGNORECASE)) and
-        not re.search(r'Chapter\s*\d{1,2}', line, re.IGNORECASE) and
-        not re.search(r'Mathematics', line, re.IGNORECASE)
+        not NOISE_LINE_RULES.should_remove(line, metrics)
     ]
+    metrics.lap("clean")
 
-    without_explanations = remove_explanations_from_questions(filtered_lines)
     # The call to remove_keywords_from_questions is removed to allow keyword parsing.
-    all_questions = parse_questions_to_json_structure(without_explanations)
-
-    # --- New section to re-order keys for clean JSON output ---
-    ordered_questions = []
-    for q in all_questions:
-        q_type = q.get("questionType")
-        ordered_q = {}
-
-        if q_type == "MCQ":
-            ordered_q = {
-                "questionNUM": q.get("questionNUM"),
-                "question": q.get("question"),
-                "questionType": q_type,
-                "image": q.get("image"),
-                "options": q.get("options"),
-                "correctOptionIndex": q.get("correctOptionIndex"),
-                "correctAnswer": q.get("correctAnswer"),
-                "mark": q.get("mark")
-            }
-        elif q_type in ["ShortAnswer", "LongAnswer"]:
-            ordered_q = {
-                "questionNUM": q.get("questionNUM"),
-                "question": q.get("question"),
-                "questionType": q_type,
-                "image": q.get("image"),
-                "solution": q.get("solution"),
-                "correctAnswer": q.get("correctAnswer"),
-                "answerKeyword": q.get("answerKeyword"),
-                "mark": q.get("mark")
-            }
-        else: # Fallback for any unexpected types
-            ordered_q = q
-        
-        ordered_questions.append(ordered_q)
-
-    with open(json_output_path, "w", encoding="utf-8") as json_file:
-        json.dump(ordered_questions, json_file, indent=4, ensure_ascii=False)
-
-    # --- 4. Duplicate Checking Logic (using the ordered list for consistency) ---
-    def normalize_question_text(text):
-        return re.sub(r'\s+', '', text.lower()) if isinstance(text, str) else ""
+    ordered_questions = parse_questions_to_json_structure(filtered_lines)
+    metrics.lap("parse")
 
+    # --- 3. Duplicate Checking Logic (using the ordered list for consistency) ---
     def count_option_mismatches(opt1, opt2):
         s1 = set(map(str, opt1)) if isinstance(opt1, list) else set()
         s2 = set(map(str, opt2)) if isinstance(opt2, list) else set()
         return len(s1.symmetric_difference(s2))
 
-    seen, reports, dup_count = {}, [], 0
-    for item in ordered_questions:
-        norm = normalize_question_text(item.get("question", ""))
-        if not norm:
-            continue
-        if norm in seen:
-            dup_count += 1
-            orig = seen[norm]
-            mismatch = []
-            if item.get("questionType") != orig.get("questionType"):
-                mismatch.append("questionType mismatch")
-            if str(item.get("correctAnswer")) != str(orig.get("correctAnswer")):
-                mismatch.append("correctAnswer mismatch")
-            if str(item.get("solution")) != str(orig.get("solution")):
-                mismatch.append("solution mismatch")
-            if item.get("questionType", "").lower() == "mcq":
-                mismatch.append(f"{count_option_mismatches(item.get('options'), orig.get('options'))} options mismatched")
-            summary = f"DUPLICATE {dup_count}: {item['questionNUM']} duplicates {orig['questionNUM']} - {', '.join(mismatch) or 'all fields match'}"
-            reports.append(f"{summary}\n\nOriginal:\n{json.dumps(orig, indent=4)}\n\nDuplicate:\n{json.dumps(item, indent=4)}\n{'='*70}\n")
-        else:
-            seen[norm] = item
-
-    with open(duplicate_output_path, "w", encoding="utf-8") as f:
-        if reports:
-            f.write(f"Found {dup_count} duplicate entries.\n{'='*70}\n\n" + "\n".join(reports))
-        else:
-            f.write("No duplicates found.\n")
-
-    print(f"\n✅ Extracted questions to {json_output_path}")
-    print(f"✅ Duplicate report saved to {duplicate_output_path}")
+    duplicates, dup_count = [], 0
+    question_texts = [item.get("question", "") for item in ordered_questions]
+    for orig_idx, dup_idx, similarity in find_duplicate_pairs(question_texts):
+        dup_count += 1
+        orig, item = ordered_questions[orig_idx], ordered_questions[dup_idx]
+        mismatch = []
+        if item.get("questionType") != orig.get("questionType"):
+            mismatch.append("questionType mismatch")
+        if str(item.get("correctAnswer")) != str(orig.get("correctAnswer")):
+            mismatch.append("correctAnswer mismatch")
+        if str(item.get("solution")) != str(orig.get("solution")):
+            mismatch.append("solution mismatch")
+        if item.get("questionType", "").lower() == "mcq":
+            mismatch.append(f"{count_option_mismatches(item.get('options'), orig.get('options'))} options mismatched")
+        duplicates.append(duplicate_record(dup_count, orig_idx, dup_idx, ordered_questions, similarity, mismatch))
+    duplicates += long_text_duplicates(ordered_questions, duplicates)
+    duplicates += option_set_duplicates(ordered_questions, duplicates)
+
+    metrics.lap("dedup")
+    metrics.count_result(ordered_questions, duplicates)
+    result = ProcessorResult(ordered_questions, duplicates)
+
+    # --- 4. Optional file output ---
+    if output_folder:
+        with metrics.stage("serialize"):
+            json_output_path, duplicate_output_path = write_result(result, output_folder, "maths_questions.json", style=REPORT_STYLE)
+        print(f"\n✅ Extracted questions to {json_output_path}")
+        print(f"✅ Duplicate report saved to {duplicate_output_path}")
+    return metrics.attach(result)
 
 # --- Example Usage ---
 if __name__ == "__main__":
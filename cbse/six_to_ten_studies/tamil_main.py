@@ -1,42 +1,76 @@
-import streamlit as st
 import re
 import json
 import os
-import shutil
-from docx import Document
-import tempfile
+
+from cbse.common.docx_stream import iter_paragraphs
+from cbse.common.duplicate_report import ReportStyle, duplicate_record, render_clusters_text
+from cbse.common.line_lexer import HEADING, QUESTION_START, LineLexer
+from cbse.common.near_duplicates import find_duplicate_pairs
+from cbse.common.option_sets import option_set_duplicates
+from cbse.common.processor_io import ProcessorResult, as_file, write_result
+from cbse.common.question_record import Question, json_default
+from cbse.common.run_metrics import RunMetrics
+from cbse.common.simhash import long_text_duplicates
+
+# Layout of this subject's text duplicate report.
+REPORT_STYLE = ReportStyle(
+    summary=("DUPLICATE FOUND\n"
+             " - Original Item  : {originalNUM} (from Subchapter: \"{orig[subchapter]}\")\n"
+             " - Duplicate Item : {duplicateNUM} (from Subchapter: \"{dup[subchapter]}\")\n"
+             " - Mismatches     : {mismatch_text}"),
+    near_duplicate="\n - Similarity     : {similarity:.2f} (near-duplicate)",
+    no_mismatch="None (Exact Match)",
+    entry="{summary}\n\n--- Original Item ---\n{orig_json}\n\n--- Duplicate Item ---\n{dup_json}\n{rule}\n",
+    header="Found {count} duplicate question(s).\n\n{rule}\n\n",
+    empty="No duplicate questions were found in the document.",
+    rule="=" * 80,
+    indent=2,
+    text_match="\n - Matched On     : near-identical {matchedOn} (similarity {similarity:.2f})",
+)
+
+# Question-type headings, compared with all whitespace removed.
+SPECIAL_SENTENCES = [
+    "சரியானவிடையைத்தேர்ந்தெடுத்துஎழுதுக",
+    "சிறுவினா",
+    "பெருவினா"
+]
+
+# --- Line tokens consumed by parse_questions_from_docx ---
+# Headings are chapter lines ("Chapter 1", "Chapter 1.1") and the question-type
+# sentences above, allowing whitespace anywhere inside them.
+LINE_LEXER = LineLexer([
+    (HEADING, r"(?i:Chapter.?\s*\d+)|" + "|".join(r"\s*" + r"\s*".join(map(re.escape, s)) for s in SPECIAL_SENTENCES)),
+    # IMPROVEMENT: Handles numbers at the very start of a line.
+    (QUESTION_START, r"\s*(\d+)\s*[.)]"),
+])
 
 # =================================================================
 # ===== SINGLE, DEPLOYABLE PROCESSING FUNCTION ====================
 # =================================================================
 # This is the processing logic you provided, with minor regex improvements.
-def process_tamil_pdf(input_docx_path):
+def process_tamil_pdf(docx_source, output_folder=None):
     """
     Main orchestrator function to process a single DOCX document for Streamlit.
     This function is designed to be called by a web app. It performs the
     entire workflow in memory and returns the results.
     1. Parses the DOCX file to extract questions.
-    2. Reorders keys for consistent formatting.
-    3. Analyzes for duplicates.
-    4. Returns the structured data and the duplicate report.
+    2. Analyzes for duplicates.
+    3. Returns the structured data and the duplicate records.
     Args:
-        input_docx_path (str): The full path to the temporary input .docx file.
+        docx_source: Path, bytes or binary file object of the input .docx file.
+        output_folder (str, optional): If given, the JSON and the duplicate
+            report are also written to this folder.
     Returns:
-        tuple: A tuple containing (ordered_questions, duplicate_report_content).
-               Returns (None, None) if processing fails.
+        ProcessorResult: (questions, duplicates), or None if processing fails.
     """
-    print(f"--- Starting Full Process for: {input_docx_path} ---")
+    source_name = docx_source if isinstance(docx_source, (str, os.PathLike)) else "uploaded document"
+    print(f"--- Starting Full Process for: {source_name} ---")
     # --- Initial File Check ---
-    if not os.path.exists(input_docx_path):
-        print(f"❌ Error: Input file not found at '{input_docx_path}'. Aborting process.")
-        return None, None
+    if isinstance(docx_source, (str, os.PathLike)) and not os.path.exists(docx_source):
+        print(f"❌ Error: Input file not found at '{docx_source}'. Aborting process.")
+        return None
 
     # --- Configuration Constants ---
-    SPECIAL_SENTENCES = [
-        "சரியானவிடையைத்தேர்ந்தெடுத்துஎழுதுக",
-        "சிறுவினா",
-        "பெருவினா"
-    ]
     QUESTION_TYPE_MAPPING = {
         "சரியானவிடையைத்தேர்ந்தெடுத்துஎழுதுக": "MCQ",
         "சிறுவினா": "Short Answer",
@@ -77,7 +111,7 @@ def process_tamil_pdf(input_docx_path):
                 print(f"Warning: Could not find answer '{correct_answer_clean}' in options for Q#{q_num}. Index set to -1.")
             
             q_type_key = "சரியானவிடையைத்தேர்ந்தெடுத்துஎழுதுக"
-            return {"questionNUM": f"pdf_{q_num}", "question": question_text, "questionType": QUESTION_TYPE_MAPPING[q_type_key], "image": None, "options": option_list, "correctOptionIndex": correct_option_index, "correctAnswer": correct_answer_clean, "mark": MARKS_MAPPING[q_type_key], "subchapter": subchapter}
+            return Question(questionNUM=f"pdf_{q_num}", question=question_text, questionType=QUESTION_TYPE_MAPPING[q_type_key], image=None, options=option_list, correctOptionIndex=correct_option_index, correctAnswer=correct_answer_clean, mark=MARKS_MAPPING[q_type_key], subchapter=subchapter)
         except Exception as e:
             print(f"Error parsing MCQ Q#{q_num}: {e}\nContent:\n{qa_text}\n")
             return None
@@ -94,7 +128,7 @@ def process_tamil_pdf(input_docx_path):
             question_text = re.sub(r"^\s*\d+\s*[.)]\s*", "", question_part.strip(), 1)
             keywords_list = [k.strip() for k in keywords_part.split(',') if k.strip()]
             
-            return {"questionNUM": f"pdf_{q_num}", "question": question_text, "questionType": QUESTION_TYPE_MAPPING[q_type_key], "image": None, "correctAnswer": answer_part, "answerKeyword": keywords_list, "mark": MARKS_MAPPING[q_type_key], "subchapter": subchapter}
+            return Question(questionNUM=f"pdf_{q_num}", question=question_text, questionType=QUESTION_TYPE_MAPPING[q_type_key], image=None, correctAnswer=answer_part, answerKeyword=keywords_list, mark=MARKS_MAPPING[q_type_key], subchapter=subchapter)
         except Exception as e:
             print(f"Error parsing Descriptive Q#{q_num}: {e}\nContent:\n{qa_text}\n")
             return None
@@ -104,12 +138,15 @@ def process_tamil_pdf(input_docx_path):
         print("Starting question parsing process...")
         all_questions_data = []
         try:
-            doc = Document(file_path)
-            lines = [p.text.strip() for p in doc.paragraphs if p.text.strip()]
+            with metrics.stage("extract"):
+                paragraphs = [p.text for p in iter_paragraphs(file_path)]
+            metrics.count("paragraphs", len(paragraphs))
+            metrics.count("lines_in", len(paragraphs))
+            with metrics.stage("clean"):
+                lines = [text.strip() for text in paragraphs if text.strip()]
+            metrics.count("lines_dropped", len(paragraphs) - len(lines), key="blank line")
             current_subchapter, current_q_type_key, current_qa_lines = "Unknown Subchapter", None, []
             chapter_pattern = re.compile(r"^(Chapter.?\s*\d+(\.\d+)?)", re.IGNORECASE) # Allow for "Chapter 1" and "Chapter 1.1"
-            # IMPROVEMENT: Handles numbers at the very start of a line.
-            question_start_pattern = re.compile(r"^\s*\d+\s*[.)]") 
 
             def process_collected_block():
                 nonlocal all_questions_data, current_qa_lines
@@ -128,13 +165,13 @@ def process_tamil_pdf(input_docx_path):
                 if parsed_data:
                     all_questions_data.append(parsed_data)
 
-            for line in lines:
-                no_space_line = "".join(line.split())
-                is_q_type_heading = next((s for s in SPECIAL_SENTENCES if no_space_line.startswith(s)), None)
-                
-                chapter_match = chapter_pattern.search(line)
-                
-                if chapter_match or is_q_type_heading:
+            for tok in LINE_LEXER.tokenize(lines):
+                line = tok.text
+                if tok.kind == HEADING:
+                    no_space_line = "".join(line.split())
+                    is_q_type_heading = next((s for s in SPECIAL_SENTENCES if no_space_line.startswith(s)), None)
+                    chapter_match = chapter_pattern.search(line)
+
                     process_collected_block()
                     current_qa_lines = []
                     if chapter_match:
@@ -145,7 +182,7 @@ def process_tamil_pdf(input_docx_path):
                         current_q_type_key = is_q_type_heading
                     continue
                 
-                if question_start_pattern.match(line):
+                if tok.kind == QUESTION_START:
                     process_collected_block()
                     current_qa_lines = [line]
                 elif current_qa_lines:
@@ -159,144 +196,109 @@ def process_tamil_pdf(input_docx_path):
             print(f"An unexpected error occurred during parsing: {e}")
             return []
 
-    def find_and_report_duplicates(question_data):
-        """Analyzes question data for duplicates and returns a report string."""
+    def find_duplicates(question_data):
+        """Analyzes question data for duplicates and returns the duplicate records."""
         print("\nStarting duplicate detection process...")
-        def normalize_question_text(text):
-            return re.sub(r'\s+', '', text.lower()) if isinstance(text, str) else ""
-
         def count_option_mismatches(opts1, opts2):
             set1 = set(map(str, opts1)) if isinstance(opts1, list) else set()
             set2 = set(map(str, opts2)) if isinstance(opts2, list) else set()
             return len(set1.symmetric_difference(set2))
 
-        seen, reports, dup_count = {}, [], 0
-        for item in question_data:
-            norm_question = normalize_question_text(item.get("question", ""))
-            if not norm_question: continue
+        duplicates, dup_count = [], 0
+        question_texts = [item.get("question", "") for item in question_data]
+        for orig_idx, dup_idx, similarity in find_duplicate_pairs(question_texts):
+            dup_count += 1
+            orig, item = question_data[orig_idx], question_data[dup_idx]
+            mismatch_details = []
 
-            if norm_question in seen:
-                dup_count += 1
-                orig = seen[norm_question]
-                mismatch_details = []
+            if item.get("subchapter") != orig.get("subchapter"): mismatch_details.append(f"Subchapter (Orig: '{orig.get('subchapter')}', Dup: '{item.get('subchapter')}')")
+            if item.get("questionType") != orig.get("questionType"): mismatch_details.append(f"Question Type (Orig: '{orig.get('questionType')}', Dup: '{item.get('questionType')}')")
+            if str(item.get("correctAnswer")) != str(orig.get("correctAnswer")): mismatch_details.append("Correct Answer")
+            
+            if item.get("questionType") == "சரியான விடையைத் தேர்ந்தெடுத்து எழுதுக":
+                option_diff = count_option_mismatches(item.get('options'), orig.get('options'))
+                if option_diff > 0: mismatch_details.append(f"{option_diff} Options")
+            
+            duplicates.append(duplicate_record(dup_count, orig_idx, dup_idx, question_data, similarity, mismatch_details))
+        duplicates += long_text_duplicates(question_data, duplicates)
+        duplicates += option_set_duplicates(question_data, duplicates)
 
-                if item.get("subchapter") != orig.get("subchapter"): mismatch_details.append(f"Subchapter (Orig: '{orig.get('subchapter')}', Dup: '{item.get('subchapter')}')")
-                if item.get("questionType") != orig.get("questionType"): mismatch_details.append(f"Question Type (Orig: '{orig.get('questionType')}', Dup: '{item.get('questionType')}')")
-                if str(item.get("correctAnswer")) != str(orig.get("correctAnswer")): mismatch_details.append("Correct Answer")
-                
-                if item.get("questionType") == "சரியான விடையைத் தேர்ந்தெடுத்து எழுதுக":
-                    option_diff = count_option_mismatches(item.get('options'), orig.get('options'))
-                    if option_diff > 0: mismatch_details.append(f"{option_diff} Options")
-                
-                summary = (f"DUPLICATE FOUND\n"
-                           f" - Original Item  : {orig['questionNUM']} (from Subchapter: \"{orig.get('subchapter')}\")\n"
-                           f" - Duplicate Item : {item['questionNUM']} (from Subchapter: \"{item.get('subchapter')}\")\n"
-                           f" - Mismatches     : {', '.join(mismatch_details) or 'None (Exact Match)'}")
-                
-                report_entry = (f"{summary}\n\n"
-                                f"--- Original Item ---\n{json.dumps(orig, indent=2, ensure_ascii=False)}\n\n"
-                                f"--- Duplicate Item ---\n{json.dumps(item, indent=2, ensure_ascii=False)}\n"
-                                f"{'='*80}\n")
-                reports.append(report_entry)
-            else:
-                seen[norm_question] = item
-        
-        if reports:
-            print(f"Found {dup_count} duplicates.")
-            final_report = f"Found {dup_count} duplicate question(s).\n\n{'='*80}\n\n"
-            final_report += "\n".join(reports)
-            return final_report
+        if duplicates:
+            print(f"Found {len(duplicates)} duplicates.")
         else:
             print("No duplicates found.")
-            return "No duplicate questions were found in the document."
+        return duplicates
 
     # =================================================================
     # ===== EXECUTION FLOW ============================================
     # =================================================================
     
     # --- Step 1: Parse the DOCX to extract question data ---
-    parsed_questions = parse_questions_from_docx(input_docx_path)
+    metrics = RunMetrics()
+    ordered_questions = parse_questions_from_docx(as_file(docx_source))
+    metrics.lap("parse")
     
-    if not parsed_questions:
+    if not ordered_questions:
         print("\nNo questions were parsed from the document. Halting process.")
-        return None, None
+        return None
 
-    # --- Step 2: Reorder keys for consistent format ---
-    print("\nReordering JSON keys for consistent output format...")
-    ordered_questions = []
-    for q in parsed_questions:
-        q_type = q.get("questionType")
-        
-        if q_type == "சரியான விடையைத் தேர்ந்தெடுத்து எழுதுக":
-            ordered_q = {
-                "questionNUM": q.get("questionNUM"), "question": q.get("question"),
-                "questionType": q_type, "image": q.get("image"), "options": q.get("options"),
-                "correctOptionIndex": q.get("correctOptionIndex"), "correctAnswer": q.get("correctAnswer"),
-                "mark": q.get("mark"), "subchapter": q.get("subchapter")
-            }
-        elif q_type in ["சிறுவினா", "பெருவினா"]:
-            ordered_q = {
-                "questionNUM": q.get("questionNUM"), "question": q.get("question"),
-                "questionType": q_type, "image": q.get("image"), "correctAnswer": q.get("correctAnswer"),
-                "answerKeyword": q.get("answerKeyword"), "mark": q.get("mark"), "subchapter": q.get("subchapter")
-            }
-        else:
-            ordered_q = q
-        ordered_questions.append(ordered_q)
-
-    # --- Step 3: Run duplicate detection on the generated data ---
-    duplicate_report_content = find_and_report_duplicates(ordered_questions)
+    # --- Step 2: Run duplicate detection on the generated data ---
+    duplicates = find_duplicates(ordered_questions)
     
-    print(f"\n--- Process complete for {input_docx_path}. Returning results. ---")
-    
-    # --- Step 4: Return the results for Streamlit ---
-    return ordered_questions, duplicate_report_content
+    print(f"\n--- Process complete for {source_name}. Returning results. ---")
+    metrics.lap("dedup")
+    metrics.count_result(ordered_questions, duplicates)
+    result = ProcessorResult(ordered_questions, duplicates)
+
+    # --- Step 3: Optionally save, then return the results for Streamlit ---
+    if output_folder:
+        with metrics.stage("serialize"):
+            write_result(result, output_folder, "tamil_questions.json", style=REPORT_STYLE)
+    return metrics.attach(result)
 
 
 # =================================================================
 # ===== STREAMLIT APPLICATION UI ==================================
 # =================================================================
 
-st.set_page_config(page_title="Tamil DOCX Processor", layout="wide")
+def main():
+    """Standalone Tamil uploader, run with `streamlit run cbse/six_to_ten_studies/tamil_main.py`."""
+    # Imported here so importing this module (e.g. from app.py) has no UI side effects.
+    import streamlit as st
 
-st.title("📄 Tamil DOCX to JSON & Duplicate Report Generator")
-st.markdown("""
+    st.set_page_config(page_title="Tamil DOCX Processor", layout="wide")
+
+    st.title("📄 Tamil DOCX to JSON & Duplicate Report Generator")
+    st.markdown("""
 Upload a `.docx` file formatted with Tamil questions. The application will:
 1.  Parse the questions, options, and answers.
 2.  Generate a structured JSON file.
 3.  Analyze the content for duplicate questions and create a report.
 """)
 
-# --- File Uploader ---
-uploaded_file = st.file_uploader("Choose a DOCX file", type="docx")
+    # --- File Uploader ---
+    uploaded_file = st.file_uploader("Choose a DOCX file", type="docx")
 
-if uploaded_file is not None:
-    # --- Process Button ---
-    # if st.button("🚀 Process File", use_container_width=True):
-        
-    # Use a temporary directory to safely handle the file
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_file_path = os.path.join(temp_dir, uploaded_file.name)
+    if uploaded_file is not None:
+        # --- Process Button ---
+        # if st.button("🚀 Process File", use_container_width=True):
         
-        # Save the uploaded file to the temporary path
-        with open(temp_file_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-    
         try:
             # Use a spinner for better user experience during processing
             with st.spinner(f"Processing '{uploaded_file.name}'... This may take a moment."):
                 # Call the main processing function
-                json_data, report_data = process_tamil_pdf(temp_file_path)
+                result = process_tamil_pdf(uploaded_file.getvalue())
+            json_data, duplicates = (result.questions, result.duplicates) if result is not None else (None, None)
     
             # --- Display Results ---
-            if json_data is not None and report_data is not None:
+            if json_data is not None and duplicates is not None:
                 st.success("✅ Processing complete!")
-                
+            
                 # Prepare data for download
-                # The report is already a string.
+                # The report text is only rendered when its download is clicked.
                 # The JSON data needs to be converted to a formatted string.
-                json_string = json.dumps(json_data, indent=2, ensure_ascii=False)
-                
+                json_string = json.dumps(json_data, indent=2, ensure_ascii=False, default=json_default)
+            
                 # Create unique filenames for download based on the uploaded file
                 base_filename = os.path.splitext(uploaded_file.name)[0]
                 download_json_filename = f"{base_filename}_questions.json"
@@ -304,9 +306,9 @@ if uploaded_file is not None:
     
                 st.markdown("<hr>", unsafe_allow_html=True)
                 st.markdown("<h4 style='text-align: center;'>📥 Download Results</h4>", unsafe_allow_html=True)
-                
+            
                 col1, col2 = st.columns(2)
-                
+            
                 with col1:
                     st.download_button(
                         label="⬇️ Download JSON File",
@@ -315,11 +317,11 @@ if uploaded_file is not None:
                         mime="application/json",
                         use_container_width=True
                     )
-                
+            
                 with col2:
                     st.download_button(
                         label="⬇️ Download Duplicate Report (.txt)",
-                        data=report_data,
+                        data=lambda: render_clusters_text(json_data, duplicates, REPORT_STYLE),
                         file_name=download_txt_filename,
                         mime="text/plain",
                         use_container_width=True
@@ -327,17 +329,12 @@ if uploaded_file is not None:
     
                 st.markdown("<hr>", unsafe_allow_html=True)
                 st.markdown("<h4 style='text-align: center;'>🔍 Duplicate Report Preview</h4>", unsafe_allow_html=True)
-                
-                # Display the duplicate report content on the page
-                if "No duplicate questions were found" in report_data:
+            
+                # Display the duplicate pairs on the page
+                if not duplicates:
                     st.info("✅ No duplicates were found in the document.")
                 else:
-                    st.text_area(
-                        label="Duplicate Report Content:", 
-                        value=report_data, 
-                        height=400,
-                        label_visibility="collapsed" # Hides the label "Duplicate Report Content:"
-                    )
+                    st.dataframe(duplicates, use_container_width=True, hide_index=True)
     
             else:
                 st.error("❌ Processing Failed. No data was extracted. Please ensure the DOCX format matches the expected structure.")
@@ -345,6 +342,7 @@ if uploaded_file is not None:
         except Exception as e:
             st.error("An unexpected error occurred during processing.")
             st.exception(e)
-            
-            # The 'with tempfile.TemporaryDirectory()' context manager handles automatic cleanup
-            # of the temporary directory and the file inside it.
\ No newline at end of file
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Job queue workers: processes the files the app submits to the SQLite job
+queue (JOB_QUEUE_DB, default job_queue.sqlite3).
+
+The app starts UPLOAD_WORKERS workers itself; run this instead (with
+UPLOAD_WORKERS=0 for the app) to keep workers alive across app restarts or
+to add capacity:
+
+    python -m cbse.worker --workers 4
+"""
+import os
+import sys
+import argparse
+import multiprocessing
+
+from cbse.common.job_queue import JOB_QUEUE_DB_PATH, run_worker
+
+
+def start_workers(count, db_path=JOB_QUEUE_DB_PATH, daemon=False):
+    """Starts `count` worker processes ("spawn", so they share nothing with the caller) and returns them."""
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=run_worker, args=(db_path,), daemon=daemon, name=f"job-worker-{i}")
+               for i in range(count)]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--db", default=JOB_QUEUE_DB_PATH, help="job queue database")
+    args = parser.parse_args(argv)
+
+    workers = start_workers(max(1, args.workers), args.db)
+    print(f"{len(workers)} worker(s) processing jobs from {args.db}; Ctrl+C to stop.")
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        # Jobs interrupted mid-run are picked up again once their lease expires.
+        for worker in workers:
+            worker.terminate()
+        return 130
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
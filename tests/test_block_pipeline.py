@@ -0,0 +1,40 @@
+import io
+import contextlib
+
+import pytest
+
+from benchmarks.synthetic_docs import build_lines, write_docx
+from cbse.common.subjects import load_processor, subject_processors
+
+DOCX_SUBJECTS = ["Biotechnology", "Chemistry", "Physics", "Commerce", "Hindi", "Tamil"]
+# Per-block subjects whose documents may hold several chapters, each opening
+# with a "CBSE ... GRADE" header. Commerce reads the first chapter only.
+CHAPTER_SUBJECTS = ["Biotechnology", "Chemistry", "Physics", "Commerce"]
+
+
+def process(subject, lines, tmp_path, soft_breaks=False):
+    path = tmp_path / f"{subject}_{len(lines)}_{'soft' if soft_breaks else 'plain'}.docx"
+    write_docx(str(path), lines, soft_breaks=soft_breaks)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return load_processor(subject_processors[subject]["func"])(path.read_bytes(), output_folder=None)
+
+
+@pytest.mark.parametrize("subject", DOCX_SUBJECTS)
+def test_soft_line_breaks_parse_like_paragraphs(subject, tmp_path):
+    lines = build_lines(subject, 60)
+    plain, soft = process(subject, lines, tmp_path), process(subject, lines, tmp_path, soft_breaks=True)
+    assert plain.questions
+    assert soft.questions == plain.questions
+    assert soft.duplicates == plain.duplicates
+
+
+@pytest.mark.parametrize("subject", CHAPTER_SUBJECTS)
+def test_chapters_parse_as_if_they_were_separate_documents(subject, tmp_path):
+    lines = build_lines(subject, 260)
+    starts = [i for i, line in enumerate(lines) if line.startswith("CBSE")] + [len(lines)]
+    assert len(starts) == 3
+    whole = process(subject, lines, tmp_path).questions
+    chapters = [process(subject, lines[start:stop], tmp_path).questions for start, stop in zip(starts, starts[1:])]
+    expected = chapters[0] if subject == "Commerce" else chapters[0] + chapters[1]
+    assert len(whole) == len(expected) == (200 if subject == "Commerce" else 260)
+    assert whole == expected
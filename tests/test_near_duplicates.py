@@ -0,0 +1,36 @@
+import pytest
+
+from cbse.common.near_duplicates import find_cross_file_pairs, find_duplicate_pairs
+
+PHOTOSYNTHESIS = "Which process do green plants use to make their own food from sunlight, water and carbon dioxide?"
+PHOTOSYNTHESIS_REWORDED = "Which process do green plants use to make their own food from sunlight, water and carbon dioxide in leaves?"
+RESPIRATION = "Name the process by which cells release energy from glucose."
+
+MODES = ["lsh", "tfidf"]
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_duplicates_are_reported_against_the_earliest_match(mode):
+    texts = [PHOTOSYNTHESIS, RESPIRATION, PHOTOSYNTHESIS, PHOTOSYNTHESIS_REWORDED]
+    pairs = find_duplicate_pairs(texts, mode=mode)
+    assert [(orig, dup) for orig, dup, _ in pairs] == [(0, 2), (0, 3)]
+    assert pairs[0][2] == 1.0
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_cross_file_match_survives_an_earlier_copy_in_the_same_file(mode):
+    texts_by_file = [[RESPIRATION, PHOTOSYNTHESIS, PHOTOSYNTHESIS], [PHOTOSYNTHESIS, RESPIRATION]]
+    pairs = find_cross_file_pairs(texts_by_file, mode=mode)
+    assert [pair[:4] for pair in pairs] == [(0, 1, 1, 0), (0, 0, 1, 1)]
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_cross_file_near_duplicate_of_a_question_repeated_in_its_file(mode):
+    texts_by_file = [[PHOTOSYNTHESIS], [PHOTOSYNTHESIS_REWORDED, PHOTOSYNTHESIS_REWORDED]]
+    pairs = find_cross_file_pairs(texts_by_file, mode=mode)
+    assert [pair[:4] for pair in pairs] == [(0, 0, 1, 0), (0, 0, 1, 1)]
+    assert all(0.8 <= pair[4] < 1.0 for pair in pairs)
+
+
+def test_questions_repeated_within_one_file_are_not_cross_file_pairs():
+    assert find_cross_file_pairs([[PHOTOSYNTHESIS, PHOTOSYNTHESIS], [RESPIRATION]]) == []
@@ -0,0 +1,33 @@
+from cbse.common.option_sets import find_option_set_pairs, option_set
+
+ENGLISH_OPTIONS = ["Photosynthesis", "Respiration", "Transpiration", "Digestion"]
+HINDI_OPTIONS = ["प्रकाश संश्लेषण", "श्वसन", "वाष्पोत्सर्जन", "पाचन"]
+
+
+def mcq(question, options, question_type="MCQ"):
+    return {"question": question, "questionType": question_type, "options": options}
+
+
+def test_reworded_mcqs_with_shuffled_options_are_paired():
+    questions = [mcq("Which process do plants use to make their food?", ENGLISH_OPTIONS),
+                 mcq("Plants make their food by which process?", ENGLISH_OPTIONS[::-1])]
+    assert find_option_set_pairs(questions) == [(0, 1, 1.0)]
+
+
+def test_hindi_mcqs_are_indexed_under_their_own_type_label():
+    questions = [mcq("पौधे भोजन किस प्रक्रिया से बनाते हैं?", HINDI_OPTIONS, "बहुविकल्पीय प्रश्न"),
+                 mcq("पौधे किस प्रक्रिया से अपना भोजन बनाते हैं?", HINDI_OPTIONS[::-1], "बहुविकल्पीय प्रश्न")]
+    assert option_set(questions[0])
+    assert find_option_set_pairs(questions) == [(0, 1, 1.0)]
+
+
+def test_stock_options_with_unrelated_questions_are_not_paired():
+    stock = ["Both A and B", "None of these", "All of these", "Only A"]
+    questions = [mcq("Which gas do plants take in during photosynthesis?", stock),
+                 mcq("Who wrote the national anthem of India?", stock)]
+    assert find_option_set_pairs(questions) == []
+
+
+def test_questions_without_options_have_no_option_set():
+    assert option_set({"question": "Explain respiration.", "questionType": "Short Answer"}) == frozenset()
+    assert option_set(mcq("What is 2 + 3?", ["4", "5", "6", "7"])) == frozenset()
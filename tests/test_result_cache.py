@@ -0,0 +1,22 @@
+import pytest
+
+from cbse.common import result_cache
+from cbse.common.result_cache import cache_key
+
+
+def test_same_upload_and_settings_give_the_same_key():
+    assert cache_key(b"chapter", "Science") == cache_key(b"chapter", "Science")
+    assert cache_key(b"chapter", "Science") != cache_key(b"chapter", "Maths")
+
+
+@pytest.mark.parametrize("setting, value", [
+    ("NEAR_DUPLICATE_THRESHOLD", 0.7),
+    ("SIMHASH_MAX_DISTANCE", 3),
+    ("OPTION_SET_MIN_SHARED", 4),
+    ("OPTION_SET_MIN_QUESTION_OVERLAP", 0.5),
+    ("REPORT_FORMAT", "text"),
+])
+def test_every_result_setting_changes_the_key(monkeypatch, setting, value):
+    before = cache_key(b"chapter", "Science")
+    monkeypatch.setattr(result_cache, setting, value)
+    assert cache_key(b"chapter", "Science") != before